@@ -0,0 +1,10 @@
+"""
+Hot-path benchmarks for PolyBot.
+
+    python -m benchmarks run                     # all cases -> benchmarks/results/<commit>.json
+    python -m benchmarks run -k ticks --quick    # subset, fewer repeats
+    python -m benchmarks compare OLD.json NEW.json [--threshold 0.15]
+
+compare exits non-zero when any case got slower than the threshold, so it can
+gate CI or a pre-merge check. Every case runs against a throwaway LOG_DIR.
+"""
@@ -0,0 +1,66 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+
+
+def _cmd_run(args):
+    # Every case writes to a scratch LOG_DIR; set it before bot.config is imported
+    os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="polybot-bench-")
+    logging.basicConfig(level=logging.WARNING)
+
+    from benchmarks import cases  # noqa: F401  (registers the cases)
+    from benchmarks.harness import run, save
+
+    report = run(args.k, args.quick)
+    path = save(report, args.output)
+    print(f"\nSaved {len(report['results'])} results to {path}")
+
+
+def _cmd_compare(args):
+    from benchmarks.harness import compare
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    rows = compare(old, new, args.threshold)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')} (threshold {args.threshold:.0%})\n")
+    print(f"{'case':<50} {'old us':>12} {'new us':>12} {'change':>8}  status")
+    for r in sorted(rows, key=lambda r: r["name"]):
+        old_s = f"{r['old']:,.2f}" if r["old"] is not None else "-"
+        new_s = f"{r['new']:,.2f}" if r["new"] is not None else "-"
+        change = f"{r['change']:+.1%}" if r["change"] is not None else "-"
+        print(f"{r['name']:<50} {old_s:>12} {new_s:>12} {change:>8}  {r['status']}")
+
+    regressions = [r for r in rows if r["status"] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s)")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="PolyBot hot-path benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="run benchmarks and save a JSON report")
+    p_run.add_argument("-k", help="only run cases whose name contains this string")
+    p_run.add_argument("-o", "--output", help="report path (default: benchmarks/results/<commit>.json)")
+    p_run.add_argument("--quick", action="store_true", help="fewer repeats and smaller tables")
+    p_run.set_defaults(fn=_cmd_run)
+
+    p_cmp = sub.add_parser("compare", help="compare two reports; exit 1 on regressions")
+    p_cmp.add_argument("old")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=0.15, help="relative slowdown that counts (default 0.15)")
+    p_cmp.set_defaults(fn=_cmd_compare)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Benchmark cases. Import after LOG_DIR points at a scratch directory (see __main__)."""
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from benchmarks.harness import case
+from benchmarks.vclock import VirtualClock, run_virtual
+
+import bot.dashboard
+import bot.db
+import bot.gamma_cache
+import bot.market_discovery
+import bot.strategy
+from bot.execution import PaperExecutor
+from bot.gamma_cache import GammaCache
+from bot.logging_setup import JsonFormatter, RateLimitFilter, _QueueHandler, setup_logging, stop_logging
+from bot.orderbook import OrderBookFeed
+from bot.price_feed import ChainlinkPriceFeed
+from bot.records import Market, Tick
+
+
+@contextlib.contextmanager
+def temp_db():
+    """Fresh polybot.db for one case; every module that captured DB_PATH is redirected to it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "polybot.db")
+        with mock.patch.object(bot.db, "DB_PATH", path), mock.patch.object(bot.dashboard, "DB_PATH", path):
+            bot.db.init_db()
+            yield path
+
+
+def _rtds_message(source_ts: float, price: float) -> dict:
+    return {
+        "topic": "crypto_prices_chainlink",
+        "type": "update",
+        "timestamp": int((source_ts + 0.02) * 1000),
+        "payload": {"symbol": "btc/usd", "timestamp": int(source_ts * 1000), "value": price},
+    }
+
+
+def _fill_feed(n: int) -> ChainlinkPriceFeed:
+    """Feed holding n ticks spread over the last 90s (the retention window)."""
+    feed = ChainlinkPriceFeed()
+    now = time.time()
+    step = 90 / n
+    for i in range(n):
+        ts = now - 90 + i * step
+        feed._ticks.insert(Tick(ts, 65000 + i % 50, ts + 0.02, ts + 0.05))
+    return feed
+
+
+def _market_entry(i: int) -> dict:
+    end = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=15 * i)
+    base = end.timestamp() - 60
+    return {
+        "market_id": str(1_000_000 + i),
+        "market_slug": f"btc-updown-15m-{int(end.timestamp()) - 900}",
+        "start_time": (end - timedelta(minutes=15)).isoformat(),
+        "end_time": end.isoformat(),
+        "beat_price": 65000.0,
+        "decision": "ACTIVE" if i % 3 == 0 else "SKIP",
+        "skip_reason": None if i % 3 == 0 else "distance_too_large",
+        "distance_at_decision": 40.0,
+        "would_buy": "Up",
+        "actual_outcome": "Up",
+        "would_have_won": True,
+        "theoretical_pnl": 100.0,
+        "price_samples": [{"t": t, "ts": end.isoformat(), "price": 65040.0, "distance": 40.0, "side": "Up"}
+                          for t in range(29)],
+        "price_ticks": [{"ts": base + t, "price": 65040.0 + t, "relay_ts": base + t + 0.02, "recv_ts": base + t + 0.05}
+                        for t in range(60)],
+    }
+
+
+# ── Price feed ──────────────────────────────────────────────────────────────
+
+@case("price_feed.handle_message")
+def bench_handle_message(b):
+    n = 5000
+    start = time.time() - 60
+    messages = [_rtds_message(start + i * 0.01, 65000 + i % 40) for i in range(n)]
+
+    def run(feed):
+        for i, msg in enumerate(messages):
+            feed._handle_message(msg, start + i * 0.01 + 0.05)
+
+    b.time("price_feed.handle_message", run, ops=n, setup=ChainlinkPriceFeed)
+
+
+@case("price_feed.get_recent_ticks")
+def bench_recent_ticks(b):
+    for n in (100, 1_000, 10_000, 100_000):
+        feed = _fill_feed(n)
+        number = max(1, 100_000 // n)
+
+        def run(feed=feed, number=number):
+            for _ in range(number):
+                feed.get_recent_ticks(60)
+
+        b.time(f"price_feed.get_recent_ticks[n={n}]", run, ops=number)
+        b.time(f"price_feed.get_recent_ticks_detailed[n={n}]",
+               lambda feed=feed, number=number: [feed.get_recent_ticks(60, detailed=True) for _ in range(number)],
+               ops=number)
+        b.time(f"price_feed.recent_ticks[n={n}]",
+               lambda feed=feed, number=number: [feed.recent_ticks(60) for _ in range(number)],
+               ops=number)
+
+
+# ── Logging ─────────────────────────────────────────────────────────────────
+
+class _SlowSink(io.StringIO):
+    """A stdout that has backed up: every write blocks for a while."""
+
+    def write(self, s):
+        time.sleep(0.0002)
+        return len(s)
+
+
+@contextlib.contextmanager
+def _root_logging(level: str, stream):
+    """Route the root logger through setup_logging() for one case, then put the previous setup back."""
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    setup_logging(level, "json", stream)
+    try:
+        yield
+    finally:
+        stop_logging()
+        root.handlers[:] = saved[0]
+        root.setLevel(saved[1])
+
+
+@case("logging")
+def bench_logging(b):
+    n = 20_000
+    log = logging.getLogger("bench.disabled")
+    log.setLevel(logging.INFO)
+    price, age = 65432.1, 0.42
+
+    def eager():
+        for _ in range(n):
+            log.debug(f"BTC/USD: ${price:,.2f} (age: {age:.1f}s)")
+
+    def lazy():
+        for _ in range(n):
+            log.debug("BTC/USD: $%.2f (age: %.1fs)", price, age)
+
+    b.time("logging.disabled_debug[f-string]", eager, ops=n)
+    b.time("logging.disabled_debug[lazy]", lazy, ops=n)
+
+    # Cost seen by the caller per enabled record when stdout is slow
+    n = 500
+    log = logging.getLogger("bench.emit")
+    log.propagate = False
+
+    def emit(handler):
+        log.handlers[:] = [handler]
+        for i in range(n):
+            log.warning("Reconnecting %s in %.2fs (attempt %d)", "primary", 1.5, i)
+
+    def direct():
+        handler = logging.StreamHandler(_SlowSink())
+        handler.setFormatter(JsonFormatter())
+        return handler
+
+    def queued(rate_limited: bool):
+        q = queue.SimpleQueue()
+        handler = _QueueHandler(q)
+        if rate_limited:
+            handler.addFilter(RateLimitFilter())
+        out = logging.StreamHandler(_SlowSink())
+        out.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(q, out)
+        listeners.append(listener)
+        listener.start()
+        return handler
+
+    listeners: list[logging.handlers.QueueListener] = []
+    b.time("logging.emit[stream,slow_stdout]", emit, ops=n, setup=direct)
+    b.time("logging.emit[queue,slow_stdout]", emit, ops=n, setup=lambda: queued(False))
+    b.time("logging.emit[queue+rate_limit,slow_stdout]", emit, ops=n, setup=lambda: queued(True))
+    for listener in listeners:
+        listener.stop()
+    log.handlers.clear()
+
+    # Logging overhead per tick on the feed's hot path, at the production level and at DEBUG
+    n = 5000
+    start = time.time() - 60
+    messages = [_rtds_message(start + i * 0.01, 65000 + i % 40) for i in range(n)]
+
+    def ticks(feed):
+        for i, msg in enumerate(messages):
+            feed._handle_message(msg, start + i * 0.01 + 0.05)
+
+    for level in ("INFO", "DEBUG"):
+        with _root_logging(level, _SlowSink()):
+            b.time(f"logging.per_tick[{level}]", ticks, ops=n, setup=ChainlinkPriceFeed)
+
+
+# ── SQLite ──────────────────────────────────────────────────────────────────
+
+@case("db.upsert_market")
+def bench_upsert(b):
+    n = 200
+    entries = [_market_entry(i) for i in range(n)]
+    with temp_db():
+        b.time("db.upsert_market[per_row]", lambda: [bot.db.upsert_market(e) for e in entries], ops=n, repeat=5)
+        b.time("db.upsert_markets[batched]", lambda: bot.db.upsert_markets(entries), ops=n, repeat=5)
+
+
+@case("db.append_market_events")
+def bench_market_events(b):
+    """One market's lifecycle as events (one flush of the writer) vs the final upsert it replaces."""
+    n = 200
+    entries = [_market_entry(i) for i in range(n)]
+
+    def lifecycle(e: dict) -> list[tuple]:
+        mid, ts = e["market_id"], time.time()
+        return [
+            (mid, "discovered", ts, {"market_slug": e["market_slug"], "start_time": e["start_time"],
+                                     "end_time": e["end_time"]}, {}),
+            (mid, "beat", ts, {"beat_price": e["beat_price"]}, {}),
+            *[(mid, "samples", ts, {"price_samples": e["price_samples"][i:i + 10]}, {}) for i in range(0, 29, 10)],
+            (mid, "decision", ts, {k: e[k] for k in ("decision", "skip_reason", "distance_at_decision", "would_buy")}, {}),
+            (mid, "logged", ts, {k: e[k] for k in ("actual_outcome", "would_have_won", "theoretical_pnl")},
+             {"price_ticks": e["price_ticks"]}),
+        ]
+
+    batch = [ev for e in entries for ev in lifecycle(e)]
+    with temp_db():
+        b.time("db.append_market_events[lifecycle]", lambda: bot.db.append_market_events(batch), ops=n, repeat=5)
+        b.time("db.upsert_markets[final_only]", lambda: bot.db.upsert_markets(entries), ops=n, repeat=5)
+
+
+@case("dashboard.query_today_sessions")
+def bench_sessions(b):
+    sizes = (2_000, 10_000) if b.quick else (2_000, 10_000, 50_000)
+    for n in sizes:
+        with temp_db() as path:
+            for start in range(0, n, 1000):
+                bot.db.upsert_markets([_market_entry(i) for i in range(start, min(n, start + 1000))])
+            # Backdate logged_at (not an upsert column): ~96 markets a day, so only the last day is returned
+            conn = sqlite3.connect(path)
+            conn.execute("UPDATE markets SET logged_at = datetime('now', '-' || ((? - id) * 15) || ' minutes')", (n,))
+            conn.commit()
+            conn.close()
+            rows = len(bot.dashboard._query_today_sessions())
+            size_mb = round(os.path.getsize(path) / 1e6, 1)
+            b.time(f"dashboard.query_today_sessions[n={n}]", bot.dashboard._query_today_sessions,
+                   rows_returned=rows, db_mb=size_mb)
+
+
+# ── Gamma discovery ─────────────────────────────────────────────────────────
+
+@case("market_discovery.discover_markets")
+def bench_discover(b):
+    from aiohttp import web
+
+    def event(slug, secs=900):
+        start = int(slug.rsplit("-", 1)[-1])
+        end = datetime.fromtimestamp(start + secs, timezone.utc).isoformat().replace("+00:00", "Z")
+        return {
+            "slug": slug,
+            "title": slug,
+            "markets": [{
+                "id": slug, "conditionId": "0x" + "ab" * 32, "question": slug,
+                "outcomes": '["Up", "Down"]', "clobTokenIds": json.dumps([str(start) + "1", str(start) + "2"]),
+                "eventStartTime": datetime.fromtimestamp(start, timezone.utc).isoformat().replace("+00:00", "Z"),
+                "endDate": end, "acceptingOrders": True, "closed": False,
+            }],
+        }
+
+    # One bulk page: the next hour of BTC/ETH/SOL/XRP 5m, 15m and 1h markets
+    boundary = int(time.time()) // 900 * 900
+    listing = [event(f"{asset}-updown-{label}-{t}", secs)
+               for asset in ("btc", "eth", "sol", "xrp")
+               for label, secs in (("5m", 300), ("15m", 900), ("1h", 3600))
+               for t in range(boundary // secs * secs, boundary + 3600, secs)]
+
+    async def events(request):
+        slug = request.query.get("slug")
+        if slug is None:
+            return web.json_response(listing)
+        return web.json_response([event(slug)])
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/events", events)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+        results = {}
+        try:
+            with mock.patch.object(bot.gamma_cache, "GAMMA_API_BASE", base), \
+                    mock.patch.object(bot.market_discovery, "GAMMA_API_BASE", base):
+                for mode in ("slugs", "bulk"):
+                    cold, warm = [], []
+                    warm_cache = GammaCache()
+                    for _ in range(5 if b.quick else 20):
+                        # cold: empty cache, every slug goes to Gamma; warm: the index answers
+                        for samples, cache in ((cold, GammaCache()), (warm, warm_cache)):
+                            with mock.patch.object(bot.market_discovery, "cache", cache), \
+                                    mock.patch.object(bot.market_discovery, "DISCOVERY_MODE", mode):
+                                start = time.perf_counter()
+                                found = await bot.market_discovery.discover_markets(set())
+                                samples.append(time.perf_counter() - start)
+                    results[mode] = cold, warm, len(found)
+        finally:
+            await runner.cleanup()
+        return results
+
+    for mode, (cold, warm, found) in asyncio.run(main()).items():
+        suffix = "" if mode == "slugs" else ",bulk"
+        b.record(f"market_discovery.discover_markets[stub{suffix}]", cold, markets=found)
+        b.record(f"market_discovery.discover_markets[stub{suffix},cached]", warm, markets=found)
+
+
+# ── Strategy ────────────────────────────────────────────────────────────────
+
+@case("strategy.run_market")
+def bench_run_market(b):
+    market_ids = iter(range(10**6))
+
+    def one_market() -> float:
+        clock = VirtualClock(time.time())
+        end = datetime.fromtimestamp(clock.wall() + 45, timezone.utc)
+        market = Market(
+            id=f"bench-{next(market_ids)}", slug="btc-updown-15m-bench",
+            start_time=end - timedelta(minutes=15), end_time=end, beat_price=65000.0,
+            clob_token_ids='["111", "222"]', outcomes='["Up", "Down"]',
+        )
+
+        async def fetch_outcome(market_id):
+            return "Up"
+
+        async def scenario():
+            feed = ChainlinkPriceFeed()
+            book_feed = OrderBookFeed()
+            await book_feed.subscribe(["111", "222"])
+            book_feed._connected = True  # no socket: books are fed directly
+            for token in ("111", "222"):
+                book_feed._handle_event({
+                    "event_type": "book", "asset_id": token, "timestamp": int(clock.wall() * 1000),
+                    "bids": [{"price": f"{0.9 + i / 100:.2f}", "size": "500"} for i in range(9)],
+                    "asks": [{"price": f"{0.99 - i / 100:.2f}", "size": "800"} for i in range(5)],
+                })
+
+            async def ticks():
+                while True:
+                    now = clock.wall()
+                    feed._handle_message(_rtds_message(now - 0.05, 65040 + random.uniform(-5, 5)), now)
+                    await asyncio.sleep(1)
+
+            ticker = asyncio.create_task(ticks())
+            await asyncio.sleep(0)
+            try:
+                await bot.strategy.run_market(market, feed, fetch_outcome, book_feed, PaperExecutor())
+            finally:
+                ticker.cancel()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_virtual(scenario, clock, bot.strategy)
+        return time.perf_counter() - start
+
+    with temp_db() as path:
+        samples = [one_market() for _ in range(3 if b.quick else 7)]
+        conn = sqlite3.connect(path)
+        logged = conn.execute("SELECT COUNT(*) FROM markets WHERE decision = 'ACTIVE'").fetchone()[0]
+        conn.close()
+    b.record("strategy.run_market[virtual_clock]", samples, markets_logged=logged)
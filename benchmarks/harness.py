@@ -0,0 +1,107 @@
+"""Timing, result files and regression comparison."""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable
+
+_CASES: list[tuple[str, Callable]] = []
+
+
+def case(name: str):
+    """Register a benchmark case. The function receives a Bench and records one or more results."""
+    def wrap(fn):
+        _CASES.append((name, fn))
+        return fn
+    return wrap
+
+
+class Bench:
+    def __init__(self, quick: bool = False):
+        self.quick = quick
+        self.results: dict[str, dict] = {}
+
+    def time(self, name: str, fn: Callable, ops: int = 1, repeat: int = 7, setup: Callable | None = None, **extra):
+        """Time fn() `repeat` times; setup() (untimed) runs before each and its result is passed in."""
+        repeat = max(3, repeat // 2) if self.quick else repeat
+        samples = []
+        for _ in range(repeat):
+            arg = setup() if setup else None
+            start = time.perf_counter()
+            fn(arg) if setup else fn()
+            samples.append(time.perf_counter() - start)
+        self.record(name, samples, ops, **extra)
+
+    def record(self, name: str, samples: list[float], ops: int = 1, **extra):
+        """Store timings (seconds per run, each run covering `ops` operations)."""
+        per_op = [s / ops * 1e6 for s in samples]
+        self.results[name] = {
+            "median_us": round(statistics.median(per_op), 3),
+            "min_us": round(min(per_op), 3),
+            "max_us": round(max(per_op), 3),
+            "ops": ops,
+            "repeat": len(samples),
+            **extra,
+        }
+        print(f"  {name:<48} {self.results[name]['median_us']:>12,.2f} us/op  (min {min(per_op):,.2f})")
+
+
+def _git(*args) -> str | None:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern: str | None = None, quick: bool = False) -> dict:
+    bench = Bench(quick)
+    for name, fn in _CASES:
+        if pattern and pattern not in name:
+            continue
+        print(f"{name}:")
+        fn(bench)
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+            "created_at": time.time(),
+        },
+        "results": bench.results,
+    }
+
+
+def save(report: dict, path: str | None = None) -> str:
+    if path is None:
+        commit = report["meta"]["commit"] or "unknown"
+        suffix = "-dirty" if report["meta"]["dirty"] else ""
+        path = os.path.join(os.path.dirname(__file__), "results", f"{commit}{suffix}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[dict]:
+    """Per-case change in median time. A case regresses when it is more than `threshold` slower."""
+    rows = []
+    for name, new_r in new["results"].items():
+        old_r = old["results"].get(name)
+        if old_r is None:
+            rows.append({"name": name, "old": None, "new": new_r["median_us"], "change": None, "status": "new"})
+            continue
+        change = new_r["median_us"] / old_r["median_us"] - 1 if old_r["median_us"] else 0.0
+        status = "REGRESSION" if change > threshold else ("faster" if change < -threshold else "ok")
+        rows.append({"name": name, "old": old_r["median_us"], "new": new_r["median_us"],
+                     "change": change, "status": status})
+    for name in old["results"].keys() - new["results"].keys():
+        rows.append({"name": name, "old": old["results"][name]["median_us"], "new": None,
+                     "change": None, "status": "missing"})
+    return rows
@@ -0,0 +1,74 @@
+"""
+Virtual clock for running the strategy without waiting in real time.
+
+The loop's selector advances the clock by whatever timeout asyncio asked to
+block for, so asyncio.sleep(30) returns immediately with the clock moved 30s.
+time.time() and the strategy's datetime.now() are patched to read the same clock.
+"""
+
+import asyncio
+import contextlib
+import selectors
+from datetime import datetime
+from unittest import mock
+
+
+class VirtualClock:
+    def __init__(self, start_wall: float):
+        self._wall0 = start_wall
+        self.elapsed = 0.0
+
+    def advance(self, secs: float):
+        self.elapsed += secs
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def wall(self) -> float:
+        return self._wall0 + self.elapsed
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        if timeout is not None and timeout > 0:
+            self._clock.advance(timeout)
+            timeout = 0
+        return super().select(timeout)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock: VirtualClock):
+        super().__init__(_VirtualSelector(clock))
+        self._clock = clock
+
+    def time(self) -> float:
+        return self._clock.monotonic()
+
+
+@contextlib.contextmanager
+def patched_wall_clock(clock: VirtualClock, *modules):
+    """Point time.time() and each module's `datetime` name at the virtual clock."""
+    class VirtualDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock.wall(), tz)
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch("time.time", clock.wall))
+        for module in modules:
+            stack.enter_context(mock.patch.object(module, "datetime", VirtualDatetime))
+        yield
+
+
+def run_virtual(coro_fn, clock: VirtualClock, *modules):
+    """Run coro_fn() to completion on a virtual-clock loop."""
+    loop = VirtualClockLoop(clock)
+    try:
+        with patched_wall_clock(clock, *modules):
+            return loop.run_until_complete(coro_fn())
+    finally:
+        loop.close()
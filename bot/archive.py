@@ -0,0 +1,216 @@
+"""
+Tiered retention for polybot.db.
+
+Markets older than ARCHIVE_AFTER_DAYS are moved into day-partitioned Parquet files
+under ARCHIVE_DIR (markets/, ticks/, samples/ with date=YYYY-MM-DD/ partitions),
+deleted from SQLite, and the freed pages are released with an incremental vacuum.
+query_markets / query_ticks read across both tiers.
+
+Usage:
+    python -m bot.archive            # archive once and exit
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from bot.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH, ARCHIVE_DIR, ARCHIVE_INTERVAL, ARCHIVE_VACUUM_PAGES, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Row-level JSON columns that are exploded into their own typed tables
+_TICK_SCHEMA = pa.schema([
+    ("market_id", pa.string()), ("ts", pa.float64()), ("price", pa.float64()),
+    ("relay_ts", pa.float64()), ("recv_ts", pa.float64()),
+])
+_SAMPLE_SCHEMA = pa.schema([
+    ("market_id", pa.string()), ("t", pa.int32()), ("ts", pa.string()),
+    ("price", pa.float64()), ("distance", pa.float64()), ("side", pa.string()),
+])
+_EXPLODED = ("price_ticks", "price_samples")
+_SQL_TYPES = {"REAL": pa.float64(), "INTEGER": pa.int64()}
+
+
+def _partition_day(row: dict) -> str:
+    return (row.get("end_time") or row.get("logged_at") or "1970-01-01")[:10]
+
+
+def _markets_schema(conn: sqlite3.Connection) -> pa.Schema:
+    cols = conn.execute("PRAGMA table_info(markets)").fetchall()
+    return pa.schema([(c[1], _SQL_TYPES.get(c[2].upper(), pa.string())) for c in cols if c[1] not in _EXPLODED])
+
+
+def _write_part(table: pa.Table, kind: str, day: str, part: str):
+    out_dir = os.path.join(ARCHIVE_DIR, kind, f"date={day}")
+    os.makedirs(out_dir, exist_ok=True)
+    final = os.path.join(out_dir, f"part-{part}.parquet")
+    tmp = final + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, final)
+
+
+def _explode(rows: list[dict]) -> tuple[dict, dict]:
+    ticks = {"market_id": [], "ts": [], "price": [], "relay_ts": [], "recv_ts": []}
+    samples = {"market_id": [], "t": [], "ts": [], "price": [], "distance": [], "side": []}
+    for row in rows:
+        for tick in json.loads(row.get("price_ticks") or "[]"):
+            ticks["market_id"].append(row["market_id"])
+            ticks["ts"].append(tick.get("ts"))
+            ticks["price"].append(tick.get("price"))
+            ticks["relay_ts"].append(tick.get("relay_ts"))
+            ticks["recv_ts"].append(tick.get("recv_ts"))
+        for sample in json.loads(row.get("price_samples") or "[]"):
+            samples["market_id"].append(row["market_id"])
+            for key in ("t", "ts", "price", "distance", "side"):
+                samples[key].append(sample.get(key))
+    return ticks, samples
+
+
+def archive_old_markets(days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Move markets logged more than `days` ago into Parquet. Returns rows archived."""
+    cutoff = f"-{days} days"
+    archived = 0
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.row_factory = sqlite3.Row
+        schema = _markets_schema(conn)
+        while True:
+            rows = [dict(r) for r in conn.execute(
+                "SELECT * FROM markets WHERE logged_at < datetime('now', ?) ORDER BY id LIMIT ?",
+                (cutoff, ARCHIVE_BATCH),
+            ).fetchall()]
+            if not rows:
+                break
+
+            by_day: dict[str, list[dict]] = {}
+            for row in rows:
+                by_day.setdefault(_partition_day(row), []).append(row)
+
+            # Write every partition before deleting anything; file names are derived from
+            # row ids so a crash between write and delete just rewrites the same files.
+            for day, day_rows in by_day.items():
+                part = f"{day_rows[0]['id']}-{day_rows[-1]['id']}"
+                markets = pa.Table.from_pylist(
+                    [{k: v for k, v in r.items() if k not in _EXPLODED} for r in day_rows], schema=schema)
+                ticks, samples = _explode(day_rows)
+                _write_part(markets, "markets", day, part)
+                _write_part(pa.Table.from_pydict(ticks, schema=_TICK_SCHEMA), "ticks", day, part)
+                _write_part(pa.Table.from_pydict(samples, schema=_SAMPLE_SCHEMA), "samples", day, part)
+
+            conn.executemany("DELETE FROM markets WHERE id = ?", [(r["id"],) for r in rows])
+            conn.executemany("DELETE FROM market_events WHERE market_id = ?", [(r["market_id"],) for r in rows])
+            conn.commit()
+            archived += len(rows)
+            conn.execute(f"PRAGMA incremental_vacuum({ARCHIVE_VACUUM_PAGES})")
+    finally:
+        conn.close()
+
+    if archived:
+        logger.info("Archived %d markets older than %d days to %s", archived, days, ARCHIVE_DIR)
+    return archived
+
+
+async def archive_loop():
+    """Background task: archive and compact on a fixed interval."""
+    while True:
+        try:
+            await asyncio.to_thread(archive_old_markets)
+        except Exception as e:
+            logger.error("Archive run failed: %s", e, exc_info=True)
+        await asyncio.sleep(ARCHIVE_INTERVAL)
+
+
+# ── Unified hot + cold queries ──────────────────────────────────────────────
+
+def _cold_dataset(kind: str) -> ds.Dataset | None:
+    path = os.path.join(ARCHIVE_DIR, kind)
+    if not os.path.isdir(path):
+        return None
+    return ds.dataset(path, format="parquet", partitioning="hive", exclude_invalid_files=True)
+
+
+def _day_filter(start: datetime, end: datetime):
+    # Partition keys are inferred as strings; ISO dates compare correctly as text
+    return (ds.field("date") >= start.strftime("%Y-%m-%d")) & (ds.field("date") <= end.strftime("%Y-%m-%d"))
+
+
+def query_markets(start: datetime, end: datetime) -> list[dict]:
+    """Markets whose end_time falls in [start, end), from SQLite and the Parquet archive."""
+    start_s, end_s = start.isoformat(), end.isoformat()
+    rows: dict[str, dict] = {}
+
+    cold = _cold_dataset("markets")
+    if cold is not None:
+        table = cold.to_table(filter=_day_filter(start, end))
+        for row in table.to_pylist():
+            row.pop("date", None)
+            if row.get("end_time") and start_s <= row["end_time"] < end_s:
+                rows[row["market_id"]] = row
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.row_factory = sqlite3.Row
+        for r in conn.execute(
+            "SELECT * FROM markets WHERE end_time >= ? AND end_time < ?", (start_s, end_s)
+        ).fetchall():
+            row = dict(r)
+            for col in _EXPLODED:
+                row.pop(col, None)
+            rows[row["market_id"]] = row  # hot copy wins over a half-archived duplicate
+    finally:
+        conn.close()
+
+    return sorted(rows.values(), key=lambda r: r.get("end_time") or "")
+
+
+def query_ticks(start: datetime, end: datetime, market_id: str | None = None) -> list[dict]:
+    """Per-market recorded ticks with ts in [start, end), as [{"market_id", "ts", "price"}, ...]."""
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+    out = []
+
+    cold = _cold_dataset("ticks")
+    if cold is not None:
+        # Ticks near midnight can sit in the previous day's partition
+        flt = _day_filter(start - timedelta(days=1), end) & (ds.field("ts") >= start_ts) & (ds.field("ts") < end_ts)
+        if market_id is not None:
+            flt = flt & (ds.field("market_id") == market_id)
+        out.extend(cold.to_table(filter=flt, columns=["market_id", "ts", "price"]).to_pylist())
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        # A market's ticks span the minute or two before it is logged
+        sql = ("SELECT market_id, price_ticks FROM markets WHERE price_ticks IS NOT NULL "
+               "AND end_time >= ? AND end_time < ?")
+        params: tuple = ((start - timedelta(minutes=10)).isoformat(), (end + timedelta(minutes=10)).isoformat())
+        if market_id is not None:
+            sql += " AND market_id = ?"
+            params += (market_id,)
+        seen = {t["market_id"] for t in out}
+        for mid, ticks_json in conn.execute(sql, params).fetchall():
+            if mid in seen:
+                continue
+            for tick in json.loads(ticks_json):
+                if start_ts <= tick["ts"] < end_ts:
+                    out.append({"market_id": mid, "ts": tick["ts"], "price": tick["price"]})
+    finally:
+        conn.close()
+
+    out.sort(key=lambda t: t["ts"])
+    return out
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    n = archive_old_markets()
+    print(f"Archived {n} markets at {datetime.now(timezone.utc).isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Replay recorded decision-time order books through the fill simulator.
+
+Usage:
+    python -m bot.backtest --sizes 100,1000,5000,10000 --days 7
+"""
+
+import argparse
+import json
+import sqlite3
+
+from bot.config import BUY_PRICE, DB_PATH, FILL_SIM_SIZES
+from bot.fill_sim import fill_pnl, simulate_buy
+
+
+def load_active_rows(days: float | None = None) -> list[dict]:
+    """ACTIVE markets with a recorded order book and a known outcome."""
+    sql = (
+        "SELECT market_slug, would_buy, would_have_won, theoretical_pnl, order_book "
+        "FROM markets WHERE decision = 'ACTIVE' AND order_book IS NOT NULL "
+        "AND would_have_won IS NOT NULL"
+    )
+    params: tuple = ()
+    if days is not None:
+        sql += " AND logged_at > datetime('now', ?)"
+        params = (f"-{days} days",)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.row_factory = sqlite3.Row
+        return [dict(r) for r in conn.execute(sql + " ORDER BY logged_at", params).fetchall()]
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def summarize_by_size(rows: list[dict], sizes: list[float], limit_price: float = BUY_PRICE) -> list[dict]:
+    """Aggregate simulated fills and P&L per order size across recorded markets."""
+    totals = {size: {"size": size, "markets": 0, "filled": 0.0, "partial": 0,
+                     "slippage_sum": 0.0, "slippage_n": 0, "pnl": 0.0, "flat_pnl": 0.0}
+              for size in sizes}
+    for row in rows:
+        books = row["order_book"]
+        if isinstance(books, str):
+            books = json.loads(books)
+        book = (books or {}).get(row["would_buy"])
+        if not book:
+            continue
+        won = bool(row["would_have_won"])
+        for size in sizes:
+            t = totals[size]
+            fill = simulate_buy(book, size, limit_price, book.get("trades_after"))
+            t["markets"] += 1
+            t["filled"] += fill["filled"]
+            t["partial"] += int(fill["partial"])
+            if fill["slippage"] is not None:
+                t["slippage_sum"] += fill["slippage"]
+                t["slippage_n"] += 1
+            t["pnl"] += fill_pnl(fill, won) or 0.0
+            t["flat_pnl"] += ((1.0 - limit_price) if won else -limit_price) * size
+
+    summary = []
+    for size in sizes:
+        t = totals[size]
+        requested = t["markets"] * size
+        summary.append({
+            "size": size,
+            "markets": t["markets"],
+            "fill_ratio": round(t["filled"] / requested, 4) if requested else None,
+            "partial_fills": t["partial"],
+            "avg_slippage": round(t["slippage_sum"] / t["slippage_n"], 6) if t["slippage_n"] else None,
+            "realistic_pnl": round(t["pnl"], 2),
+            "flat_pnl": round(t["flat_pnl"], 2),
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded books at several order sizes")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in FILL_SIM_SIZES),
+                        help="comma-separated share sizes")
+    parser.add_argument("--days", type=float, default=None, help="only markets logged in the last N days")
+    parser.add_argument("--limit-price", type=float, default=BUY_PRICE)
+    args = parser.parse_args()
+
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    rows = load_active_rows(args.days)
+    print(f"{len(rows)} ACTIVE markets with recorded books")
+    print(f"{'size':>10} {'mkts':>5} {'fill%':>7} {'partial':>8} {'slip':>9} {'real P&L':>12} {'flat P&L':>12}")
+    for r in summarize_by_size(rows, sizes, args.limit_price):
+        fill_pct = f"{r['fill_ratio'] * 100:.1f}" if r["fill_ratio"] is not None else "—"
+        slip = f"{r['avg_slippage']:.4f}" if r["avg_slippage"] is not None else "—"
+        print(f"{r['size']:>10,.0f} {r['markets']:>5} {fill_pct:>7} {r['partial_fills']:>8} {slip:>9} "
+              f"{r['realistic_pnl']:>12,.2f} {r['flat_pnl']:>12,.2f}")
+
+
+if __name__ == "__main__":
+    main()
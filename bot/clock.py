@@ -0,0 +1,61 @@
+"""
+NTP-free clock-offset and feed-latency estimation.
+
+Each tick carries the source (Chainlink) timestamp, the relay (RTDS envelope)
+timestamp and our local receive time. The smallest recent (receive - source)
+delta is taken as the clock offset: it is the sample least inflated by
+queueing, so offset = clock skew + best-case path latency. Subtracting it
+turns source timestamps into local time, which makes staleness checks
+immune to skew between our host and the oracle.
+"""
+
+from collections import deque
+
+from bot.config import SKEW_WINDOW
+from bot.latency import LatencyTracker
+
+
+class ClockSkewEstimator:
+    """Sliding-window min of (recv - source) plus rolling latency percentiles."""
+
+    def __init__(self, window: int = SKEW_WINDOW):
+        self._window = window
+        self._seq = 0
+        self._min_q: deque[tuple[int, float]] = deque()  # (seq, delta) increasing deltas
+        self.relay = LatencyTracker(window)    # relay - source (ms)
+        self.transit = LatencyTracker(window)  # recv - relay (ms, includes skew)
+        self.jitter = LatencyTracker(window)   # recv - source - offset (ms)
+
+    def observe(self, source_ts: float, relay_ts: float | None, recv_ts: float):
+        delta = recv_ts - source_ts
+        self._seq += 1
+        while self._min_q and self._min_q[-1][1] >= delta:
+            self._min_q.pop()
+        self._min_q.append((self._seq, delta))
+        while self._min_q[0][0] <= self._seq - self._window:
+            self._min_q.popleft()
+
+        if relay_ts is not None:
+            self.relay.record((relay_ts - source_ts) * 1000)
+            self.transit.record((recv_ts - relay_ts) * 1000)
+        self.jitter.record((delta - self._min_q[0][1]) * 1000)
+
+    @property
+    def offset(self) -> float:
+        """Estimated local - source offset in seconds (0 until the first tick)."""
+        return self._min_q[0][1] if self._min_q else 0.0
+
+    def to_local(self, source_ts: float) -> float:
+        return source_ts + self.offset
+
+    def summary(self) -> dict:
+        def ms(v):
+            return round(v, 1) if v is not None else None
+
+        return {
+            "offset_ms": ms(self.offset * 1000),
+            "relay_p50_ms": ms(self.relay.percentile(50)),
+            "transit_p50_ms": ms(self.transit.percentile(50)),
+            "jitter_p50_ms": ms(self.jitter.percentile(50)),
+            "jitter_p99_ms": ms(self.jitter.percentile(99)),
+        }
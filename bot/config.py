@@ -5,31 +5,139 @@ DISTANCE_MIN = 15       # skip if BTC within ±$15 of beat price (too risky)
 DISTANCE_MAX = 125      # skip if BTC beyond ±$125 of beat price (no opportunity)
 TRACKING_START_SECS = 30  # start active tracking N seconds before market close
 BUY_PRICE = 0.99        # simulated limit order price
-SIMULATED_SHARES = 10000  # for theoretical P&L calculation
+SIMULATED_SHARES = 10000  # for theoretical P&L calculation only; real orders use ORDER_SIZE
+FILL_SIM_SIZES = [100, 1000, 5000, 10000]  # order sizes simulated against the recorded book
 
 # --- Polymarket APIs ---
-GAMMA_API_BASE = "https://gamma-api.polymarket.com"
+GAMMA_API_BASE = os.environ.get("GAMMA_API_BASE", "https://gamma-api.polymarket.com")
 GAMMA_MARKETS_URL = f"{GAMMA_API_BASE}/markets"
 GAMMA_EVENTS_URL = f"{GAMMA_API_BASE}/events"
+GAMMA_EVENT_TTL = 30.0          # seconds a Gamma /events answer is reused before revalidating
+GAMMA_MARKET_TTL = 5.0          # same for /markets/{id} of a market that has not resolved yet
+GAMMA_NEGATIVE_TTL = 120.0      # "no such market" answers are reused this long (capped at the slug's start)
+GAMMA_CACHE_SIZE = 512          # cached Gamma responses (LRU)
 
 # RTDS WebSocket for Chainlink prices
 # Docs: https://docs.polymarket.com/developers/RTDS/RTDS-overview
-RTDS_WS_URL = "wss://ws-live-data.polymarket.com"
+RTDS_WS_URL = os.environ.get("RTDS_WS_URL", "wss://ws-live-data.polymarket.com")
+
+# CLOB market-channel WebSocket for L2 order books
+# Docs: https://docs.polymarket.com/developers/CLOB/websocket/market-channel
+CLOB_WS_URL = os.environ.get("CLOB_WS_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market")
+BOOK_SNAPSHOT_DEPTH = 20        # price levels per side captured at decision time
+BOOK_TRADE_BUFFER = 200         # recent last_trade_price events kept per token
+BOOK_SNAPSHOT_TRADE_SECS = 30   # trades printed this long before a snapshot are stored with it (the tracking window)
+
+# --- Sharding ---
+# With SHARDED=1 several workers share polybot.db and split markets through leases
+SHARDED = os.environ.get("SHARDED", "").lower() in ("1", "true", "yes")
+WORKER_ID = os.environ.get("WORKER_ID") or f"{os.uname().nodename}-{os.getpid()}"
+LEASE_TTL = 30                  # seconds a lease survives without a heartbeat
+LEASE_HEARTBEAT = 10            # seconds between lease renewals
+
+# --- Execution ---
+# "paper" (default) records orders without sending them; "live" signs and submits to the CLOB
+EXECUTION_MODE = os.environ.get("EXECUTION_MODE", "paper")
+CLOB_API_URL = os.environ.get("CLOB_API_URL", "https://clob.polymarket.com")
+ORDER_SIZE = float(os.environ.get("ORDER_SIZE", 5))  # shares per submitted order (paper and live)
+ORDER_MAX_NOTIONAL = float(os.environ.get("ORDER_MAX_NOTIONAL", 10))  # USDC cap per order; larger ones are refused
+CLOB_KEEPALIVE_SECS = 20        # touch the CLOB API this often so the connection stays warm
+POLY_PRIVATE_KEY = os.environ.get("POLY_PRIVATE_KEY", "")
+POLY_FUNDER = os.environ.get("POLY_FUNDER", "")  # proxy wallet holding USDC, if different from the signer
+POLY_API_KEY = os.environ.get("POLY_API_KEY", "")
+POLY_API_SECRET = os.environ.get("POLY_API_SECRET", "")
+POLY_API_PASSPHRASE = os.environ.get("POLY_API_PASSPHRASE", "")
 
 # --- Timing ---
-MARKET_POLL_INTERVAL = 60       # seconds between market discovery polls
+MARKET_POLL_INTERVAL = float(os.environ.get("MARKET_POLL_INTERVAL", 60))  # seconds between market discovery polls
+# "slugs": probe the predicted btc-updown-15m-<ts> slugs one by one; "bulk": page through active events
+DISCOVERY_MODE = os.environ.get("DISCOVERY_MODE", "slugs")
+DISCOVERY_SERIES = [s.strip() for s in os.environ.get("DISCOVERY_SERIES", "btc-updown-15m").split(",") if s.strip()]
+# Decisions are priced off the Chainlink BTC/USD feed, so only BTC series can be tracked
+if [s for s in DISCOVERY_SERIES if not s.startswith("btc-")]:
+    raise ValueError(f"DISCOVERY_SERIES={','.join(DISCOVERY_SERIES)}: only btc-* series are supported "
+                     "(strategy prices every market off the Chainlink BTC/USD feed)")
+DISCOVERY_TAG = os.environ.get("DISCOVERY_TAG", "")  # optional Gamma tag_slug filter for bulk queries
+DISCOVERY_HORIZON_SECS = 3600   # bulk mode lists markets starting within this many seconds
+DISCOVERY_PAGE_SIZE = 100       # events per bulk page
+DISCOVERY_MAX_PAGES = 10        # safety cap on pages per poll
+STARTUP_PRICE_TIMEOUT = 30      # max seconds a market waits for the first Chainlink price after boot
 CHAINLINK_STALE_THRESHOLD = 5   # seconds — if no update for this long, mark feed unavailable
-TICK_BUFFER_SECS = 90           # deque retention window (90s to give 60s of clean data with margin)
+TICK_BUFFER_SECS = 90           # tick buffer retention window (90s to give 60s of clean data with margin)
+FEED_STANDBY = os.environ.get("FEED_STANDBY", "").lower() in ("1", "true", "yes")  # keep a second RTDS connection hot
+FEED_GAP_THRESHOLD = 2.0        # seconds without a tick that count as an outage gap
+RECONNECT_BASE_DELAY = 0.25     # first backoff step after the immediate retry
+RECONNECT_MAX_DELAY = 10        # backoff cap
+RECONNECT_RESET_SECS = 30       # a connection that lived this long resets the backoff
+TICK_REORDER_WINDOW = 2.0       # late ticks up to this many seconds behind the newest are inserted in order
+SKEW_WINDOW = 300               # ticks used for clock-offset / feed-latency estimates
+FEED_PROCESS = os.environ.get("FEED_PROCESS", "").lower() in ("1", "true", "yes")  # run the feed in its own process
+SHM_RING_CAPACITY = 4096        # ticks held in the shared-memory ring (FEED_PROCESS mode)
 SETTLEMENT_POLL_INTERVAL = 15   # seconds between outcome checks
 SETTLEMENT_POLL_TIMEOUT = 300   # max seconds to wait for resolution
+PROVISIONAL_SETTLE_GRACE = 2.0  # seconds past end_time (feed clock) before reading the close tick; covers TICK_REORDER_WINDOW
+PROVISIONAL_MAX_TICK_AGE = 5.0  # the close tick must be at most this old at end_time, else no provisional outcome
+PROVISIONAL_MIN_MARGIN = float(os.environ.get("PROVISIONAL_MIN_MARGIN", 5.0))  # $ from the beat below which it is low-confidence
+LATENCY_WINDOW = 200            # latency samples kept for percentile estimates
+DECISION_SAFETY_MARGIN_MS = int(os.environ.get("DECISION_SAFETY_MARGIN_MS", 150))  # slack on top of p99 latency
+DECISION_DEFAULT_LEAD_SECS = 1.0  # decide this long before close until latency samples exist (T+14:59)
+DECISION_MAX_LEAD_SECS = 5.0    # never decide earlier than this before close
+
+# --- Tracing ---
+TRACE_BUFFER_SPANS = 20000      # finished spans kept in memory for /api/traces
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH", "")  # append finished traces here (Chrome trace JSON)
 
 # --- Logging ---
 LOG_DIR = os.environ.get("LOG_DIR", "./data")
 DB_PATH = os.path.join(LOG_DIR, "polybot.db")
+ANALYTICS_DB_PATH = os.path.join(LOG_DIR, "polybot_analytics.db")  # read-only copy for datasette/reporting
+SNAPSHOT_INTERVAL = int(os.environ.get("SNAPSHOT_INTERVAL", 900))  # seconds between analytics snapshots
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")  # "json" (one object per line) or "text"
+LOG_RATE_BURST = 5              # identical log templates let through per window; 0 disables rate limiting
+LOG_RATE_WINDOW = 60.0          # seconds
+
+# --- Market events ---
+MARKET_EVENT_FLUSH_INTERVAL = 1.0  # seconds between batched writes of market lifecycle events
+MARKET_EVENT_SAMPLE_BATCH = 10     # tracking samples per "samples" event
+
+# --- Tick history ---
+TICK_FLUSH_INTERVAL = 1.0       # seconds between batched writes of new ticks to the ticks table
+TICK_RETENTION_DAYS = int(os.environ.get("TICK_RETENTION_DAYS", 30))  # ticks older than this are pruned
+TICK_QUERY_MAX_POINTS = 5000    # cap on points / candles returned by /api/ticks
+TICK_QUERY_CACHE_SIZE = 256     # cached /api/ticks results for closed time ranges
+
+# --- Retention ---
+ARCHIVE_DIR = os.path.join(LOG_DIR, "archive")  # day-partitioned Parquet for old markets
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 7))  # keep this many days hot in SQLite
+ARCHIVE_INTERVAL = 3600         # seconds between archive runs
+ARCHIVE_BATCH = 500             # rows moved per transaction
+ARCHIVE_VACUUM_PAGES = 2000     # pages released per incremental vacuum step
+VACUUM_CONVERT_TIMEOUT = 2.0    # seconds the one-time VACUUM at startup waits for other writers before skipping
 
 # --- Telegram (optional) ---
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "")
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")  # override for the local stub
+TELEGRAM_QUEUE_SIZE = 200       # pending notifications; further ones are dropped (and counted)
+TELEGRAM_DIGEST_SECS = 3.0      # notifications arriving this close together are sent as one digest
+TELEGRAM_MIN_INTERVAL = 1.0     # seconds between messages (Telegram allows ~1/s per chat)
+TELEGRAM_MAX_RETRIES = 5        # retries per message on network errors, 5xx and 429 (which waits retry_after)
+FEED_HEALTH_INTERVAL = 5.0      # seconds between price-feed health checks for alerts
 
 # --- Dashboard ---
 DASHBOARD_PORT = int(os.environ.get("PORT", 8080))
+
+# --- Debug ---
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN", "")  # /api/debug/* is disabled unless set; send as "Bearer <token>"
+TRACEMALLOC_FRAMES = int(os.environ.get("TRACEMALLOC_FRAMES", 0))  # >0 starts tracemalloc at boot (stack depth)
+MEMORY_SAMPLE_INTERVAL = int(os.environ.get("MEMORY_SAMPLE_INTERVAL", 300))  # seconds between memory_samples rows
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.01))  # seconds between CPU profiler stack samples
+PROFILE_MAX_SECS = 60.0         # longest on-demand /api/debug/profile
+LOOP_LAG_INTERVAL = 1.0         # seconds between event-loop lag probes
+# >0: an event-loop lag / tracking-sample drift above this (ms) starts an automatic CPU profile
+PROFILE_TRIGGER_LAG_MS = float(os.environ.get("PROFILE_TRIGGER_LAG_MS", 0))
+PROFILE_TRIGGER_DRIFT_MS = float(os.environ.get("PROFILE_TRIGGER_DRIFT_MS", 0))
+PROFILE_AUTO_SECS = 10.0        # length of an automatic profile
+PROFILE_AUTO_COOLDOWN = 600.0   # seconds between automatic profiles
+PROFILE_AUTO_KEEP = 5           # automatic profiles kept in memory for /api/debug/profile?auto=1
@@ -0,0 +1,185 @@
+"""
+Statistical CPU profiler for the running bot.
+
+A sampler thread wakes every PROFILE_INTERVAL, reads the stack of every other
+thread with sys._current_frames() and counts it. Nothing is instrumented, so the
+profiled code only pays for the GIL hand-offs and it is safe to run in production.
+Profiles come out as collapsed stacks ("thread;outer;...;inner count"), which
+flamegraph.pl, inferno and speedscope read as is. Idle threads show up too (the
+event loop waiting in select), so the flame graph also tells how busy the loop was.
+
+Profiles are taken on demand (/api/debug/profile?seconds=N) or automatically:
+with PROFILE_TRIGGER_LAG_MS / PROFILE_TRIGGER_DRIFT_MS set, an event-loop lag or
+tracking-sample drift above the threshold starts a PROFILE_AUTO_SECS profile, at
+most once per PROFILE_AUTO_COOLDOWN. The spike that triggered it is over by then,
+so automatic profiles catch sustained load rather than a single stall. The last
+PROFILE_AUTO_KEEP of them are kept for /api/debug/profile?auto=1.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from bot.config import (
+    LOOP_LAG_INTERVAL,
+    PROFILE_AUTO_COOLDOWN,
+    PROFILE_AUTO_KEEP,
+    PROFILE_AUTO_SECS,
+    PROFILE_INTERVAL,
+    PROFILE_TRIGGER_DRIFT_MS,
+    PROFILE_TRIGGER_LAG_MS,
+)
+from bot.latency import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Longest sys.path entries first, so frames are labelled with module-relative paths
+_PATH_PREFIXES = sorted({os.path.join(p, "") for p in sys.path if p}, key=len, reverse=True)
+
+# code object -> frame label
+_labels: dict = {}
+
+
+@dataclass(slots=True)
+class Profile:
+    started: float  # unix time
+    seconds: float
+    interval: float
+    samples: int = 0
+    stacks: Counter[str] = field(default_factory=Counter)
+    reason: str | None = None      # metric that triggered an automatic profile
+    trigger_ms: float | None = None
+
+    def collapsed(self) -> str:
+        """One "frame;frame;... count" line per distinct stack, hottest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {"started": self.started, "seconds": self.seconds, "samples": self.samples,
+                "stacks": len(self.stacks), "reason": self.reason, "trigger_ms": self.trigger_ms}
+
+
+class CpuProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()  # one profile at a time
+        self._last_auto = float("-inf")
+        self.auto: deque[Profile] = deque(maxlen=PROFILE_AUTO_KEEP)
+        self.stats: Counter[str] = Counter()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float | None = None) -> Profile | None:
+        """Sample all other threads for `seconds` (blocking). None if a profile is already running."""
+        if not self._lock.acquire(blocking=False):
+            self.stats["busy"] += 1
+            return None
+        try:
+            return self._sample(seconds, interval or self.interval)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float) -> Profile:
+        prof = Profile(time.time(), seconds, interval)
+        me = threading.get_ident()
+        names: dict[int, str] = {}
+        deadline = time.perf_counter() + seconds
+        while True:
+            frames = sys._current_frames()
+            if not frames.keys() <= names.keys():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident != me:
+                    prof.stacks[_collapse(names.get(ident, str(ident)), frame)] += 1
+            del frames  # don't keep other threads' frames alive while sleeping
+            prof.samples += 1
+            if time.perf_counter() >= deadline:
+                break
+            time.sleep(interval)
+        self.stats["profiles"] += 1
+        self.stats["samples"] += prof.samples
+        return prof
+
+    def observe(self, metric: str, value_ms: float, threshold_ms: float):
+        """Start an automatic profile in the background if value_ms crosses threshold_ms (0 = off)."""
+        if not threshold_ms or value_ms < threshold_ms:
+            return
+        self.stats[f"{metric}_breaches"] += 1
+        now = time.monotonic()
+        if self.running or now - self._last_auto < PROFILE_AUTO_COOLDOWN:
+            return
+        self._last_auto = now
+        threading.Thread(target=self._auto, args=(metric, value_ms), name="cpuprof", daemon=True).start()
+
+    def _auto(self, metric: str, value_ms: float):
+        prof = self.profile(PROFILE_AUTO_SECS)
+        if prof is None:
+            return
+        prof.reason, prof.trigger_ms = metric, round(value_ms, 1)
+        self.auto.append(prof)
+        logger.warning("CPU profile captured after %s of %.0fms (%d samples, %d stacks)",
+                       metric, value_ms, prof.samples, len(prof.stacks))
+
+    def latest_auto(self) -> Profile | None:
+        return self.auto[-1] if self.auto else None
+
+    def summary(self) -> dict:
+        return {
+            "running": self.running,
+            **self.stats,
+            "loop_lag": loop_lag.summary(),
+            "sampling_drift": sampling_drift.summary(),
+            "auto_profiles": [p.summary() for p in self.auto],
+        }
+
+
+def _collapse(thread_name: str, frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        label = _labels.get(code)
+        if label is None:
+            label = _labels[code] = f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        parts.append(label)
+        frame = frame.f_back
+    parts.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(parts))
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+# ── Triggers ────────────────────────────────────────────────────────────────
+
+async def loop_lag_loop(interval: float = LOOP_LAG_INTERVAL):
+    """Measure how late the event loop wakes a sleeping task; profile when it is too late."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag_ms = max(0.0, (loop.time() - started - interval) * 1000)
+        loop_lag.record(lag_ms)
+        profiler.observe("loop_lag", lag_ms, PROFILE_TRIGGER_LAG_MS)
+
+
+def note_drift(drift_ms: float):
+    """Called by the strategy for each tracking sample."""
+    sampling_drift.record(drift_ms)
+    profiler.observe("sampling_drift", drift_ms, PROFILE_TRIGGER_DRIFT_MS)
+
+
+# Process-wide profiler and the metrics that can trigger it
+profiler = CpuProfiler()
+loop_lag = LatencyTracker()
+sampling_drift = LatencyTracker()
@@ -4,13 +4,21 @@ Serves a single-page dark-themed dashboard with live health + session data.
 """
 
 import asyncio
+import hmac
 import sqlite3
 import time
 import logging
+from datetime import datetime
 
 from aiohttp import web
 
-from bot.config import DB_PATH
+from bot import cpuprof, latency, memprof, readiness, tick_history, tracing
+from bot.gamma_cache import cache as gamma_cache
+from bot.notifier import notifier
+from bot.settlement import reconciler
+from bot.backtest import load_active_rows, summarize_by_size
+from bot.config import DB_PATH, DEBUG_TOKEN, FILL_SIM_SIZES, PROFILE_INTERVAL, PROFILE_MAX_SECS
+from bot.snapshot import create_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +38,25 @@ async def handle_health(request: web.Request) -> web.Response:
         "btc_price": price,
         "price_available": pf.is_available,
         "ws_connected": pf.connected,
+        "ws_connections": pf.connection_count,
+        "tick_anomalies": pf.tick_anomalies,
+        "feed_gaps": pf.gaps[-10:],
+        "feed_clock": pf.clock.summary(),
+        "feed_shm": getattr(pf, "name", None),  # attach other processes with SharedPriceFeed.attach()
         "last_update_age_secs": round(pf.last_update_age, 2),
         "tick_count": pf.tick_count,
         "active_market_count": len(active),
         "active_market_ids": list(active.keys()),
         "uptime_secs": round(time.time() - _START_TIME, 1),
+        "latency": {
+            "tick_to_decision": latency.tick_to_decision.summary(),
+            "decision_to_submit": latency.decision_to_submit.summary(),
+        },
+        "startup": readiness.startup.summary(),
+        "gamma": gamma_cache.summary(),
+        "notifier": notifier.summary(),
+        "profiler": cpuprof.profiler.summary(),
+        "settlement": reconciler.summary(),
         "ticks": ticks,
     }
     return web.json_response(data)
@@ -53,8 +75,8 @@ def _query_today_sessions() -> list[dict]:
             cur = conn.execute(
                 "SELECT market_slug, start_time, end_time, beat_price, "
                 "decision, skip_reason, "
-                "distance_at_decision, would_buy, actual_outcome, "
-                "would_have_won, theoretical_pnl, logged_at "
+                "distance_at_decision, would_buy, actual_outcome, provisional_outcome, outcome_confidence, "
+                "outcome_mismatch, close_price, would_have_won, theoretical_pnl, fill_shares, realistic_pnl, trace_id, stage, logged_at "
                 "FROM markets WHERE logged_at > datetime('now', '-1 day') "
                 "ORDER BY logged_at DESC"
             )
@@ -62,26 +84,188 @@ def _query_today_sessions() -> list[dict]:
         finally:
             conn.close()
     except Exception as e:
-        logger.error(f"Dashboard DB query error: {e}")
+        logger.error("Dashboard DB query error: %s", e)
         return []
 
 
+async def handle_fills(request: web.Request) -> web.Response:
+    """Realistic P&L at several order sizes over the last 24h of recorded books."""
+    rows = await asyncio.to_thread(load_active_rows, 1)
+    summary = await asyncio.to_thread(summarize_by_size, rows, FILL_SIM_SIZES)
+    return web.json_response(summary)
+
+
+def _parse_ts(value: str) -> float:
+    """Unix seconds or an ISO-8601 timestamp."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+async def handle_ticks(request: web.Request) -> web.Response:
+    """
+    Historical ticks for [from, to) (unix seconds or ISO; default the last hour).
+    ?bucket=N returns OHLC candles of N seconds, otherwise an LTTB series of at most ?points=.
+    """
+    q = request.query
+    try:
+        end = _parse_ts(q["to"]) if "to" in q else time.time()
+        start = _parse_ts(q["from"]) if "from" in q else end - 3600
+        bucket = float(q["bucket"]) if "bucket" in q else None
+        points = int(q.get("points", 1000))
+        data = await asyncio.to_thread(tick_history.query, start, end, bucket, points)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response(data)
+
+
+async def handle_traces(request: web.Request) -> web.Response:
+    """Root spans of the most recent market traces (open ones first)."""
+    return web.json_response(tracing.recent_traces())
+
+
+async def handle_trace(request: web.Request) -> web.Response:
+    """All buffered spans of one trace; ?format=chrome downloads it as a Chrome trace file."""
+    trace_id = request.match_info["trace_id"]
+    spans = tracing.get_trace(trace_id)
+    if not spans:
+        return web.json_response({"error": "trace not in buffer"}, status=404)
+    if request.query.get("format") == "chrome":
+        return web.json_response(
+            {"traceEvents": tracing.chrome_events(spans)},
+            headers={"Content-Disposition": f'attachment; filename="trace-{trace_id}.json"'},
+        )
+    return web.json_response({"trace_id": trace_id, "spans": [s.to_json() for s in spans]})
+
+
+async def handle_trace_page(request: web.Request) -> web.Response:
+    return web.Response(text=_TRACE_HTML, content_type="text/html")
+
+
+async def handle_snapshot(request: web.Request) -> web.Response:
+    """Refresh the read-only analytics copy on demand (DEBUG_TOKEN required, one run at a time)."""
+    if not _debug_authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    try:
+        stats = await asyncio.to_thread(create_snapshot)
+    except Exception as e:
+        logger.error("On-demand snapshot failed: %s", e)
+        return web.json_response({"error": str(e)}, status=500)
+    if stats is None:
+        return web.json_response({"error": "a snapshot is already running"}, status=409)
+    return web.json_response(stats)
+
+
+def _debug_authorized(request: web.Request) -> bool:
+    """Debug endpoints need DEBUG_TOKEN as a Bearer header or ?token=; they are off when it is unset."""
+    if not DEBUG_TOKEN:
+        raise web.HTTPNotFound()
+    header = request.headers.get("Authorization", "")
+    token = header[7:] if header.startswith("Bearer ") else request.query.get("token", "")
+    return hmac.compare_digest(token.encode(), DEBUG_TOKEN.encode())
+
+
+async def handle_debug_memory(request: web.Request) -> web.Response:
+    """
+    tracemalloc top sites and diff since the previous call, subsystem object counts
+    and per-market footprints. ?start=1 / ?stop=1 toggle tracing, ?reset=1 re-baselines,
+    ?top=N and ?group=lineno|filename|traceback shape the allocation lists.
+    """
+    if not _debug_authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    q = request.query
+    group = q.get("group", "lineno")
+    if group not in ("lineno", "filename", "traceback"):
+        return web.json_response({"error": "group must be lineno, filename or traceback"}, status=400)
+    try:
+        top = max(1, min(int(q.get("top", 20)), 200))
+    except ValueError:
+        return web.json_response({"error": "top must be an integer"}, status=400)
+    if q.get("stop") == "1":
+        memprof.stop_tracing()
+    elif q.get("start") == "1":
+        memprof.start_tracing()
+
+    app = request.app
+    data = {
+        "rss_mb": memprof.rss_mb(),
+        "subsystems": memprof.subsystem_counts(app["price_feed"], app.get("book_feed"), app.get("executor"),
+                                               app["active_tasks"]),
+        "markets": memprof.market_footprints(),
+        "types": memprof.object_types(),
+        "tracemalloc": await asyncio.to_thread(memprof.snapshot_report, top, group, q.get("reset") == "1"),
+    }
+    return web.json_response(data)
+
+
+async def handle_debug_profile(request: web.Request) -> web.Response:
+    """
+    Sample every thread's stack for ?seconds=N (default 10) and return collapsed stacks
+    for flamegraph.pl / speedscope. ?interval_ms= sets the sampling period;
+    ?auto=1 returns the latest automatically triggered profile instead.
+    """
+    if not _debug_authorized(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    q = request.query
+    if q.get("auto") == "1":
+        prof = cpuprof.profiler.latest_auto()
+        if prof is None:
+            return web.json_response({"error": "no automatic profile captured"}, status=404)
+    else:
+        try:
+            seconds = float(q.get("seconds", 10))
+            interval = float(q.get("interval_ms", PROFILE_INTERVAL * 1000)) / 1000
+        except ValueError:
+            return web.json_response({"error": "seconds and interval_ms must be numbers"}, status=400)
+        if not 0 < seconds <= PROFILE_MAX_SECS:
+            return web.json_response({"error": f"seconds must be in (0, {PROFILE_MAX_SECS:g}]"}, status=400)
+        prof = await asyncio.to_thread(cpuprof.profiler.profile, seconds, min(max(interval, 0.001), 1.0))
+        if prof is None:
+            return web.json_response({"error": "a profile is already running"}, status=409)
+    return web.Response(
+        text=prof.collapsed(), content_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{int(prof.started)}.folded"',
+            "X-Profile-Samples": str(prof.samples),
+        },
+    )
+
+
 async def handle_index(request: web.Request) -> web.Response:
     return web.Response(text=_HTML, content_type="text/html")
 
 
 # ── App factory ─────────────────────────────────────────────────────────────
 
-def create_dashboard_app(price_feed, active_tasks) -> web.Application:
+def create_dashboard_app(price_feed, active_tasks, book_feed=None, executor=None) -> web.Application:
     app = web.Application()
     app["price_feed"] = price_feed
     app["active_tasks"] = active_tasks
+    app["book_feed"] = book_feed
+    app["executor"] = executor
     app.router.add_get("/", handle_index)
     app.router.add_get("/api/health", handle_health)
     app.router.add_get("/api/sessions", handle_sessions)
+    app.router.add_get("/api/fills", handle_fills)
+    app.router.add_get("/api/ticks", handle_ticks)
+    app.router.add_get("/api/traces", handle_traces)
+    app.router.add_get("/api/traces/{trace_id}", handle_trace)
+    app.router.add_get("/trace/{trace_id}", handle_trace_page)
+    app.router.add_post("/api/snapshot", handle_snapshot)
+    app.router.add_get("/api/debug/memory", handle_debug_memory)
+    app.router.add_get("/api/debug/profile", handle_debug_profile)
     return app
 
 
+async def start_dashboard(price_feed, active_tasks, port: int, book_feed=None, executor=None) -> web.AppRunner:
+    runner = web.AppRunner(create_dashboard_app(price_feed, active_tasks, book_feed, executor))
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    logger.info("Dashboard running on http://0.0.0.0:%s", port)
+    return runner
+
+
 # ── HTML template ───────────────────────────────────────────────────────────
 
 _HTML = """\
@@ -119,6 +303,11 @@ _HTML = """\
     padding: 12px; margin-bottom: 18px;
   }
   canvas { width: 100%; height: 180px; display: block; }
+  .ranges a {
+    font-size: 0.7rem; color: #8b949e; margin-left: 10px; cursor: pointer;
+  }
+  .ranges a.on { color: #58a6ff; }
+  #sessions-body tr { cursor: pointer; }
 
   table {
     width: 100%; border-collapse: collapse; font-size: 0.8rem;
@@ -153,7 +342,8 @@ _HTML = """\
 
 <div class="health-grid" id="health-grid"></div>
 
-<h2>BTC/USD — 60s Tick Chart</h2>
+<h2>BTC/USD — <span id="chart-title">60s</span> Tick Chart
+  <span class="ranges"><a data-range="60" class="on">60s</a><a data-range="3600">1h</a><a data-range="86400">24h</a></span></h2>
 <div id="chart-container"><canvas id="chart"></canvas></div>
 
 <h2>Sessions (last 24h)</h2>
@@ -162,12 +352,24 @@ _HTML = """\
     <tr>
       <th>Session</th><th>Beat</th><th>Decision</th><th>Reason/Side</th>
       <th>Dist</th><th>Outcome</th><th>Result</th><th>P&amp;L</th>
+      <th>Filled</th><th>Real P&amp;L</th>
     </tr>
   </thead>
   <tbody id="sessions-body"></tbody>
 </table>
 <div class="summary-row" id="summary-row"></div>
 
+<h2>Realistic P&amp;L by Size (last 24h, recorded books)</h2>
+<table>
+  <thead>
+    <tr>
+      <th>Size</th><th>Markets</th><th>Fill %</th><th>Partial</th>
+      <th>Avg Slippage</th><th>Real P&amp;L</th><th>Flat P&amp;L</th>
+    </tr>
+  </thead>
+  <tbody id="fills-body"></tbody>
+</table>
+
 <script>
 (function() {
   let lastHealthOk = 0;
@@ -198,7 +400,7 @@ _HTML = """\
       lastHealthOk = Date.now();
       document.getElementById('stale-banner').style.display = 'none';
       renderHealth(d);
-      renderChart(d.ticks || []);
+      if (!chartWindow) renderChart(d.ticks || []);
     } catch(e) {
       if (Date.now() - lastHealthOk > 15000)
         document.getElementById('stale-banner').style.display = 'block';
@@ -285,6 +487,41 @@ _HTML = """\
     ctx.fillText('$' + last.toFixed(2), x(ticks.length - 1) + 4, y(last) + 4);
   }
 
+  // ── Historical ranges (/api/ticks) ──────────────────────
+  // chartWindow is null for the live 60s view, else {secs} (trailing) or {from, to} (fixed)
+  let chartWindow = null;
+
+  async function fetchHistory() {
+    if (!chartWindow) return;
+    const to = chartWindow.to || Date.now() / 1000;
+    const from = chartWindow.from || to - chartWindow.secs;
+    const points = Math.max(100, Math.round(document.getElementById('chart-container').clientWidth));
+    try {
+      const r = await fetch('/api/ticks?from=' + from + '&to=' + to + '&points=' + points);
+      const d = await r.json();
+      renderChart((d.points || []).map(p => ({ts: p[0], price: p[1]})));
+    } catch(e) {}
+  }
+
+  function showRange(secs, label, from, to) {
+    chartWindow = secs === 60 && !from ? null : {secs, from, to};
+    document.getElementById('chart-title').textContent = label;
+    document.querySelectorAll('.ranges a').forEach(a =>
+      a.classList.toggle('on', !from && Number(a.dataset.range) === secs));
+    chartWindow ? fetchHistory() : fetchHealth();
+  }
+
+  document.querySelectorAll('.ranges a').forEach(a =>
+    a.addEventListener('click', () => showRange(Number(a.dataset.range), a.textContent)));
+
+  // Clicking a session shows its final minute
+  document.getElementById('sessions-body').addEventListener('click', (ev) => {
+    const tr = ev.target.closest('tr');
+    if (!tr || !tr.dataset.end || ev.target.closest('a')) return;
+    const end = new Date(tr.dataset.end).getTime() / 1000;
+    if (!isNaN(end)) showRange(60, 'final minute of ' + tr.dataset.slug, end - 60, end);
+  });
+
   // ── Sessions polling ────────────────────────────────────
   async function fetchSessions() {
     try {
@@ -296,10 +533,10 @@ _HTML = """\
 
   function renderSessions(rows) {
     const tbody = document.getElementById('sessions-body');
-    let wins = 0, losses = 0, active = 0, netPnl = 0;
+    let wins = 0, losses = 0, active = 0, netPnl = 0, netReal = 0;
 
     tbody.innerHTML = rows.map(r => {
-      const dec = r.decision || '?';
+      const dec = r.decision || (r.stage ? r.stage.toUpperCase() : '?');  // in flight: last lifecycle step
       const isActive = dec === 'ACTIVE';
       const won = r.would_have_won;
       const pnl = r.theoretical_pnl;
@@ -308,6 +545,7 @@ _HTML = """\
       if (won === 1) wins++;
       if (won === 0 && isActive) losses++;
       if (pnl != null) netPnl += pnl;
+      if (r.realistic_pnl != null) netReal += r.realistic_pnl;
 
       const result = won === 1 ? '<span class="win">WIN</span>'
         : won === 0 ? '<span class="loss">LOSS</span>'
@@ -315,6 +553,18 @@ _HTML = """\
       const pnlStr = pnl != null
         ? '<span class="' + (pnl >= 0 ? 'win' : 'loss') + '">$' + pnl.toFixed(2) + '</span>'
         : '—';
+      const realStr = r.realistic_pnl != null
+        ? '<span class="' + (r.realistic_pnl >= 0 ? 'win' : 'loss') + '">$' + r.realistic_pnl.toFixed(2) + '</span>'
+        : '—';
+      // Until Gamma resolves, the outcome is read off our own feed at the close (greyed; ? = low confidence)
+      const outcome = r.actual_outcome
+        ? esc(r.actual_outcome) + (r.outcome_mismatch
+          ? ' <span class="loss" title="provisional was ' + esc(r.provisional_outcome) + '">≠</span>' : '')
+        : r.provisional_outcome
+          ? '<span class="skip" title="provisional: close $' + esc(r.close_price) + ', awaiting Gamma">' +
+            esc(r.provisional_outcome) + (r.outcome_confidence === 'low' ? ' ?' : '') + '</span>'
+          : '—';
+      const filled = r.fill_shares != null ? Number(r.fill_shares).toLocaleString(undefined,{maximumFractionDigits:0}) : '—';
       const decCls = isActive ? 'win' : 'skip';
       const reasonOrSide = isActive ? (r.would_buy || '—') : (r.skip_reason || '—');
       const dist = r.distance_at_decision != null ? r.distance_at_decision.toFixed(0) : '—';
@@ -323,16 +573,21 @@ _HTML = """\
 
       const slug = r.market_slug || '';
       const href = slug ? 'https://polymarket.com/event/' + encodeURIComponent(slug) : '';
+      const trace = r.trace_id
+        ? ' <a href="/trace/' + encodeURIComponent(r.trace_id) + '" target="_blank" style="color:#8b949e;text-decoration:none" title="lifecycle trace">⏱</a>'
+        : '';
 
-      return '<tr>' +
-        '<td>' + (href ? '<a href="' + href + '" target="_blank" style="color:#58a6ff;text-decoration:none">' + esc(session) + '</a>' : esc(session)) + '</td>' +
+      return '<tr data-end="' + esc(r.end_time || '') + '" data-slug="' + esc(slug) + '">' +
+        '<td>' + (href ? '<a href="' + href + '" target="_blank" style="color:#58a6ff;text-decoration:none">' + esc(session) + '</a>' : esc(session)) + trace + '</td>' +
         '<td>' + beat + '</td>' +
         '<td class="' + decCls + '">' + esc(dec) + '</td>' +
         '<td>' + esc(reasonOrSide) + '</td>' +
         '<td>' + dist + '</td>' +
-        '<td>' + esc(r.actual_outcome || '—') + '</td>' +
+        '<td>' + outcome + '</td>' +
         '<td>' + result + '</td>' +
         '<td>' + pnlStr + '</td>' +
+        '<td>' + filled + '</td>' +
+        '<td>' + realStr + '</td>' +
         '</tr>';
     }).join('');
 
@@ -344,14 +599,102 @@ _HTML = """\
       'Wins: <span class="win">' + wins + '</span> &nbsp;|&nbsp; ' +
       'Losses: <span class="loss">' + losses + '</span> &nbsp;|&nbsp; ' +
       'Win Rate: <span>' + wr + '%</span> &nbsp;|&nbsp; ' +
-      'Net P&L: <span class="' + (netPnl >= 0 ? 'win' : 'loss') + '">$' + netPnl.toFixed(2) + '</span>';
+      'Net P&L: <span class="' + (netPnl >= 0 ? 'win' : 'loss') + '">$' + netPnl.toFixed(2) + '</span> &nbsp;|&nbsp; ' +
+      'Net Real P&L: <span class="' + (netReal >= 0 ? 'win' : 'loss') + '">$' + netReal.toFixed(2) + '</span>';
+  }
+
+  // ── Fill simulation by size ─────────────────────────────
+  async function fetchFills() {
+    try {
+      const r = await fetch('/api/fills');
+      renderFills(await r.json());
+    } catch(e) {}
+  }
+
+  function renderFills(rows) {
+    const money = (v) => '<span class="' + (v >= 0 ? 'win' : 'loss') + '">$' + v.toFixed(2) + '</span>';
+    document.getElementById('fills-body').innerHTML = rows.map(r =>
+      '<tr>' +
+        '<td>' + Number(r.size).toLocaleString() + '</td>' +
+        '<td>' + r.markets + '</td>' +
+        '<td>' + (r.fill_ratio != null ? (r.fill_ratio * 100).toFixed(1) + '%' : '—') + '</td>' +
+        '<td>' + r.partial_fills + '</td>' +
+        '<td>' + (r.avg_slippage != null ? r.avg_slippage.toFixed(4) : '—') + '</td>' +
+        '<td>' + money(r.realistic_pnl) + '</td>' +
+        '<td>' + money(r.flat_pnl) + '</td>' +
+      '</tr>'
+    ).join('');
   }
 
   // ── Kick off polling ────────────────────────────────────
   fetchHealth();
   fetchSessions();
+  fetchFills();
   setInterval(fetchHealth, 5000);
   setInterval(fetchSessions, 15000);
+  setInterval(fetchFills, 60000);
+  setInterval(() => { if (chartWindow && !chartWindow.to) fetchHistory(); }, 60000);
+})();
+</script>
+</body>
+</html>
+"""
+
+_TRACE_HTML = """\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>PolyBot Trace</title>
+<style>
+  body {
+    font-family: 'SF Mono', 'Fira Code', 'Consolas', monospace;
+    background: #0d1117; color: #c9d1d9; padding: 20px; font-size: 0.8rem;
+  }
+  h1 { font-size: 1.1rem; color: #58a6ff; margin-bottom: 12px; }
+  a { color: #58a6ff; }
+  .row { display: flex; align-items: center; margin: 3px 0; }
+  .name { width: 220px; flex: none; overflow: hidden; white-space: nowrap; }
+  .lane { position: relative; flex: 1; height: 16px; background: #161b22; }
+  .bar { position: absolute; height: 100%; background: #58a6ff; min-width: 2px; }
+  .bar.open { background: #d29922; }
+  .dur { width: 110px; flex: none; text-align: right; color: #8b949e; }
+  .attrs { margin: 0 0 6px 220px; color: #8b949e; white-space: pre-wrap; }
+</style>
+</head>
+<body>
+<h1 id="title">Trace</h1>
+<div id="spans">Loading...</div>
+<script>
+(async function() {
+  const id = location.pathname.split('/').pop();
+  document.getElementById('title').innerHTML =
+    'Trace ' + id + ' · <a href="/api/traces/' + id + '?format=chrome">Chrome trace</a>';
+  const r = await fetch('/api/traces/' + id);
+  const el = document.getElementById('spans');
+  if (!r.ok) { el.textContent = 'Trace is no longer in the in-memory buffer.'; return; }
+  const spans = (await r.json()).spans;
+  const now = Date.now() / 1000;
+  const t0 = Math.min(...spans.map(s => s.start));
+  const t1 = Math.max(...spans.map(s => s.end || now));
+  const span = (t1 - t0) || 1;
+  const depth = {};
+  spans.forEach(s => { depth[s.span_id] = s.parent_id in depth ? depth[s.parent_id] + 1 : 0; });
+  el.innerHTML = spans.map(s => {
+    const left = (s.start - t0) / span * 100;
+    const width = ((s.end || now) - s.start) / span * 100;
+    const dur = s.duration_ms != null ? (s.duration_ms >= 1000 ? (s.duration_ms / 1000).toFixed(2) + 's'
+      : s.duration_ms.toFixed(1) + 'ms') : 'open';
+    const hasAttrs = Object.keys(s.attrs).length > 0;
+    const pad = '&nbsp;'.repeat(2 * depth[s.span_id]);
+    return '<div class="row"><div class="name">' + pad + s.name + '</div><div class="lane">' +
+      '<div class="bar' + (s.end ? '' : ' open') + '" style="left:' + left + '%;width:' + width + '%"></div>' +
+      '</div><div class="dur">' + dur + '</div></div>' +
+      (hasAttrs ? '<div class="attrs"></div>' : '');
+  }).join('');
+  // attrs are set as text so values from the feed are never parsed as HTML
+  const attrEls = el.querySelectorAll('.attrs');
+  spans.filter(s => Object.keys(s.attrs).length).forEach((s, i) => attrEls[i].textContent = JSON.stringify(s.attrs));
 })();
 </script>
 </body>
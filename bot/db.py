@@ -1,8 +1,13 @@
 import json
+import logging
 import os
 import sqlite3
+import time
 
-from bot.config import DB_PATH, LOG_DIR
+from bot.config import DB_PATH, LOG_DIR, VACUUM_CONVERT_TIMEOUT
+from bot.records import plain, to_json
+
+logger = logging.getLogger(__name__)
 
 _CREATE_TABLE = """
 CREATE TABLE IF NOT EXISTS markets (
@@ -32,10 +37,146 @@ CREATE TABLE IF NOT EXISTS markets (
     buy_price REAL,
     price_samples TEXT,
     price_ticks TEXT,
+    order_book TEXT,
+    book_depth_at_buy_price REAL,
+    fill_shares REAL,
+    fill_vwap REAL,
+    fill_slippage REAL,
+    realistic_pnl REAL,
+    fill_sims TEXT,
+    order_id TEXT,
+    order_status TEXT,
+    order_latency_ms REAL,
+    decision_deadline TEXT,
+    decision_lead_ms REAL,
+    tick_to_decision_ms REAL,
+    feed_gap_count INTEGER,
+    feed_gap_secs REAL,
+    trace_id TEXT,
+    stage TEXT,
+    close_price REAL,
+    provisional_outcome TEXT,
+    outcome_confidence TEXT,
+    outcome_source TEXT,
+    outcome_mismatch INTEGER,
     logged_at TEXT DEFAULT (datetime('now'))
 )
 """
 
+_CREATE_ORDERS = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    market_id TEXT,
+    side TEXT,
+    token_id TEXT,
+    price REAL,
+    size REAL,
+    mode TEXT,
+    order_id TEXT,
+    status TEXT,
+    latency_ms REAL,
+    error TEXT,
+    submitted_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+)
+"""
+
+_CREATE_FEED_GAPS = """
+CREATE TABLE IF NOT EXISTS feed_gaps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL,
+    ended_at REAL,
+    duration_secs REAL,
+    ticks_missed INTEGER
+)
+"""
+
+_CREATE_LEASES = """
+CREATE TABLE IF NOT EXISTS market_leases (
+    slug TEXT PRIMARY KEY,
+    market_id TEXT,
+    worker_id TEXT,
+    state TEXT,
+    expires_at REAL,
+    claimed_at REAL,
+    takeovers INTEGER DEFAULT 0
+)
+"""
+
+_CREATE_MEMORY_SAMPLES = """
+CREATE TABLE IF NOT EXISTS memory_samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL,
+    rss_mb REAL,
+    traced_mb REAL,
+    traced_peak_mb REAL,
+    gc_objects INTEGER,
+    market_bytes INTEGER,
+    subsystems TEXT
+)
+"""
+
+# Append-only market lifecycle log (bot.events); data holds only the columns that step set
+_CREATE_MARKET_EVENTS = """
+CREATE TABLE IF NOT EXISTS market_events (
+    seq INTEGER PRIMARY KEY,
+    market_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ts REAL NOT NULL,
+    data TEXT
+)
+"""
+
+# Continuous BTC/USD tick history (bot.tick_history); ts is the Chainlink source time
+_CREATE_TICKS = """
+CREATE TABLE IF NOT EXISTS ticks (
+    ts REAL PRIMARY KEY,
+    price REAL,
+    relay_ts REAL,
+    recv_ts REAL
+) WITHOUT ROWID
+"""
+
+# A "samples" event extends markets.price_samples with its batch instead of replacing it
+_APPEND_SAMPLES = """
+UPDATE markets SET price_samples = (
+    SELECT json_group_array(json(value)) FROM (
+        SELECT 0 AS part, key, value FROM json_each(COALESCE(markets.price_samples, '[]'))
+        UNION ALL
+        SELECT 1, key, value FROM json_each(json_extract(:data, '$.price_samples'))
+        ORDER BY part, key
+    )
+)
+WHERE market_id = :market_id
+"""
+
+# One row per bucket: open/close are the prices at the bucket's first/last tick
+_TICK_CANDLES = """
+SELECT g.k * :bucket, o.price, g.hi, g.lo, c.price, g.n
+FROM (
+    SELECT CAST(ts / :bucket AS INTEGER) AS k, MIN(ts) AS t0, MAX(ts) AS t1,
+           MAX(price) AS hi, MIN(price) AS lo, COUNT(*) AS n
+    FROM ticks WHERE ts >= :start AND ts < :end
+    GROUP BY k
+) AS g
+JOIN ticks AS o ON o.ts = g.t0
+JOIN ticks AS c ON c.ts = g.t1
+ORDER BY g.k
+"""
+
+# A lease can be taken when it is free, already ours, expired or released (expires_at=0).
+# 'done' leases are final so a finished market is never picked up again.
+_CLAIM_LEASE = """
+INSERT INTO market_leases (slug, market_id, worker_id, state, expires_at, claimed_at)
+VALUES (:slug, :market_id, :worker_id, 'claimed', :expires_at, :now)
+ON CONFLICT(slug) DO UPDATE SET
+    worker_id = excluded.worker_id,
+    expires_at = excluded.expires_at,
+    claimed_at = excluded.claimed_at,
+    takeovers = takeovers + (market_leases.worker_id != excluded.worker_id)
+WHERE market_leases.state = 'claimed'
+  AND (market_leases.worker_id = excluded.worker_id OR market_leases.expires_at < :now)
+"""
+
 _UPSERT = """
 INSERT INTO markets (
     market_id, market_slug, start_time, end_time, beat_price,
@@ -44,7 +185,13 @@ INSERT INTO markets (
     price_at_T14_31, price_at_T14_45, price_at_T14_55, price_at_T14_58, price_at_T14_59,
     current_price, distance_at_T14_31, distance_at_decision,
     would_buy, actual_outcome, would_have_won, theoretical_pnl,
-    simulated_shares, buy_price, price_samples, price_ticks
+    simulated_shares, buy_price, price_samples, price_ticks,
+    order_book, book_depth_at_buy_price,
+    fill_shares, fill_vwap, fill_slippage, realistic_pnl, fill_sims,
+    order_id, order_status, order_latency_ms,
+    decision_deadline, decision_lead_ms, tick_to_decision_ms,
+    feed_gap_count, feed_gap_secs, trace_id,
+    close_price, provisional_outcome, outcome_confidence, outcome_source, outcome_mismatch
 ) VALUES (
     :market_id, :market_slug, :start_time, :end_time, :beat_price,
     :price_before_beat, :price_after_beat,
@@ -52,7 +199,13 @@ INSERT INTO markets (
     :price_at_T14_31, :price_at_T14_45, :price_at_T14_55, :price_at_T14_58, :price_at_T14_59,
     :current_price, :distance_at_T14_31, :distance_at_decision,
     :would_buy, :actual_outcome, :would_have_won, :theoretical_pnl,
-    :simulated_shares, :buy_price, :price_samples, :price_ticks
+    :simulated_shares, :buy_price, :price_samples, :price_ticks,
+    :order_book, :book_depth_at_buy_price,
+    :fill_shares, :fill_vwap, :fill_slippage, :realistic_pnl, :fill_sims,
+    :order_id, :order_status, :order_latency_ms,
+    :decision_deadline, :decision_lead_ms, :tick_to_decision_ms,
+    :feed_gap_count, :feed_gap_secs, :trace_id,
+    :close_price, :provisional_outcome, :outcome_confidence, :outcome_source, :outcome_mismatch
 )
 ON CONFLICT(market_id) DO UPDATE SET
     market_slug      = COALESCE(excluded.market_slug, markets.market_slug),
@@ -78,7 +231,28 @@ ON CONFLICT(market_id) DO UPDATE SET
     simulated_shares = COALESCE(excluded.simulated_shares, markets.simulated_shares),
     buy_price        = COALESCE(excluded.buy_price, markets.buy_price),
     price_samples    = COALESCE(excluded.price_samples, markets.price_samples),
-    price_ticks      = COALESCE(excluded.price_ticks, markets.price_ticks)
+    price_ticks      = COALESCE(excluded.price_ticks, markets.price_ticks),
+    order_book       = COALESCE(excluded.order_book, markets.order_book),
+    book_depth_at_buy_price = COALESCE(excluded.book_depth_at_buy_price, markets.book_depth_at_buy_price),
+    fill_shares      = COALESCE(excluded.fill_shares, markets.fill_shares),
+    fill_vwap        = COALESCE(excluded.fill_vwap, markets.fill_vwap),
+    fill_slippage    = COALESCE(excluded.fill_slippage, markets.fill_slippage),
+    realistic_pnl    = COALESCE(excluded.realistic_pnl, markets.realistic_pnl),
+    fill_sims        = COALESCE(excluded.fill_sims, markets.fill_sims),
+    order_id         = COALESCE(excluded.order_id, markets.order_id),
+    order_status     = COALESCE(excluded.order_status, markets.order_status),
+    order_latency_ms = COALESCE(excluded.order_latency_ms, markets.order_latency_ms),
+    decision_deadline = COALESCE(excluded.decision_deadline, markets.decision_deadline),
+    decision_lead_ms = COALESCE(excluded.decision_lead_ms, markets.decision_lead_ms),
+    tick_to_decision_ms = COALESCE(excluded.tick_to_decision_ms, markets.tick_to_decision_ms),
+    feed_gap_count   = COALESCE(excluded.feed_gap_count, markets.feed_gap_count),
+    feed_gap_secs    = COALESCE(excluded.feed_gap_secs, markets.feed_gap_secs),
+    trace_id         = COALESCE(excluded.trace_id, markets.trace_id),
+    close_price      = COALESCE(excluded.close_price, markets.close_price),
+    provisional_outcome = COALESCE(excluded.provisional_outcome, markets.provisional_outcome),
+    outcome_confidence = COALESCE(excluded.outcome_confidence, markets.outcome_confidence),
+    outcome_source   = COALESCE(excluded.outcome_source, markets.outcome_source),
+    outcome_mismatch = COALESCE(excluded.outcome_mismatch, markets.outcome_mismatch)
 """
 
 # Column names expected in the upsert (order must match _UPSERT placeholders)
@@ -90,6 +264,44 @@ _COLUMNS = [
     "current_price", "distance_at_T14_31", "distance_at_decision",
     "would_buy", "actual_outcome", "would_have_won", "theoretical_pnl",
     "simulated_shares", "buy_price", "price_samples", "price_ticks",
+    "order_book", "book_depth_at_buy_price",
+    "fill_shares", "fill_vwap", "fill_slippage", "realistic_pnl", "fill_sims",
+    "order_id", "order_status", "order_latency_ms",
+    "decision_deadline", "decision_lead_ms", "tick_to_decision_ms",
+    "feed_gap_count", "feed_gap_secs", "trace_id",
+    "close_price", "provisional_outcome", "outcome_confidence", "outcome_source", "outcome_mismatch",
+]
+
+# Columns stored as JSON text
+_JSON_COLUMNS = ("price_samples", "price_ticks", "order_book", "fill_sims")
+
+_COLUMN_SET = frozenset(_COLUMNS) - {"market_id"}
+
+# Columns added after the initial schema: (name, type)
+_MIGRATIONS = [
+    ("price_ticks", "TEXT"),
+    ("order_book", "TEXT"),
+    ("book_depth_at_buy_price", "REAL"),
+    ("fill_shares", "REAL"),
+    ("fill_vwap", "REAL"),
+    ("fill_slippage", "REAL"),
+    ("realistic_pnl", "REAL"),
+    ("fill_sims", "TEXT"),
+    ("order_id", "TEXT"),
+    ("order_status", "TEXT"),
+    ("order_latency_ms", "REAL"),
+    ("decision_deadline", "TEXT"),
+    ("decision_lead_ms", "REAL"),
+    ("tick_to_decision_ms", "REAL"),
+    ("feed_gap_count", "INTEGER"),
+    ("feed_gap_secs", "REAL"),
+    ("trace_id", "TEXT"),
+    ("stage", "TEXT"),
+    ("close_price", "REAL"),
+    ("provisional_outcome", "TEXT"),
+    ("outcome_confidence", "TEXT"),
+    ("outcome_source", "TEXT"),
+    ("outcome_mismatch", "INTEGER"),
 ]
 
 
@@ -98,36 +310,71 @@ def _get_conn() -> sqlite3.Connection:
 
 
 def init_db():
-    """Create the markets table (if needed) and enable WAL mode."""
+    """Create the markets table (if needed) and enable WAL mode with incremental auto-vacuum."""
     os.makedirs(LOG_DIR, exist_ok=True)
     conn = _get_conn()
     try:
+        # Must precede table creation to take effect on a fresh DB; older DBs are converted below
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
         conn.execute("PRAGMA journal_mode=WAL")
         conn.execute(_CREATE_TABLE)
+        conn.execute(_CREATE_ORDERS)
+        conn.execute(_CREATE_FEED_GAPS)
+        conn.execute(_CREATE_LEASES)
+        conn.execute(_CREATE_MEMORY_SAMPLES)
+        conn.execute(_CREATE_TICKS)
+        conn.execute(_CREATE_MARKET_EVENTS)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_market_events_market ON market_events(market_id, seq)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_market_id ON orders(market_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_markets_logged_at ON markets(logged_at)")
-        # Migration: add price_ticks column to existing DBs
-        try:
-            conn.execute("ALTER TABLE markets ADD COLUMN price_ticks TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists (fresh DB or already migrated)
+        # Migration: add newer columns to existing DBs
+        for name, col_type in _MIGRATIONS:
+            try:
+                conn.execute(f"ALTER TABLE markets ADD COLUMN {name} {col_type}")
+            except sqlite3.OperationalError:
+                pass  # Column already exists (fresh DB or already migrated)
         conn.commit()
     finally:
         conn.close()
+    _convert_incremental_vacuum()
 
 
-def upsert_market(entry: dict):
-    """Insert or update a market row."""
-    # Serialize price_samples list to JSON string
+def _convert_incremental_vacuum():
+    """
+    DBs created before auto_vacuum=INCREMENTAL need one full VACUUM to switch modes.
+    It locks the whole DB, so it runs at startup before our writers and gives up after
+    VACUUM_CONVERT_TIMEOUT if another process holds the lock; the next start retries.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=VACUUM_CONVERT_TIMEOUT)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        logger.info("Converting database to incremental auto-vacuum (one-time VACUUM)")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        logger.warning("Incremental auto-vacuum conversion skipped, retried next start: %s", e)
+    finally:
+        conn.close()
+
+
+def _market_params(entry: dict) -> dict:
+    # Serialize list/dict/record columns to JSON strings
     params = {}
     for col in _COLUMNS:
         val = entry.get(col)
-        if col in ("price_samples", "price_ticks") and val is not None and not isinstance(val, str):
-            val = json.dumps(val, default=str)
-        # Convert booleans to int for would_have_won
-        if col == "would_have_won" and isinstance(val, bool):
+        if col in _JSON_COLUMNS and val is not None and not isinstance(val, str):
+            val = to_json(val)
+        # Convert booleans to int for would_have_won / outcome_mismatch
+        if col in ("would_have_won", "outcome_mismatch") and isinstance(val, bool):
             val = int(val)
         params[col] = val
+    return params
 
+
+def upsert_market(entry: dict):
+    """Insert or update a market row."""
+    params = _market_params(entry)
     conn = _get_conn()
     try:
         conn.execute(_UPSERT, params)
@@ -136,12 +383,202 @@ def upsert_market(entry: dict):
         conn.close()
 
 
+def upsert_markets(entries: list[dict]):
+    """Insert or update many market rows in one transaction."""
+    params = [_market_params(e) for e in entries]
+    conn = _get_conn()
+    try:
+        conn.executemany(_UPSERT, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def append_market_events(events: list[tuple[str, str, float, dict, dict]]):
+    """
+    Append (market_id, kind, ts, fields, row_only) lifecycle events in one transaction and
+    fold each into its markets row: only the columns an event carries are written, read
+    back out of the event's JSON. Unknown field names stay in the event log only.
+    row_only holds large columns (JSON blobs) that are written to the markets row but
+    kept out of the event; the event just lists their names under "row_only".
+    """
+    conn = _get_conn()
+    try:
+        for market_id, kind, ts, fields, row_only in events:
+            fields = {k: plain(v) for k, v in fields.items() if v is not None}
+            row_only = {k: v for k, v in row_only.items() if v is not None and k in _COLUMN_SET}
+            if row_only:
+                fields["row_only"] = sorted(row_only)
+            data = json.dumps(fields, default=str)
+            conn.execute("INSERT INTO market_events (market_id, kind, ts, data) VALUES (?, ?, ?, ?)",
+                         (market_id, kind, ts, data))
+            conn.execute("INSERT INTO markets (market_id) VALUES (?) ON CONFLICT(market_id) DO NOTHING",
+                         (market_id,))
+            append = kind == "samples"
+            sets = [f"{c} = json_extract(:data, '$.{c}')" for c in fields
+                    if c in _COLUMN_SET and not (append and c == "price_samples")]
+            sets.append("stage = :kind")
+            if kind == "logged":
+                sets.append("logged_at = datetime('now')")
+            params = {"market_id": market_id, "kind": kind, "data": data}
+            for c, v in row_only.items():
+                sets.append(f"{c} = :row_{c}")
+                params[f"row_{c}"] = to_json(v) if c in _JSON_COLUMNS and not isinstance(v, str) else v
+            conn.execute(f"UPDATE markets SET {', '.join(sets)} WHERE market_id = :market_id", params)
+            if append and "price_samples" in fields:
+                conn.execute(_APPEND_SAMPLES, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def load_market_events(market_id: str) -> list[dict]:
+    """A market's lifecycle events, oldest first."""
+    conn = _get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT seq, kind, ts, data FROM market_events WHERE market_id = ? ORDER BY seq", (market_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [{"seq": seq, "kind": kind, "ts": ts, "data": json.loads(data) if data else {}}
+            for seq, kind, ts, data in rows]
+
+
+def insert_order(order: dict):
+    """Record one submitted (or paper) order with its decision-to-ack latency."""
+    conn = _get_conn()
+    try:
+        conn.execute(
+            "INSERT INTO orders (market_id, side, token_id, price, size, mode, order_id, status, latency_ms, error) "
+            "VALUES (:market_id, :side, :token_id, :price, :size, :mode, :order_id, :status, :latency_ms, :error)",
+            order,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def insert_feed_gap(gap: dict):
+    """Record one price-feed outage."""
+    conn = _get_conn()
+    try:
+        conn.execute(
+            "INSERT INTO feed_gaps (started_at, ended_at, duration_secs, ticks_missed) VALUES (?, ?, ?, ?)",
+            (gap["start"], gap["end"], round(gap["end"] - gap["start"], 3), gap["ticks_missed"]),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def insert_memory_sample(sample: dict):
+    """Record one periodic memory sample (see bot.memprof)."""
+    conn = _get_conn()
+    try:
+        conn.execute(
+            "INSERT INTO memory_samples (ts, rss_mb, traced_mb, traced_peak_mb, gc_objects, market_bytes, subsystems) "
+            "VALUES (:ts, :rss_mb, :traced_mb, :traced_peak_mb, :gc_objects, :market_bytes, :subsystems)",
+            sample,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def insert_ticks(rows: list[tuple]):
+    """Store (ts, price, relay_ts, recv_ts) ticks; ticks already stored are skipped."""
+    conn = _get_conn()
+    try:
+        conn.executemany("INSERT OR IGNORE INTO ticks (ts, price, relay_ts, recv_ts) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def prune_ticks(before_ts: float) -> int:
+    """Delete ticks older than before_ts. Returns the number of rows removed."""
+    conn = _get_conn()
+    try:
+        cur = conn.execute("DELETE FROM ticks WHERE ts < ?", (before_ts,))
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def load_ticks(start_ts: float, end_ts: float) -> list[tuple[float, float]]:
+    """(ts, price) for ticks with start_ts <= ts < end_ts, oldest first."""
+    conn = _get_conn()
+    try:
+        return conn.execute("SELECT ts, price FROM ticks WHERE ts >= ? AND ts < ? ORDER BY ts",
+                            (start_ts, end_ts)).fetchall()
+    finally:
+        conn.close()
+
+
+def load_tick_candles(start_ts: float, end_ts: float, bucket: float) -> list[tuple]:
+    """(bucket_start, open, high, low, close, ticks) per non-empty bucket, oldest first."""
+    conn = _get_conn()
+    try:
+        return conn.execute(_TICK_CANDLES, {"start": start_ts, "end": end_ts, "bucket": bucket}).fetchall()
+    finally:
+        conn.close()
+
+
+def claim_lease(slug: str, market_id: str, worker_id: str, ttl: float) -> bool:
+    """Take the lease on a market slug. Returns False if another live worker holds it or it is done."""
+    now = time.time()
+    conn = _get_conn()
+    try:
+        cur = conn.execute(_CLAIM_LEASE, {
+            "slug": slug, "market_id": market_id, "worker_id": worker_id, "expires_at": now + ttl, "now": now,
+        })
+        conn.commit()
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def renew_leases(slugs: list[str], worker_id: str, ttl: float) -> set[str]:
+    """Extend our leases. Returns the slugs that are no longer ours."""
+    conn = _get_conn()
+    try:
+        expires_at = time.time() + ttl
+        lost = set()
+        for slug in slugs:
+            cur = conn.execute(
+                "UPDATE market_leases SET expires_at = ? WHERE slug = ? AND worker_id = ? AND state = 'claimed'",
+                (expires_at, slug, worker_id),
+            )
+            if cur.rowcount == 0:
+                lost.add(slug)
+        conn.commit()
+        return lost
+    finally:
+        conn.close()
+
+
+def finish_lease(slug: str, worker_id: str, done: bool):
+    """Mark a market done (never claimed again) or release it for another worker."""
+    conn = _get_conn()
+    try:
+        if done:
+            sql = "UPDATE market_leases SET state = 'done' WHERE slug = ? AND worker_id = ?"
+        else:
+            sql = "UPDATE market_leases SET expires_at = 0 WHERE slug = ? AND worker_id = ? AND state = 'claimed'"
+        conn.execute(sql, (slug, worker_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def get_recent_market_ids() -> set[str]:
-    """Return market_ids logged in the last 24 hours (for restart dedupe)."""
+    """Return market_ids decided in the last 24 hours (for restart dedupe); in-flight rows are retried."""
     conn = _get_conn()
     try:
         rows = conn.execute(
-            "SELECT market_id FROM markets WHERE logged_at > datetime('now', '-1 day')"
+            "SELECT market_id FROM markets WHERE logged_at > datetime('now', '-1 day') AND decision IS NOT NULL"
         ).fetchall()
         return {row[0] for row in rows}
     except sqlite3.OperationalError:
@@ -149,3 +586,26 @@ def get_recent_market_ids() -> set[str]:
         return set()
     finally:
         conn.close()
+
+
+def get_unreconciled_markets(min_age_secs: float = 0) -> list[dict]:
+    """
+    ACTIVE markets of the last 24 hours logged without Gamma's outcome (for reconciliation after a
+    restart), leaving out those logged within min_age_secs.
+    """
+    conn = _get_conn()
+    try:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT market_id, market_slug, end_time, would_buy, provisional_outcome, outcome_confidence, "
+            "simulated_shares, buy_price, fill_shares, fill_vwap, fill_sims FROM markets "
+            "WHERE logged_at > datetime('now', '-1 day') AND decision = 'ACTIVE' "
+            "AND actual_outcome IS NULL AND outcome_source IS NOT 'gamma' "
+            "AND logged_at <= datetime('now', ?)",
+            (f"-{int(min_age_secs)} seconds",),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
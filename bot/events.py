@@ -0,0 +1,109 @@
+"""
+Market lifecycle events.
+
+Each step of a market (discovered, beat captured, a batch of tracking samples,
+decision, outcome, the final logged entry) is appended to market_events as a
+compact row holding only the columns that step produced; the markets row is
+updated from it in the same transaction, so the dashboard and datasette see
+intermediate states instead of nothing until the very end. The final entry only
+adds what earlier events did not carry, and large JSON columns (ticks, books,
+fill sims) go to the markets row without being copied into the event.
+
+record() only buffers. With the writer task running (main starts it), buffered
+events go to SQLite in one transaction per MARKET_EVENT_FLUSH_INTERVAL, off the
+event loop and in order. Without it (tools, benchmarks) record() writes at once.
+"""
+
+import asyncio
+import logging
+import time
+
+from bot.config import MARKET_EVENT_FLUSH_INTERVAL
+from bot.db import append_market_events
+
+logger = logging.getLogger(__name__)
+
+# Columns written to the markets row only, never into an event's data
+_ROW_ONLY = frozenset({"price_samples", "price_ticks", "order_book", "fill_sims"})
+_CARRIED_MARKETS = 256  # markets whose recorded columns are remembered until their final entry
+
+
+class MarketEventLog:
+    def __init__(self):
+        self._pending: list[tuple[str, str, float, dict, dict]] = []
+        self._carried: dict[str, dict] = {}  # market_id -> latest value of each column recorded so far
+        self.running = False
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def record(self, market_id: str, kind: str, row_only: dict | None = None, **fields):
+        """
+        Append one event; list values must not be mutated afterwards (pass a copy).
+        row_only columns are written to the markets row but not stored in the event.
+        """
+        self._pending.append((market_id, kind, time.time(), fields, row_only or {}))
+        self._carried.setdefault(market_id, {}).update(
+            (k, v) for k, v in fields.items() if v is not None and k not in _ROW_ONLY)
+        if len(self._carried) > _CARRIED_MARKETS:
+            # Markets that never logged (lease lost, crashed task) must not pile up
+            del self._carried[next(iter(self._carried))]
+        if not self.running:
+            self.flush()
+
+    def record_entry(self, entry: dict):
+        """The final "logged" event: only values no earlier event carried, large JSON columns row-only."""
+        market_id = entry["market_id"]
+        carried = self._carried.pop(market_id, {})
+        fields, row_only = {}, {}
+        for k, v in entry.items():
+            if k == "market_id" or v is None:
+                continue
+            if k in _ROW_ONLY:
+                row_only[k] = v  # the full column, even where "samples" events appended part of it
+            elif k not in carried or carried[k] != v:
+                fields[k] = v
+        self.record(market_id, "logged", row_only=row_only, **fields)
+        self._carried.pop(market_id, None)
+
+    def flush(self):
+        """Write everything buffered now (blocking)."""
+        batch, self._pending = self._pending, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: list):
+        started = time.perf_counter()
+        append_market_events(batch)
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self.written += len(batch)
+        self.flushes += 1
+
+    async def run(self, interval: float = MARKET_EVENT_FLUSH_INTERVAL):
+        self.running = True
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                batch, self._pending = self._pending, []
+                if not batch:
+                    continue
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except Exception as e:
+                    # Keep the batch ahead of anything recorded meanwhile and retry next round
+                    self._pending[:0] = batch
+                    self.errors += 1
+                    logger.error("Market event write failed (%d pending): %s", len(batch), e)
+        finally:
+            self.running = False
+
+    def summary(self) -> dict:
+        return {"pending": len(self._pending), "written": self.written, "flushes": self.flushes,
+                "errors": self.errors, "last_flush_ms": self.last_flush_ms, "max_flush_ms": self.max_flush_ms}
+
+
+# Process-wide log shared by main, the strategy and log_entry
+events = MarketEventLog()
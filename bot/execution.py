@@ -0,0 +1,332 @@
+"""
+Order execution for the decision point.
+
+Orders for both outcomes are built and signed while a market is TRACKING, so at
+decision time the executor only stamps auth headers on a pre-serialized body and
+sends it over an already-open connection.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Callable
+
+from bot.config import (
+    BUY_PRICE,
+    CLOB_API_URL,
+    CLOB_KEEPALIVE_SECS,
+    EXECUTION_MODE,
+    ORDER_MAX_NOTIONAL,
+    ORDER_SIZE,
+    POLY_API_KEY,
+    POLY_API_SECRET,
+    POLY_API_PASSPHRASE,
+    POLY_FUNDER,
+    POLY_PRIVATE_KEY,
+)
+from bot.db import insert_order
+
+if TYPE_CHECKING:
+    import httpx  # imported on start() so paper mode never loads it
+
+logger = logging.getLogger(__name__)
+
+# Polymarket CTF Exchange on Polygon (EIP-712 verifying contract)
+_EXCHANGE_ADDRESS = "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E"
+_CHAIN_ID = 137
+_ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class OrderExecutor(ABC):
+    """Interface between the strategy and an order venue."""
+
+    async def start(self):
+        """Open connections / warm caches. Called once at startup."""
+
+    async def close(self):
+        """Release connections."""
+
+    @abstractmethod
+    async def prepare(self, market_id: str, tokens: dict[str, str], price: float, size: float):
+        """Build (and sign) one order per outcome in tokens ({"Up": token_id, "Down": token_id})."""
+
+    @abstractmethod
+    async def submit(self, market_id: str, side: str, decision_perf: float | None = None) -> dict:
+        """
+        Send the prepared order for `side`. decision_perf is time.perf_counter() at the
+        moment the decision was made; latency is measured from there to the venue's ack.
+        """
+
+    def discard(self, market_id: str):
+        """Drop any prepared orders for a market."""
+
+    def memory_stats(self) -> dict:
+        return {"prepared_markets": len(getattr(self, "_templates", ()))}
+
+
+# Order rows being written off the event loop (kept referenced until done)
+_pending_writes: set[asyncio.Task] = set()
+
+
+def _record(market_id: str, side: str, template: dict | None, result: dict) -> dict:
+    """Return the result at once; the orders row is written in a thread so submit() never waits on SQLite."""
+    row = {
+        "market_id": market_id,
+        "side": side,
+        "token_id": template["token_id"] if template else None,
+        "price": template["price"] if template else None,
+        "size": template["size"] if template else None,
+        "mode": result["mode"],
+        "order_id": result.get("order_id"),
+        "status": result["status"],
+        "latency_ms": result.get("latency_ms"),
+        "error": result.get("error"),
+    }
+    task = asyncio.create_task(_persist(row))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+    return result
+
+
+async def _persist(row: dict):
+    try:
+        await asyncio.to_thread(insert_order, row)
+    except Exception as e:
+        logger.error("Failed to record order for %s: %s", row["market_id"], e)
+
+
+class PaperExecutor(OrderExecutor):
+    """Phase 1 default: keeps templates, acks instantly, never touches the network."""
+
+    def __init__(self):
+        self._templates: dict[str, dict[str, dict]] = {}
+
+    async def prepare(self, market_id: str, tokens: dict[str, str], price: float, size: float):
+        self._templates[market_id] = {
+            side: {"token_id": token_id, "price": price, "size": size}
+            for side, token_id in tokens.items()
+        }
+
+    async def submit(self, market_id: str, side: str, decision_perf: float | None = None) -> dict:
+        start = decision_perf if decision_perf is not None else time.perf_counter()
+        template = self._templates.pop(market_id, {}).get(side)
+        result = {
+            "mode": "paper",
+            "order_id": None,
+            "status": "paper" if template else "not_prepared",
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        return _record(market_id, side, template, result)
+
+    def discard(self, market_id: str):
+        self._templates.pop(market_id, None)
+
+
+class EthOrderSigner:
+    """EIP-712 signer for CTF Exchange orders. Requires the optional `eth-account` package."""
+
+    def __init__(self, private_key: str):
+        try:
+            from eth_account import Account
+        except ImportError as e:
+            raise RuntimeError("Live execution requires `pip install eth-account`") from e
+        self._account = Account.from_key(private_key)
+        self.address = self._account.address
+
+    def __call__(self, order: dict) -> str:
+        from eth_account.messages import encode_typed_data
+
+        message = {k: order[k] for k in (
+            "salt", "maker", "signer", "taker", "tokenId", "makerAmount", "takerAmount",
+            "expiration", "nonce", "feeRateBps", "side", "signatureType",
+        )}
+        message["side"] = 0 if order["side"] == "BUY" else 1
+        for k in ("salt", "tokenId", "makerAmount", "takerAmount", "expiration", "nonce", "feeRateBps"):
+            message[k] = int(message[k])
+        signable = encode_typed_data(full_message={
+            "types": {
+                "EIP712Domain": [
+                    {"name": "name", "type": "string"},
+                    {"name": "version", "type": "string"},
+                    {"name": "chainId", "type": "uint256"},
+                    {"name": "verifyingContract", "type": "address"},
+                ],
+                "Order": [
+                    {"name": "salt", "type": "uint256"},
+                    {"name": "maker", "type": "address"},
+                    {"name": "signer", "type": "address"},
+                    {"name": "taker", "type": "address"},
+                    {"name": "tokenId", "type": "uint256"},
+                    {"name": "makerAmount", "type": "uint256"},
+                    {"name": "takerAmount", "type": "uint256"},
+                    {"name": "expiration", "type": "uint256"},
+                    {"name": "nonce", "type": "uint256"},
+                    {"name": "feeRateBps", "type": "uint256"},
+                    {"name": "side", "type": "uint8"},
+                    {"name": "signatureType", "type": "uint8"},
+                ],
+            },
+            "primaryType": "Order",
+            "domain": {
+                "name": "Polymarket CTF Exchange",
+                "version": "1",
+                "chainId": _CHAIN_ID,
+                "verifyingContract": _EXCHANGE_ADDRESS,
+            },
+            "message": message,
+        })
+        return "0x" + self._account.sign_message(signable).signature.hex().removeprefix("0x")
+
+
+class ClobExecutor(OrderExecutor):
+    """Submits pre-signed limit orders to the Polymarket CLOB over a kept-alive HTTP connection."""
+
+    def __init__(self, signer: Callable[[dict], str], maker: str, api_key: str, api_secret: str,
+                 api_passphrase: str, base_url: str = CLOB_API_URL, signer_address: str | None = None,
+                 max_notional: float = ORDER_MAX_NOTIONAL):
+        self._sign = signer
+        self._maker = maker
+        self._signer_address = signer_address or maker
+        self._api_key = api_key
+        self._secret = base64.urlsafe_b64decode(api_secret) if api_secret else b""
+        self._passphrase = api_passphrase
+        self._base_url = base_url
+        self.max_notional = max_notional
+        self._client: "httpx.AsyncClient | None" = None
+        self._keepalive_task: asyncio.Task | None = None
+        self._templates: dict[str, dict[str, dict]] = {}
+
+    async def start(self):
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            base_url=self._base_url,
+            timeout=5,
+            limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+        )
+        await self._ping()
+        self._keepalive_task = asyncio.create_task(self._keepalive())
+        logger.info("CLOB executor ready (%s)", self._base_url)
+
+    async def close(self):
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+        if self._client:
+            await self._client.aclose()
+
+    async def _ping(self):
+        import httpx
+
+        try:
+            await self._client.get("/time")
+        except httpx.HTTPError as e:
+            logger.warning("CLOB keepalive failed: %s", e)
+
+    async def _keepalive(self):
+        """Touch the API periodically so the TCP/TLS connection is warm at decision time."""
+        while True:
+            await asyncio.sleep(CLOB_KEEPALIVE_SECS)
+            await self._ping()
+
+    async def prepare(self, market_id: str, tokens: dict[str, str], price: float, size: float):
+        if price * size > self.max_notional:
+            # Nothing is prepared, so submit() records the market as not_prepared
+            logger.error("Refusing to prepare %s: %.2f shares @ %s = $%.2f exceeds ORDER_MAX_NOTIONAL $%.2f",
+                         market_id, size, price, price * size, self.max_notional)
+            return
+        templates = {}
+        for side, token_id in tokens.items():
+            order = {
+                "salt": random.randint(1, 2**53),
+                "maker": self._maker,
+                "signer": self._signer_address,
+                "taker": _ZERO_ADDRESS,
+                "tokenId": token_id,
+                # BUY: pay price*size USDC (6 dp) for size shares (6 dp)
+                "makerAmount": str(round(price * size * 1_000_000)),
+                "takerAmount": str(round(size * 1_000_000)),
+                "expiration": "0",
+                "nonce": "0",
+                "feeRateBps": "0",
+                "side": "BUY",
+                "signatureType": 0 if self._maker == self._signer_address else 2,
+            }
+            order["signature"] = self._sign(order)
+            body = json.dumps({"order": order, "owner": self._api_key, "orderType": "GTC"},
+                              separators=(",", ":"))
+            templates[side] = {"token_id": token_id, "price": price, "size": size, "body": body}
+        self._templates[market_id] = templates
+
+    def _l2_headers(self, method: str, path: str, body: str) -> dict:
+        ts = str(int(time.time()))
+        digest = hmac.new(self._secret, (ts + method + path + body).encode(), hashlib.sha256).digest()
+        return {
+            "POLY_ADDRESS": self._signer_address,
+            "POLY_SIGNATURE": base64.urlsafe_b64encode(digest).decode(),
+            "POLY_TIMESTAMP": ts,
+            "POLY_API_KEY": self._api_key,
+            "POLY_PASSPHRASE": self._passphrase,
+            "Content-Type": "application/json",
+        }
+
+    async def submit(self, market_id: str, side: str, decision_perf: float | None = None) -> dict:
+        start = decision_perf if decision_perf is not None else time.perf_counter()
+        template = self._templates.pop(market_id, {}).get(side)
+        if template is None:
+            return _record(market_id, side, None, {"mode": "live", "order_id": None, "status": "not_prepared", "latency_ms": None})
+
+        import httpx
+
+        body = template["body"]
+        try:
+            resp = await self._client.post("/order", content=body, headers=self._l2_headers("POST", "/order", body))
+            latency_ms = round((time.perf_counter() - start) * 1000, 3)
+            data = resp.json()
+            ok = resp.status_code == 200 and data.get("success", False)
+            result = {
+                "mode": "live",
+                "order_id": data.get("orderID"),
+                "status": data.get("status", "accepted") if ok else "rejected",
+                "latency_ms": latency_ms,
+                "error": None if ok else (data.get("errorMsg") or f"HTTP {resp.status_code}"),
+            }
+        except (httpx.HTTPError, ValueError) as e:
+            result = {
+                "mode": "live",
+                "order_id": None,
+                "status": "error",
+                "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+                "error": str(e),
+            }
+        return _record(market_id, side, template, result)
+
+    def discard(self, market_id: str):
+        self._templates.pop(market_id, None)
+
+
+def create_executor() -> OrderExecutor:
+    """
+    Build the executor selected by EXECUTION_MODE ("paper" or "live"). Live mode refuses
+    to start unless BUY_PRICE x ORDER_SIZE is positive and within ORDER_MAX_NOTIONAL.
+    """
+    if EXECUTION_MODE != "live":
+        return PaperExecutor()
+    notional = BUY_PRICE * ORDER_SIZE
+    if not 0 < notional <= ORDER_MAX_NOTIONAL:
+        raise ValueError(f"Live orders of ${notional:.2f} ({ORDER_SIZE:g} shares @ {BUY_PRICE}) are outside "
+                         f"(0, ORDER_MAX_NOTIONAL=${ORDER_MAX_NOTIONAL:.2f}]; set ORDER_SIZE / ORDER_MAX_NOTIONAL")
+    signer = EthOrderSigner(POLY_PRIVATE_KEY)
+    return ClobExecutor(
+        signer=signer,
+        maker=POLY_FUNDER or signer.address,
+        signer_address=signer.address,
+        api_key=POLY_API_KEY,
+        api_secret=POLY_API_SECRET,
+        api_passphrase=POLY_API_PASSPHRASE,
+    )
@@ -0,0 +1,4 @@
+"""
+Local stand-in servers for Polymarket services.
+Used to exercise the bot's network clients without touching the real APIs.
+"""
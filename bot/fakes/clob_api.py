@@ -0,0 +1,89 @@
+"""
+Stand-in for the Polymarket CLOB REST API (order placement only).
+
+Usage:
+    clob = FakeClobApi(ack_delay=0.02)
+    await clob.start()               # listens on http://127.0.0.1:<clob.port>
+    executor = ClobExecutor(signer=lambda order: "0x" + "00" * 65, maker="0xabc",
+                            api_key="k", api_secret="c2VjcmV0", api_passphrase="p",
+                            base_url=clob.url)
+"""
+
+import asyncio
+import json
+import time
+import uuid
+
+from aiohttp import web
+
+
+class FakeClobApi:
+    """Acks every well-formed order after an optional delay and records what it received."""
+
+    _REQUIRED_HEADERS = ("POLY_ADDRESS", "POLY_SIGNATURE", "POLY_TIMESTAMP", "POLY_API_KEY", "POLY_PASSPHRASE")
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ack_delay: float = 0.0,
+                 status: str = "live", reject: bool = False):
+        self.host = host
+        self.port = port
+        self.ack_delay = ack_delay
+        self.status = status
+        self.reject = reject
+        self.orders: list[dict] = []
+        self.time_requests = 0
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/time", self._handle_time)
+        app.router.add_post("/order", self._handle_order)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle_time(self, request: web.Request) -> web.Response:
+        self.time_requests += 1
+        return web.Response(text=str(int(time.time())))
+
+    async def _handle_order(self, request: web.Request) -> web.Response:
+        missing = [h for h in self._REQUIRED_HEADERS if h not in request.headers]
+        if missing:
+            return web.json_response({"success": False, "errorMsg": f"missing headers: {missing}"}, status=401)
+        try:
+            body = json.loads(await request.text())
+            order = body["order"]
+        except (ValueError, KeyError):
+            return web.json_response({"success": False, "errorMsg": "invalid order payload"}, status=400)
+
+        if self.ack_delay:
+            await asyncio.sleep(self.ack_delay)
+        self.orders.append({"body": body, "headers": dict(request.headers), "received_at": time.time()})
+        if self.reject or not order.get("signature"):
+            return web.json_response({"success": False, "errorMsg": "order rejected"})
+        return web.json_response({
+            "success": True,
+            "errorMsg": "",
+            "orderID": "0x" + uuid.uuid4().hex,
+            "status": self.status,
+        })
+
+
+async def _main():
+    clob = FakeClobApi(port=8766)
+    await clob.start()
+    print(f"Fake CLOB API on {clob.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,134 @@
+"""
+Stand-in for the Polymarket CLOB market-channel WebSocket.
+
+Usage:
+    server = FakeMarketChannel({"123": {"bids": [[0.98, 500]], "asks": [[0.99, 1200]]}})
+    await server.start()             # listens on ws://127.0.0.1:<server.port>
+    feed = OrderBookFeed(server.url)
+    await server.push_change("123", "SELL", 0.99, 800)
+"""
+
+import asyncio
+import json
+import time
+
+import websockets
+
+
+def _ms() -> str:
+    return str(int(time.time() * 1000))
+
+
+def _levels(levels: list) -> list[dict]:
+    return [{"price": str(p), "size": str(s)} for p, s in levels]
+
+
+class FakeMarketChannel:
+    """Serves book snapshots on subscribe and broadcasts price changes / trades on demand."""
+
+    def __init__(self, books: dict[str, dict] | None = None, host: str = "127.0.0.1", port: int = 0,
+                 default_book: dict | None = None):
+        self.books = books or {}   # token_id -> {"bids": [[p, s]], "asks": [[p, s]]}
+        self.default_book = default_book or {"bids": [], "asks": []}  # served for tokens not in books
+        self.host = host
+        self.port = port
+        self.subscriptions: list[dict] = []
+        self._clients: dict = {}   # ws -> set(token_ids)
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def drop_clients(self):
+        """Close every client connection (simulates a server-side disconnect)."""
+        for ws in list(self._clients):
+            await ws.close()
+
+    async def push_change(self, token_id: str, side: str, price: float, size: float):
+        book = self.books.setdefault(token_id, {"bids": [], "asks": []})
+        key = "bids" if side.upper() == "BUY" else "asks"
+        book[key] = [[p, s] for p, s in book[key] if p != price] + ([[price, size]] if size > 0 else [])
+        await self._broadcast(token_id, {
+            "event_type": "price_change",
+            "market": "0xfake",
+            "timestamp": _ms(),
+            "price_changes": [{"asset_id": token_id, "price": str(price), "size": str(size), "side": side.upper()}],
+        })
+
+    async def push_trade(self, token_id: str, side: str, price: float, size: float):
+        await self._broadcast(token_id, {
+            "event_type": "last_trade_price",
+            "asset_id": token_id,
+            "market": "0xfake",
+            "price": str(price),
+            "size": str(size),
+            "side": side.upper(),
+            "timestamp": _ms(),
+        })
+
+    async def _broadcast(self, token_id: str, event: dict):
+        msg = json.dumps(event)
+        for ws, assets in list(self._clients.items()):
+            if token_id in assets:
+                try:
+                    await ws.send(msg)
+                except websockets.ConnectionClosed:
+                    pass
+
+    def _book_event(self, token_id: str) -> dict:
+        book = self.books.get(token_id, self.default_book)
+        return {
+            "event_type": "book",
+            "asset_id": token_id,
+            "market": "0xfake",
+            "bids": _levels(book["bids"]),
+            "asks": _levels(book["asks"]),
+            "timestamp": _ms(),
+            "hash": "0x0",
+        }
+
+    async def _handler(self, ws):
+        self._clients[ws] = set()
+        try:
+            async for message in ws:
+                if message == "PING":
+                    await ws.send("PONG")
+                    continue
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                self.subscriptions.append(data)
+                ids = data.get("assets_ids", [])
+                if data.get("operation") == "unsubscribe":
+                    self._clients[ws].difference_update(ids)
+                    continue
+                self._clients[ws].update(ids)
+                await ws.send(json.dumps([self._book_event(t) for t in ids]))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.pop(ws, None)
+
+
+async def _main():
+    server = FakeMarketChannel({"fake-up": {"bids": [[0.97, 300]], "asks": [[0.99, 1500]]},
+                                "fake-down": {"bids": [[0.01, 300]], "asks": [[0.03, 1500]]}},
+                               port=8765)
+    await server.start()
+    print(f"Fake CLOB market channel on {server.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
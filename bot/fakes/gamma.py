@@ -0,0 +1,171 @@
+"""
+Stand-in for the Polymarket Gamma API (BTC 15-minute markets only).
+
+Every 15-minute boundary has a synthetic btc-updown-15m-<start> market, listed
+once it is within `horizon_secs` of starting and settled `settle_delay` seconds
+after it ends. Time comes from time.time(), so the stub follows whatever clock
+the caller runs (including the load-test's accelerated one).
+
+Usage:
+    gamma = FakeGamma(settle_delay=60, outcome_fn=lambda start, end: "Up")
+    await gamma.start()              # listens on http://127.0.0.1:<gamma.port>
+    # GAMMA_API_BASE=gamma.url
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from aiohttp import web
+
+_WINDOW = 900
+_SLUG_PREFIX = "btc-updown-15m-"
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _parse_iso(value: str | None) -> float | None:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class FakeGamma:
+    """Serves /events (by slug or bulk) and /markets/{id} with ETags; records which markets were requested."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, settle_delay: float = 60.0,
+                 outcome_fn: Callable[[float, float], str] | None = None,
+                 error_rate: float = 0.0, horizon_secs: float = 3600):
+        self.host = host
+        self.port = port
+        self.settle_delay = settle_delay
+        self.outcome_fn = outcome_fn or (lambda start, end: random.choice(["Up", "Down"]))
+        self.error_rate = error_rate      # fraction of requests answered with 503
+        self.horizon_secs = horizon_secs  # how far ahead markets are listed
+        self.served: dict[str, dict] = {}  # market_id -> {"slug", "start", "end", "first_seen"}
+        self.outcomes: dict[str, str] = {}
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/events", self._handle_events)
+        app.router.add_get("/markets/{market_id}", self._handle_market)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _fail(self) -> bool:
+        self.requests += 1
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+    def _market(self, start: int) -> dict:
+        market_id = str(start)
+        end = start + _WINDOW
+        now = time.time()
+        closed = now >= end + self.settle_delay
+        outcome_prices = '["0", "0"]'
+        if closed:
+            outcome = self.outcomes.setdefault(market_id, self.outcome_fn(start, end))
+            outcome_prices = '["1", "0"]' if outcome == "Up" else '["0", "1"]'
+        return {
+            "id": market_id,
+            "conditionId": f"0x{start:064x}",
+            "question": f"Bitcoin Up or Down - {_iso(start)}",
+            "outcomes": '["Up", "Down"]',
+            "outcomePrices": outcome_prices,
+            "clobTokenIds": json.dumps([f"{start}1", f"{start}2"]),
+            "eventStartTime": _iso(start),
+            "endDate": _iso(end),
+            "acceptingOrders": now < end,
+            "closed": closed,
+        }
+
+    def _respond(self, request: web.Request, body) -> web.Response:
+        """JSON response with an ETag; 304 when the client already holds this version."""
+        text = json.dumps(body)
+        etag = '"' + hashlib.sha1(text.encode()).hexdigest()[:16] + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=text, content_type="application/json", headers={"ETag": etag})
+
+    async def _handle_events(self, request: web.Request) -> web.Response:
+        if self._fail():
+            return web.json_response({"error": "unavailable"}, status=503)
+        if "slug" not in request.query:
+            return self._list_events(request)
+        slug = request.query.get("slug", "")
+        if not slug.startswith(_SLUG_PREFIX):
+            return web.json_response([])
+        try:
+            start = int(slug[len(_SLUG_PREFIX):])
+        except ValueError:
+            return web.json_response([])
+        if start % _WINDOW or start > time.time() + self.horizon_secs:
+            return web.json_response([])
+        market = self._market(start)
+        self.served.setdefault(market["id"], {"slug": slug, "start": start, "end": start + _WINDOW,
+                                              "first_seen": time.time()})
+        return self._respond(request, [{"slug": slug, "title": market["question"], "markets": [market]}])
+
+    def _list_events(self, request: web.Request) -> web.Response:
+        """Bulk listing: listed events ending after end_date_min and starting before start_date_max, by start."""
+        now = time.time()
+        q = request.query
+        end_min = _parse_iso(q.get("end_date_min")) or now
+        start_max = min(_parse_iso(q.get("start_date_max")) or float("inf"), now + self.horizon_secs)
+        offset, limit = int(q.get("offset", 0)), int(q.get("limit", 100))
+        first = int(end_min - _WINDOW) // _WINDOW * _WINDOW + _WINDOW
+        starts = [t for t in range(first, int(start_max) + 1, _WINDOW) if t + _WINDOW >= end_min]
+        events = []
+        for start in starts[offset:offset + limit]:
+            market = self._market(start)
+            slug = f"{_SLUG_PREFIX}{start}"
+            self.served.setdefault(market["id"], {"slug": slug, "start": start, "end": start + _WINDOW,
+                                                  "first_seen": now})
+            events.append({"slug": slug, "title": market["question"], "markets": [market]})
+        return self._respond(request, events)
+
+    async def _handle_market(self, request: web.Request) -> web.Response:
+        if self._fail():
+            return web.json_response({"error": "unavailable"}, status=503)
+        try:
+            start = int(request.match_info["market_id"])
+        except ValueError:
+            return web.json_response({"error": "not found"}, status=404)
+        if start % _WINDOW:
+            return web.json_response({"error": "not found"}, status=404)
+        return self._respond(request, self._market(start))
+
+
+async def _main():
+    gamma = FakeGamma(port=8767)
+    await gamma.start()
+    print(f"Fake Gamma on {gamma.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
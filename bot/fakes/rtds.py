@@ -0,0 +1,158 @@
+"""
+Stand-in for the Polymarket RTDS WebSocket (crypto_prices_chainlink topic).
+
+Emits a random-walk price per symbol at a fixed rate, with optional source-time
+jitter, out-of-order and duplicate frames, and a periodic disconnect/outage
+pattern. The btc/usd history is kept so a fake Gamma can settle markets from it.
+
+Usage:
+    rtds = FakeRtds(rate=5, symbols=3, jitter_ms=80, disconnect_every=600, outage_secs=3)
+    await rtds.start()               # listens on ws://127.0.0.1:<rtds.port>
+    feed = ChainlinkPriceFeed(rtds.url)
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from bisect import bisect_right
+from collections import deque
+
+import websockets
+
+_SYMBOLS = ["btc/usd", "eth/usd", "sol/usd", "xrp/usd", "doge/usd", "bnb/usd"]
+_START_PRICES = {"btc/usd": 65000.0, "eth/usd": 3200.0, "sol/usd": 150.0, "xrp/usd": 0.6,
+                 "doge/usd": 0.15, "bnb/usd": 580.0}
+
+
+class FakeRtds:
+    """Broadcasts crypto_prices_chainlink updates to every subscribed client."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, rate: float = 1.0, symbols: int = 1,
+                 jitter_ms: float = 0.0, reorder: float = 0.0, duplicate: float = 0.0,
+                 disconnect_every: float | None = None, outage_secs: float = 0.0,
+                 volatility: float = 2.0, history_secs: float = 7200):
+        self.host = host
+        self.port = port
+        self.rate = rate                          # updates per second per symbol
+        self.symbols = _SYMBOLS[:symbols] + [f"sym{i}/usd" for i in range(symbols - len(_SYMBOLS))]
+        self.jitter_ms = jitter_ms                # source timestamp lags send time by up to this much
+        self.reorder = reorder                    # probability a frame is held back behind the next one
+        self.duplicate = duplicate                # probability a frame is sent twice
+        self.disconnect_every = disconnect_every  # seconds between forced disconnects
+        self.outage_secs = outage_secs            # connections are refused this long after each disconnect
+        self.volatility = volatility              # btc/usd dollars per sqrt(second)
+        self.prices = {s: _START_PRICES.get(s, 100.0) for s in self.symbols}
+        self.sent = 0
+        self.disconnects = 0
+        self.refused = 0
+        self._history: deque[tuple[float, float]] = deque(maxlen=max(1000, int(history_secs * rate)))
+        self._clients: set = set()
+        self._held: list[str] = []
+        self._outage_until = 0.0
+        self._server = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._tasks.append(asyncio.create_task(self._emit_loop()))
+        if self.disconnect_every:
+            self._tasks.append(asyncio.create_task(self._disconnect_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def drop_clients(self, outage_secs: float = 0.0):
+        """Close every client connection and refuse new ones for outage_secs."""
+        self._outage_until = time.time() + outage_secs
+        self.disconnects += 1
+        for ws in list(self._clients):
+            await ws.close()
+
+    def price_at(self, ts: float) -> float | None:
+        """Last btc/usd price emitted at or before ts."""
+        i = bisect_right(self._history, (ts, math.inf))
+        return self._history[i - 1][1] if i else None
+
+    async def _handler(self, ws):
+        if time.time() < self._outage_until:
+            self.refused += 1
+            await ws.close(code=1013)
+            return
+        try:
+            async for message in ws:
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                if data.get("action") == "subscribe":
+                    self._clients.add(ws)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(ws)
+
+    def _frame(self, symbol: str, now: float) -> str:
+        source_ts = now - random.uniform(0, self.jitter_ms) / 1000
+        return json.dumps({
+            "topic": "crypto_prices_chainlink",
+            "type": "update",
+            "timestamp": int(now * 1000),
+            "payload": {"symbol": symbol, "timestamp": int(source_ts * 1000), "value": round(self.prices[symbol], 2)},
+        })
+
+    async def _emit_loop(self):
+        interval = 1 / self.rate
+        next_at = time.time()
+        while True:
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.time()))
+            now = time.time()
+            frames = []
+            for symbol in self.symbols:
+                scale = self.volatility * self.prices[symbol] / _START_PRICES["btc/usd"]
+                self.prices[symbol] += random.gauss(0, scale * math.sqrt(interval))
+                if symbol == "btc/usd":
+                    self._history.append((now, self.prices[symbol]))
+                frame = self._frame(symbol, now)
+                if random.random() < self.reorder:
+                    self._held.append(frame)
+                    continue
+                frames.append(frame)
+                frames.extend(self._held)
+                self._held.clear()
+                if random.random() < self.duplicate:
+                    frames.append(frame)
+            for frame in frames:
+                websockets.broadcast(self._clients, frame)
+            self.sent += len(frames)
+
+    async def _disconnect_loop(self):
+        while True:
+            await asyncio.sleep(self.disconnect_every)
+            await self.drop_clients(self.outage_secs)
+
+
+async def _main():
+    rtds = FakeRtds(rate=2, symbols=3, jitter_ms=50, port=8766)
+    await rtds.start()
+    print(f"Fake RTDS on {rtds.url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
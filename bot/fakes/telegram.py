@@ -0,0 +1,90 @@
+"""
+Stand-in for the Telegram Bot API (sendMessage only).
+
+Usage:
+    tg = FakeTelegram(rate_limit_every=3, retry_after=1)
+    await tg.start()                 # listens on http://127.0.0.1:<tg.port>
+    # TELEGRAM_API_BASE=tg.url TELEGRAM_BOT_TOKEN=test TELEGRAM_CHAT_ID=1
+    ...
+    tg.messages                      # [{"chat_id", "text", "ts"}, ...]
+"""
+
+import asyncio
+import random
+import time
+
+from aiohttp import web
+
+
+class FakeTelegram:
+    """Records sent messages; can answer 429 (with retry_after) or 5xx to exercise the notifier's retries."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, token: str | None = None,
+                 rate_limit_every: int = 0, retry_after: float = 1.0, error_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.token = token                        # when set, other tokens get 401
+        self.rate_limit_every = rate_limit_every  # every Nth request is answered 429
+        self.retry_after = retry_after
+        self.error_rate = error_rate              # fraction of requests answered with 502
+        self.messages: list[dict] = []
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/sendMessage", self._handle_send)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle_send(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.token is not None and request.match_info["token"] != self.token:
+            return web.json_response({"ok": False, "error_code": 401, "description": "Unauthorized"}, status=401)
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            self.rate_limited += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"ok": False, "error_code": 502, "description": "Bad Gateway"}, status=502)
+
+        body = await request.json()
+        if not body.get("chat_id") or not body.get("text"):
+            return web.json_response({"ok": False, "error_code": 400, "description": "Bad Request"}, status=400)
+        if len(body["text"]) > 4096:
+            return web.json_response({"ok": False, "error_code": 400,
+                                      "description": "Bad Request: message is too long"}, status=400)
+        self.messages.append({"chat_id": body["chat_id"], "text": body["text"], "ts": time.time()})
+        return web.json_response({"ok": True, "result": {"message_id": len(self.messages)}})
+
+
+async def _main():
+    tg = FakeTelegram(port=8768)
+    await tg.start()
+    print(f"Fake Telegram on {tg.url}")
+    while True:
+        await asyncio.sleep(5)
+        for message in tg.messages:
+            print(f"[{message['chat_id']}] {message['text']}")
+        tg.messages.clear()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,83 @@
+"""
+Depth-aware paper-fill simulator.
+Walks an order book snapshot (see OrderBook.snapshot) to estimate what a buy limit order would actually fill.
+"""
+
+
+def simulate_buy(snapshot: dict, size: float, limit_price: float,
+                 trades_after: list | None = None) -> dict:
+    """
+    Simulate a BUY limit order of `size` shares at `limit_price` against a book snapshot.
+
+    1. The marketable part lifts asks priced at or below the limit, best first.
+    2. Any remainder rests at the limit price behind the bids already queued there.
+       Sell-side trades printed after placement (trades_after: [[ts, price, size, side], ...])
+       drain that queue first; only volume beyond it reaches our order. A trade below our
+       limit means the level was swept, so the resting remainder is treated as filled.
+
+    Returns filled size, VWAP and slippage (VWAP minus the best ask at placement).
+    """
+    asks = snapshot.get("asks") or []
+    bids = snapshot.get("bids") or []
+    best_ask = asks[0][0] if asks else None
+
+    remaining = float(size)
+    cost = 0.0
+    taken = 0.0
+    for price, level_size in asks:
+        if price > limit_price + 1e-9 or remaining <= 0:
+            break
+        qty = min(remaining, level_size)
+        cost += qty * price
+        taken += qty
+        remaining -= qty
+
+    queue_ahead = sum(s for p, s in bids if abs(p - limit_price) < 1e-9)
+    queued = 0.0
+    if remaining > 0 and trades_after:
+        ahead = queue_ahead
+        for _ts, price, trade_size, side in trades_after:
+            if side != "SELL" or price > limit_price + 1e-9:
+                continue
+            if price < limit_price - 1e-9:
+                queued = remaining  # level traded through
+                break
+            consumed = min(ahead, trade_size)
+            ahead -= consumed
+            queued = min(remaining, queued + trade_size - consumed)
+            if queued >= remaining:
+                break
+        cost += queued * limit_price
+
+    filled = taken + queued
+    vwap = cost / filled if filled else None
+    return {
+        "requested": float(size),
+        "filled": round(filled, 4),
+        "taker_filled": round(taken, 4),
+        "maker_filled": round(queued, 4),
+        "queue_ahead": round(queue_ahead, 4),
+        "vwap": round(vwap, 6) if vwap is not None else None,
+        "best_ask": best_ask,
+        "slippage": round(vwap - best_ask, 6) if vwap is not None and best_ask is not None else None,
+        "partial": 0 < filled < size,
+    }
+
+
+def fill_pnl(fill: dict, won: bool | None) -> float | None:
+    """Settlement P&L of a simulated fill: winning shares pay $1, losing shares pay $0."""
+    if won is None or not fill["filled"]:
+        return None if won is None else 0.0
+    payout = fill["filled"] if won else 0.0
+    return round(payout - fill["filled"] * fill["vwap"], 2)
+
+
+def simulate_sizes(snapshot: dict, sizes: list[float], limit_price: float,
+                   won: bool | None = None, trades_after: list | None = None) -> dict[str, dict]:
+    """Run simulate_buy at several order sizes. Keys are sizes as strings (JSON-safe)."""
+    results = {}
+    for size in sizes:
+        fill = simulate_buy(snapshot, size, limit_price, trades_after)
+        fill["pnl"] = fill_pnl(fill, won)
+        results[str(size)] = fill
+    return results
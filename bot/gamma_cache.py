@@ -0,0 +1,166 @@
+"""
+Cache in front of the Gamma API.
+
+- Responses are reused for a TTL. "Not found" answers (404 or an empty list)
+  are cached too, for a separate negative TTL.
+- Once an entry expires it is revalidated with If-None-Match /
+  If-Modified-Since when Gamma sent an ETag / Last-Modified. A 304 renews the
+  entry without re-downloading or re-parsing it.
+- Concurrent requests for the same URL share one round trip.
+- Markets seen on Gamma are indexed by id and slug, and resolved outcomes by
+  id, so re-discovering a market or polling a settled one needs no request.
+
+Hit/miss counters are reported on /api/health under "gamma".
+"""
+
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+from bot.config import GAMMA_API_BASE, GAMMA_CACHE_SIZE
+from bot.records import Market
+
+
+@dataclass(slots=True)
+class _Entry:
+    body: object
+    expires: float  # unix time
+    negative: bool
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class GammaCache:
+    def __init__(self, size: int = GAMMA_CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._by_id: dict[str, Market] = {}
+        self._by_slug: dict[str, Market] = {}
+        self._outcomes: dict[str, str] = {}
+        self.stats: Counter[str] = Counter()
+
+    # ── HTTP ────────────────────────────────────────────────────────────────
+
+    async def get_json(self, client, path: str, params: dict | None = None,
+                       ttl: float = 0.0, negative_ttl: float = 0.0):
+        """
+        GET GAMMA_API_BASE + path through the cache. Returns the decoded body, or
+        None for a 404 / empty answer. Other HTTP errors raise (and are not cached).
+        """
+        key = f"{path}?{urlencode(sorted(params.items()))}" if params else path
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > time.time():
+            self._entries.move_to_end(key)
+            self.stats["negative_hits" if entry.negative else "hits"] += 1
+            return None if entry.negative else entry.body
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(pending)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            body = await self._fetch(client, key, path, params, entry, ttl, negative_ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: don't warn when nobody else was waiting
+            raise
+        else:
+            future.set_result(body)
+            return body
+        finally:
+            del self._inflight[key]
+
+    async def _fetch(self, client, key: str, path: str, params: dict | None,
+                     entry: _Entry | None, ttl: float, negative_ttl: float):
+        headers = {}
+        if entry is not None and not entry.negative:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        self.stats["requests"] += 1
+        try:
+            resp = await client.get(f"{GAMMA_API_BASE}{path}", params=params, headers=headers)
+            if resp.status_code == 304 and entry is not None:
+                self.stats["not_modified"] += 1
+                entry.expires = time.time() + ttl
+                self._entries.move_to_end(key)
+                return entry.body
+            if resp.status_code != 404:
+                resp.raise_for_status()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
+        body = resp.json() if resp.status_code != 404 else None
+        negative = not body
+        new = _Entry(body, time.time() + (negative_ttl if negative else ttl), negative,
+                     resp.headers.get("etag"), resp.headers.get("last-modified"))
+        if new.expires > time.time() or new.etag or new.last_modified:
+            self._entries[key] = new
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.pop(key, None)
+        return None if negative else body
+
+    # ── Market index ────────────────────────────────────────────────────────
+
+    def remember(self, market: Market):
+        """Index a market's Gamma metadata (the record as discovered, before any beat prices)."""
+        self._by_id[market.id] = market
+        self._by_slug[market.slug] = market
+
+    def market(self, id_or_slug: str) -> Market | None:
+        hit = self._by_id.get(id_or_slug) or self._by_slug.get(id_or_slug)
+        if hit is not None:
+            self.stats["index_hits"] += 1
+        return hit
+
+    def outcome(self, market_id: str) -> str | None:
+        hit = self._outcomes.get(market_id)
+        if hit is not None:
+            self.stats["outcome_hits"] += 1
+        return hit
+
+    def set_outcome(self, market_id: str, outcome: str):
+        self._outcomes[market_id] = outcome
+
+    def prune(self, before: float):
+        """Drop indexed markets (and their outcomes) that ended before `before` (unix time)."""
+        for market in [m for m in self._by_id.values() if m.end_time.timestamp() < before]:
+            self._by_id.pop(market.id, None)
+            self._by_slug.pop(market.slug, None)
+            self._outcomes.pop(market.id, None)
+
+    # ── Reporting ───────────────────────────────────────────────────────────
+
+    def summary(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round((lookups - self.stats["misses"]) / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "indexed_markets": len(self._by_id),
+            "resolved_outcomes": len(self._outcomes),
+        }
+
+    def memory_stats(self) -> dict:
+        return {"entries": len(self._entries), "indexed_markets": len(self._by_id),
+                "outcomes": len(self._outcomes)}
+
+
+# Process-wide cache shared by discovery and outcome polling
+cache = GammaCache()
@@ -0,0 +1,43 @@
+"""
+Rolling latency estimates used to schedule the decision point.
+"""
+
+import math
+from collections import deque
+
+from bot.config import LATENCY_WINDOW
+
+
+class LatencyTracker:
+    """Keeps the last N latency samples (ms) and answers percentile queries."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, ms: float | None):
+        if ms is not None and ms >= 0:
+            self._samples.append(ms)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float | None:
+        """Nearest-rank percentile (p in 0-100), or None with no samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+        }
+
+
+# Process-wide estimates shared by every market task
+tick_to_decision = LatencyTracker()
+decision_to_submit = LatencyTracker()
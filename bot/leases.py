@@ -0,0 +1,121 @@
+"""
+Market leases for running several workers against one polybot.db.
+
+Each market slug is claimed in the market_leases table before it is tracked.
+Leases are renewed by a heartbeat; if a worker dies its leases expire after
+LEASE_TTL and another worker takes the market over on its next discovery poll.
+A finished market is marked done so it is never logged twice.
+
+Jobs that must run once per database (archiver, analytics snapshot, tick history,
+memory samples, orphaned settlements, feed-health alerts) run on a single leader,
+elected through the same table: the leader holds the LEADER_SLUG lease and renews
+it every LEASE_HEARTBEAT. When it dies another worker takes the lease over after
+LEASE_TTL and starts the jobs; a leader that loses the lease stops them.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from bot.config import LEASE_HEARTBEAT, LEASE_TTL, SHARDED, WORKER_ID
+from bot.db import claim_lease, finish_lease, renew_leases
+
+logger = logging.getLogger(__name__)
+
+LEADER_SLUG = "_leader"  # market_leases row of the worker running the once-per-database jobs
+
+
+class LeaseManager:
+    """Claims, renews and releases market leases. With sharding disabled every claim succeeds."""
+
+    def __init__(self, worker_id: str = WORKER_ID, enabled: bool = SHARDED):
+        self.worker_id = worker_id
+        self.enabled = enabled
+        self._held: dict[str, asyncio.Task | None] = {}  # slug -> market task once started
+        self.leader = not enabled
+
+    @property
+    def held(self) -> list[str]:
+        return list(self._held)
+
+    def claim(self, slug: str, market_id: str) -> bool:
+        if not self.enabled:
+            return True
+        if not claim_lease(slug, market_id, self.worker_id, LEASE_TTL):
+            return False
+        self._held[slug] = None
+        logger.info("[%s] Lease claimed by %s", slug, self.worker_id)
+        return True
+
+    def holds(self, slug: str) -> bool:
+        return not self.enabled or slug in self._held
+
+    def attach(self, slug: str, task: asyncio.Task):
+        """Cancel this task if the lease is lost."""
+        if slug in self._held:
+            self._held[slug] = task
+
+    def finish(self, slug: str, done: bool = True):
+        if not self.enabled or self._held.pop(slug, False) is False:
+            return
+        finish_lease(slug, self.worker_id, done)
+
+    async def heartbeat_loop(self):
+        if not self.enabled:
+            return
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(LEASE_HEARTBEAT)
+            if not self._held:
+                renewed_at = time.monotonic()
+                continue
+            try:
+                lost = renew_leases(list(self._held), self.worker_id, LEASE_TTL)
+                renewed_at = time.monotonic()
+            except Exception as e:
+                logger.error("Lease heartbeat failed: %s", e)
+                # Past the TTL another worker may already own our markets
+                if time.monotonic() - renewed_at < LEASE_TTL:
+                    continue
+                lost = set(self._held)
+            for slug in lost:
+                task = self._held.pop(slug, None)
+                logger.warning("[%s] Lease lost to another worker; stopping", slug)
+                if task is not None:
+                    task.cancel()
+
+    async def lead(self, start: Callable[[], Awaitable[list[asyncio.Task]]]):
+        """
+        Run the tasks start() launches on one worker only. Without sharding they just start;
+        otherwise this worker waits until it holds the leader lease and cancels them if it is lost.
+        """
+        if not self.enabled:
+            await start()
+            return
+        while True:
+            while not self._claim_leader():
+                await asyncio.sleep(LEASE_HEARTBEAT)
+            self.leader = True
+            logger.info("Worker %s is the leader; starting once-per-database jobs", self.worker_id)
+            tasks = await start()
+            renewed_at = time.monotonic()
+            while True:
+                await asyncio.sleep(LEASE_HEARTBEAT)
+                held = self._claim_leader()
+                if held:
+                    renewed_at = time.monotonic()
+                elif held is False or time.monotonic() - renewed_at >= LEASE_TTL:
+                    break
+            self.leader = False
+            logger.warning("Worker %s lost the leader lease; stopping once-per-database jobs", self.worker_id)
+            for task in tasks:
+                task.cancel()
+
+    def _claim_leader(self) -> bool | None:
+        """Take or renew the leader lease: True if ours, False if another worker holds it, None on a DB error."""
+        try:
+            return claim_lease(LEADER_SLUG, "", self.worker_id, LEASE_TTL)
+        except Exception as e:
+            logger.error("Leader lease claim failed: %s", e)
+            return None
@@ -0,0 +1,326 @@
+"""
+Soak / load test: run the real main() against local fake RTDS, Gamma, CLOB and Telegram servers.
+
+    python -m bot.loadtest --duration 7200 --speed 30 --rate 5 --symbols 4 \
+        --jitter-ms 80 --disconnect-every 900 --outage-secs 5
+
+The whole process runs on an accelerated clock: asyncio timers, time.time() and
+datetime.now() all advance `speed` times faster, so a 15-minute market takes
+900/speed real seconds and --duration real seconds cover duration*speed
+seconds of bot time. Real I/O latency is magnified by the same factor, so keep
+--speed modest when judging latency numbers. The driver prints loop lag, RSS
+and dropped-market counts every --report-every seconds and writes
+loadtest_report.json to LOG_DIR at the end.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import selectors
+import socket
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from unittest import mock
+
+from bot.fakes.clob_ws import FakeMarketChannel
+from bot.fakes.gamma import FakeGamma
+from bot.fakes.rtds import FakeRtds
+from bot.fakes.telegram import FakeTelegram
+
+# Nothing that imports bot.config may be imported at module level: main() sets the
+# endpoint environment variables first.
+
+_WINDOW = 900
+_LAG_PROBE_SECS = 0.25  # real seconds between loop-lag probes
+
+
+class AcceleratedClock:
+    def __init__(self, speed: float, start_wall: float):
+        self.speed = speed
+        self._real0 = time.monotonic()
+        self._wall0 = start_wall
+
+    def monotonic(self) -> float:
+        return (time.monotonic() - self._real0) * self.speed
+
+    def wall(self) -> float:
+        return self._wall0 + self.monotonic()
+
+
+class _ScaledSelector(selectors.DefaultSelector):
+    def __init__(self, clock: AcceleratedClock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        if timeout is not None:
+            timeout = timeout / self._clock.speed
+        return super().select(timeout)
+
+
+class AcceleratedLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock: AcceleratedClock):
+        super().__init__(_ScaledSelector(clock))
+        self._clock = clock
+
+    def time(self) -> float:
+        return self._clock.monotonic()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        # ru_maxrss is KB on Linux, bytes on macOS; this is the peak, not current
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+class LoadTest:
+    def __init__(self, args, clock: AcceleratedClock, ports: dict[str, int]):
+        from bot.latency import LatencyTracker
+
+        self.args = args
+        self.clock = clock
+        self.lag = LatencyTracker(window=10_000)
+        self.max_lag_ms = 0.0
+        self.peak_rss_mb = 0.0
+        self.started_wall = clock.wall()
+        self.rtds = FakeRtds(rate=args.rate, symbols=args.symbols, jitter_ms=args.jitter_ms,
+                             reorder=args.reorder, duplicate=args.duplicate,
+                             disconnect_every=args.disconnect_every, outage_secs=args.outage_secs,
+                             port=ports["rtds"])
+        self.gamma = FakeGamma(settle_delay=args.settle_delay, outcome_fn=self._outcome,
+                               error_rate=args.gamma_error_rate, port=ports["gamma"])
+        self.clob = FakeMarketChannel(default_book={"bids": [[0.97, 500], [0.98, 300]],
+                                                    "asks": [[0.99, 1500], [1.0, 5000]]},
+                                      port=ports["clob"])
+        self.telegram = FakeTelegram(rate_limit_every=args.telegram_rate_limit_every, port=ports["telegram"])
+
+    def _outcome(self, start: float, end: float) -> str:
+        begin, close = self.rtds.price_at(start), self.rtds.price_at(end)
+        if begin is None or close is None:
+            return "Up"
+        return "Up" if close >= begin else "Down"
+
+    async def start_servers(self):
+        await self.rtds.start()
+        await self.gamma.start()
+        await self.clob.start()
+        await self.telegram.start()
+
+    async def stop_servers(self):
+        await self.rtds.stop()
+        await self.gamma.stop()
+        await self.clob.stop()
+        await self.telegram.stop()
+
+    async def probe_lag(self):
+        """Sleep a fixed real interval and record how late the loop woke up."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(_LAG_PROBE_SECS * self.clock.speed)
+            lag_ms = max(0.0, (time.perf_counter() - started - _LAG_PROBE_SECS) * 1000)
+            self.lag.record(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def market_stats(self, db_path: str) -> dict:
+        from bot.config import SETTLEMENT_POLL_INTERVAL
+
+        now = self.clock.wall()
+        grace = self.args.settle_delay + 2 * SETTLEMENT_POLL_INTERVAL + 60
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                logged = {r[0]: (r[1], r[2]) for r in
+                          conn.execute("SELECT market_id, decision, skip_reason FROM markets "
+                                       "WHERE decision IS NOT NULL")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            logged = {}
+
+        due = {mid: m for mid, m in self.gamma.served.items() if m["end"] + grace < now}
+        dropped = sorted(m["slug"] for mid, m in due.items() if mid not in logged)
+        # Windows that started after the run began and should be settled by now but were never requested
+        first = int(self.started_wall // _WINDOW + 1) * _WINDOW
+        expected = range(first, int(now - grace - _WINDOW) + 1, _WINDOW)
+        undiscovered = [s for s in expected if str(s) not in self.gamma.served]
+        decisions = Counter(d for d, _ in logged.values())
+        skips = Counter(r for d, r in logged.values() if d == "SKIP")
+        return {
+            "due": len(due),
+            "logged": len(logged),
+            "dropped": len(dropped),
+            "dropped_slugs": dropped[-20:],
+            "undiscovered": len(undiscovered),
+            "decisions": dict(decisions),
+            "skip_reasons": dict(skips),
+        }
+
+    def report(self, db_path: str) -> dict:
+        from bot.gamma_cache import cache as gamma_cache
+        from bot.notifier import notifier
+        from bot.settlement import reconciler
+
+        rss = _rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return {
+            "sim_hours": round((self.clock.wall() - self.started_wall) / 3600, 2),
+            "speed": self.clock.speed,
+            "loop_lag_ms": {
+                "samples": self.lag.count,
+                "p50": round(self.lag.percentile(50) or 0, 2),
+                "p99": round(self.lag.percentile(99) or 0, 2),
+                "max": round(self.max_lag_ms, 2),
+            },
+            "rss_mb": round(rss, 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "tasks": len(asyncio.all_tasks()),
+            "markets": self.market_stats(db_path),
+            "rtds": {"sent": self.rtds.sent, "clients": self.rtds.client_count,
+                     "disconnects": self.rtds.disconnects, "refused": self.rtds.refused},
+            "gamma": {"requests": self.gamma.requests, "errors": self.gamma.errors,
+                      "not_modified": self.gamma.not_modified, "markets_served": len(self.gamma.served),
+                      "cache": gamma_cache.summary()},
+            "telegram": {"messages": len(self.telegram.messages), "requests": self.telegram.requests,
+                         "rate_limited": self.telegram.rate_limited, "notifier": notifier.summary()},
+            "settlement": reconciler.summary(),
+        }
+
+
+def _patched_datetime(clock: AcceleratedClock):
+    class AcceleratedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock.wall(), tz)
+    return AcceleratedDatetime
+
+
+async def _drive(args, clock: AcceleratedClock, ports: dict[str, int]):
+    test = LoadTest(args, clock, ports)
+    await test.start_servers()
+
+    import bot.main
+    import bot.market_discovery
+    import bot.strategy
+    from bot.config import DB_PATH
+
+    import logging
+    logging.getLogger().setLevel(args.log_level)
+
+    fake_dt = _patched_datetime(clock)
+    patches = [mock.patch.object(m, "datetime", fake_dt)
+               for m in (bot.main, bot.strategy, bot.market_discovery)]
+    for p in patches:
+        p.start()
+
+    print(f"[loadtest] RTDS {test.rtds.url} | Gamma {test.gamma.url} | CLOB {test.clob.url} | "
+          f"LOG_DIR {os.environ['LOG_DIR']} | speed {clock.speed}x", flush=True)
+    bot_task = asyncio.create_task(bot.main.main())
+    lag_task = asyncio.create_task(test.probe_lag())
+    deadline = time.monotonic() + args.duration
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(args.report_every, max(0.0, deadline - time.monotonic())) * clock.speed)
+            if bot_task.done():
+                print(f"[loadtest] main() exited: {bot_task.exception()!r}", flush=True)
+                break
+            r = test.report(DB_PATH)
+            m = r["markets"]
+            print(
+                f"[loadtest] sim {r['sim_hours']}h | markets due {m['due']} logged {m['logged']} "
+                f"dropped {m['dropped']} undiscovered {m['undiscovered']} | "
+                f"lag p50 {r['loop_lag_ms']['p50']}ms p99 {r['loop_lag_ms']['p99']}ms max {r['loop_lag_ms']['max']}ms | "
+                f"rss {r['rss_mb']}MB | tasks {r['tasks']} | rtds sent {r['rtds']['sent']} "
+                f"disconnects {r['rtds']['disconnects']}",
+                flush=True,
+            )
+    finally:
+        final = test.report(DB_PATH)
+        bot_task.cancel()
+        lag_task.cancel()
+        await asyncio.gather(bot_task, lag_task, return_exceptions=True)
+        await test.stop_servers()
+        # main() leaves feeds and background loops running; stop them too
+        rest = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in rest:
+            t.cancel()
+        await asyncio.gather(*rest, return_exceptions=True)
+        for p in patches:
+            p.stop()
+
+    path = os.path.join(os.environ["LOG_DIR"], "loadtest_report.json")
+    with open(path, "w") as f:
+        json.dump(final, f, indent=2)
+    print(json.dumps(final, indent=2))
+    print(f"[loadtest] report written to {path}")
+    return final
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bot.loadtest", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=600, help="real seconds to run (default 600)")
+    parser.add_argument("--speed", type=float, default=30, help="clock acceleration factor (default 30)")
+    parser.add_argument("--rate", type=float, default=1, help="RTDS updates per second per symbol")
+    parser.add_argument("--symbols", type=int, default=1, help="symbols on the RTDS topic (only btc/usd is used)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="max source-timestamp lag per frame")
+    parser.add_argument("--reorder", type=float, default=0, help="probability a frame arrives out of order")
+    parser.add_argument("--duplicate", type=float, default=0, help="probability a frame is sent twice")
+    parser.add_argument("--disconnect-every", type=float, default=None, help="bot-time seconds between RTDS drops")
+    parser.add_argument("--outage-secs", type=float, default=0, help="bot-time seconds RTDS refuses after a drop")
+    parser.add_argument("--settle-delay", type=float, default=60, help="bot-time seconds before Gamma settles")
+    parser.add_argument("--gamma-error-rate", type=float, default=0, help="fraction of Gamma requests failing 503")
+    parser.add_argument("--telegram-rate-limit-every", type=int, default=0,
+                        help="answer every Nth Telegram request with 429 (0: never)")
+    parser.add_argument("--poll-interval", type=float, default=60, help="MARKET_POLL_INTERVAL in bot-time seconds")
+    parser.add_argument("--report-every", type=float, default=30, help="real seconds between progress lines")
+    parser.add_argument("--dashboard-port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--log-dir", help="LOG_DIR for the run (default: a fresh temp dir)")
+    parser.add_argument("--log-level", default="WARNING", help="bot log level during the run")
+    args = parser.parse_args()
+
+    # The bot reads its endpoints from the environment when bot.config is imported
+    ports = {name: _free_port() for name in ("rtds", "gamma", "clob", "telegram")}
+    os.environ.update({
+        "LOG_DIR": args.log_dir or tempfile.mkdtemp(prefix="polybot-loadtest-"),
+        "RTDS_WS_URL": f"ws://127.0.0.1:{ports['rtds']}",
+        "GAMMA_API_BASE": f"http://127.0.0.1:{ports['gamma']}",
+        "CLOB_WS_URL": f"ws://127.0.0.1:{ports['clob']}",
+        "TELEGRAM_API_BASE": f"http://127.0.0.1:{ports['telegram']}",  # never alert the real chat
+        "TELEGRAM_BOT_TOKEN": "loadtest",
+        "TELEGRAM_CHAT_ID": "1",
+        "MARKET_POLL_INTERVAL": str(args.poll_interval),
+        "PORT": str(args.dashboard_port),
+        "EXECUTION_MODE": "paper",
+        "FEED_PROCESS": "",  # a child process would run on the real clock
+    })
+    # Start a minute and a half before a boundary so the first market is caught from its open
+    now = time.time()
+    clock = AcceleratedClock(args.speed, (now // _WINDOW + 1) * _WINDOW - 90)
+    loop = AcceleratedLoop(clock)
+    asyncio.set_event_loop(loop)
+    try:
+        with mock.patch("time.time", clock.wall):
+            loop.run_until_complete(_drive(args, clock, ports))
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
-from datetime import datetime, timezone
+import logging
 
-from bot.db import upsert_market, get_recent_market_ids
+from bot.db import get_recent_market_ids
+from bot.events import events
+from bot.notifier import notify_entry
+
+logger = logging.getLogger(__name__)
 
 
 def load_logged_market_ids() -> set[str]:
@@ -9,33 +13,34 @@ def load_logged_market_ids() -> set[str]:
 
 
 def log_entry(entry: dict):
-    """Persist a market entry to SQLite and print a summary line."""
-    upsert_market(entry)
-    _print_summary(entry)
+    """Record a market's final entry (written to SQLite by bot.events), log a summary line and queue a Telegram alert."""
+    events.record_entry(entry)
+    _log_summary(entry)
+    notify_entry(entry)
 
 
-def _print_summary(entry: dict):
-    """Print a one-line summary to stdout (visible in Railway logs)."""
+def _log_summary(entry: dict):
+    """One summary line per market (visible in Railway logs); the key fields also go out as structured extras."""
     decision = entry.get("decision", "?")
     market_slug = entry.get("market_slug", "unknown")
-    beat = entry.get("beat_price", 0)
-    dist = entry.get("distance_at_decision", 0)
+    beat = entry.get("beat_price") or 0
+    dist = entry.get("distance_at_decision") or 0
+    extra = {"market_slug": market_slug, "decision": decision, "trace_id": entry.get("trace_id")}
 
     if decision == "SKIP":
         reason = entry.get("skip_reason", "")
-        print(f"[{_now_str()}] {market_slug} | Beat: ${beat:,.2f} | Dist: {dist:.0f} | SKIP ({reason})")
+        extra.update(beat_price=beat, distance=dist, skip_reason=reason)
+        logger.info("%s | Beat: $%.2f | Dist: %.0f | SKIP (%s)", market_slug, beat, dist, reason, extra=extra)
     elif decision == "ACTIVE":
         side = entry.get("would_buy", "?")
-        outcome = entry.get("actual_outcome", "?")
+        outcome = entry.get("actual_outcome") or entry.get("provisional_outcome") or "?"
         won = entry.get("would_have_won", None)
         result_str = "WIN" if won else ("LOSS" if won is False else "UNKNOWN")
-        print(
-            f"[{_now_str()}] {market_slug} | Beat: ${beat:,.2f} | Dist: {dist:.0f} | "
-            f"ACTIVE | Side: {side} | Outcome: {outcome} | {result_str}"
+        extra.update(beat_price=beat, distance=dist, side=side, outcome=outcome, result=result_str,
+                     outcome_source=entry.get("outcome_source"), outcome_confidence=entry.get("outcome_confidence"))
+        logger.info(
+            "%s | Beat: $%.2f | Dist: %.0f | ACTIVE | Side: %s | Outcome: %s | %s",
+            market_slug, beat, dist, side, outcome, result_str, extra=extra,
         )
     else:
-        print(f"[{_now_str()}] {market_slug} | {decision}")
-
-
-def _now_str() -> str:
-    return datetime.now(timezone.utc).strftime("%H:%M:%S UTC")
+        logger.info("%s | %s", market_slug, decision, extra=extra)
@@ -0,0 +1,163 @@
+"""
+Process-wide logging: records are queued on the calling thread and written to
+stdout by a QueueListener thread, so a slow or backed-up stdout never stalls
+the event loop.
+
+- LOG_FORMAT=json (default) writes one JSON object per line; extra= fields on
+  a record (market_slug, decision, ...) become top-level keys. LOG_FORMAT=text
+  keeps the classic "time [LEVEL] name: message" lines.
+- Repeats of the same message template (reconnect warnings and the like) are
+  limited to LOG_RATE_BURST per LOG_RATE_WINDOW seconds per logger and market;
+  errors are never limited. The next record let through carries the number
+  suppressed in between. Log with
+  %-style arguments, not f-strings, so the template is stable and formatting
+  is skipped when the level is disabled.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+
+from bot.config import LOG_FORMAT, LOG_LEVEL, LOG_RATE_BURST, LOG_RATE_WINDOW
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "suppressed"}
+
+_listener: logging.handlers.QueueListener | None = None
+_plain = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                out[key] = value
+        if getattr(record, "suppressed", 0):
+            out["suppressed"] = record.suppressed
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s [%(levelname)s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        return f"{line} (+{suppressed} similar suppressed)" if suppressed else line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message now (its args may change once we return) but leave the
+        # traceback in exc_text rather than folding it into msg like the stock prepare()
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _plain.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `burst` records per (logger, level, template, market) every `window`
+    seconds. Errors always pass. The market is the record's market_slug extra or, for the
+    "[%s] ..." per-market templates, their first argument, so one market's lines never
+    crowd out another's.
+    """
+
+    def __init__(self, burst: int = LOG_RATE_BURST, window: float = LOG_RATE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._seen: dict[tuple, list] = {}  # key -> [window_start, passed, suppressed]
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0 or record.levelno > logging.WARNING:
+            return True
+        key = (record.name, record.levelno, record.msg, _market_of(record))
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] >= self.window:
+            if len(self._seen) > 10_000:
+                self._seen.clear()  # unbounded templates (f-strings); start over rather than grow
+            suppressed = state[2] if state else 0
+            self._seen[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        self.suppressed_total += 1
+        return False
+
+
+def _market_of(record: logging.LogRecord) -> str | None:
+    market = getattr(record, "market_slug", None)
+    if market is None and isinstance(record.args, tuple) and record.args and str(record.msg).startswith("[%s]"):
+        market = record.args[0]
+    return market
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None,
+                  extra_fields: dict | None = None) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to a stdout writer thread. Idempotent:
+    a second call replaces the previous listener. extra_fields (e.g. {"process": "feed"})
+    are attached to every record.
+    """
+    global _listener
+    if _listener is None:
+        atexit.register(stop_logging)  # flush what is still queued on exit
+    else:
+        _listener.stop()
+
+    out = logging.StreamHandler(stream or sys.stdout)
+    out.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(q)
+    handler.addFilter(RateLimitFilter())
+    if extra_fields:
+        def add_fields(record: logging.LogRecord) -> bool:
+            record.__dict__.update(extra_fields)
+            return True
+        handler.addFilter(add_fields)
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(q, out, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Drain the queue and stop the writer thread; records logged afterwards are queued but never written."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,166 +1,320 @@
 import asyncio
+import atexit
+import importlib
 import logging
-import sys
+import time
 from datetime import datetime, timezone
 
-from dotenv import load_dotenv
+from bot.readiness import startup  # first: its clock is the startup timeline's zero
 
-from aiohttp import web
+from dotenv import load_dotenv
 
-from bot.config import DASHBOARD_PORT, LOG_DIR
-from bot.dashboard import create_dashboard_app
+from bot import tracing
+from bot.config import DASHBOARD_PORT, FEED_PROCESS, LOG_DIR, MARKET_POLL_INTERVAL, STARTUP_PRICE_TIMEOUT
+from bot.cpuprof import loop_lag_loop
 from bot.db import init_db
+from bot.events import events
+from bot.execution import OrderExecutor, create_executor
+from bot.leases import LeaseManager
 from bot.logger import load_logged_market_ids, log_entry
-from bot.market_discovery import discover_markets, fetch_market_outcome, poll_markets_loop
+from bot.logging_setup import setup_logging
+from bot.market_discovery import discover_markets, fetch_market_outcome, parse_token_ids, poll_markets_loop
+from bot.memprof import memory_sample_loop
+from bot.notifier import feed_health_loop, notifier
+from bot.orderbook import OrderBookFeed
 from bot.price_feed import ChainlinkPriceFeed
+from bot.records import Market
+from bot.settlement import reconciler
+from bot.shm_feed import SharedPriceFeed
 from bot.strategy import run_market
+from bot.tick_history import TickRecorder
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    stream=sys.stdout,
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
+async def _import(module: str):
+    """Import a heavy module (aiohttp, pyarrow) in a thread so the event loop keeps connecting meanwhile."""
+    return await asyncio.to_thread(importlib.import_module, module)
+
+
+async def _init_storage() -> set[str]:
+    await asyncio.to_thread(init_db)
+    logger.info("Database initialized")
+    return await asyncio.to_thread(load_logged_market_ids)
+
+
+async def _start_background_jobs() -> list[asyncio.Task]:
+    """Archiver and analytics snapshot, started once the DB exists."""
+    # Move old markets to Parquet and compact SQLite in the background
+    archive = await _import("bot.archive")
+    # Keep a read-optimized copy for datasette / reporting, off the writer's DB
+    snapshot = await _import("bot.snapshot")
+    return [asyncio.create_task(archive.archive_loop()), asyncio.create_task(snapshot.snapshot_loop())]
+
+
+async def _start_dashboard(price_feed, active_tasks, book_feed, executor):
+    dashboard = await _import("bot.dashboard")
+    try:
+        return await dashboard.start_dashboard(price_feed, active_tasks, DASHBOARD_PORT, book_feed, executor)
+    except OSError as e:
+        # Sharded workers on one host each need their own PORT
+        logger.error("Dashboard could not bind port %d (set PORT per worker when sharding): %s", DASHBOARD_PORT, e)
+        raise
+
+
 async def main():
     logger.info("=" * 60)
     logger.info("PolyBot Phase 1 — Read-Only Monitor starting")
-    logger.info(f"Log directory: {LOG_DIR}")
+    logger.info("Log directory: %s", LOG_DIR)
     logger.info("=" * 60)
 
-    # Initialize SQLite database
-    init_db()
-    logger.info("Database initialized")
-
-    # Load already-processed markets for restart dedupe
-    seen_ids = load_logged_market_ids()
-    if seen_ids:
-        logger.info(f"Loaded {len(seen_ids)} already-processed markets from today's log")
+    # Everything below starts at once; only market handling waits on what it needs.
 
-    # Start Chainlink price feed
-    price_feed = ChainlinkPriceFeed()
+    # Start Chainlink price feed, in-process or in its own process over shared memory
+    if FEED_PROCESS:
+        price_feed = SharedPriceFeed.spawn()
+        atexit.register(price_feed.close)
+        logger.info("Price feed running out of process (shm %s)", price_feed.name)
+    else:
+        price_feed = ChainlinkPriceFeed()
     asyncio.create_task(price_feed.run())
+    first_price = asyncio.create_task(
+        startup.track("first_price", price_feed.wait_for_price(STARTUP_PRICE_TIMEOUT)))
 
-    # Wait for first price
-    logger.info("Waiting for Chainlink BTC/USD price feed...")
-    for _ in range(30):
-        if price_feed.is_available:
-            break
-        await asyncio.sleep(1)
+    # Start CLOB order book feed (tokens are subscribed as markets are discovered)
+    book_feed = OrderBookFeed()
+    asyncio.create_task(book_feed.run())
 
-    if price_feed.is_available:
-        logger.info(f"Price feed connected. BTC/USD: ${price_feed.price:,.2f}")
-    else:
-        logger.warning("Price feed not available yet. Will retry during market monitoring.")
+    # SQLite setup and restart dedupe, off the event loop
+    storage = asyncio.create_task(startup.track("db", _init_storage()))
+
+    # Gamma prefetch: look up upcoming markets while the DB and feeds come up
+    prefetch = asyncio.create_task(startup.track("gamma_prefetch", discover_markets(set())))
+
+    # Order executor: connection is opened now so it is warm by the first decision
+    executor = create_executor()
+    executor_ready = asyncio.create_task(startup.track("executor", executor.start()))
 
     # Track active market tasks
     active_tasks: dict[str, asyncio.Task] = {}
 
     # Start web dashboard
-    dashboard_app = create_dashboard_app(price_feed, active_tasks)
-    runner = web.AppRunner(dashboard_app)
-    await runner.setup()
-    site = web.TCPSite(runner, "0.0.0.0", DASHBOARD_PORT)
-    await site.start()
-    logger.info(f"Dashboard running on http://0.0.0.0:{DASHBOARD_PORT}")
-
-    async def on_new_market(market: dict):
+    asyncio.create_task(startup.track("dashboard", _start_dashboard(price_feed, active_tasks, book_feed, executor)))
+
+    def on_first_price(t: asyncio.Task):
+        if not t.cancelled() and t.exception() is None and t.result():
+            logger.info("Price feed connected. BTC/USD: $%.2f", price_feed.price)
+        else:
+            logger.warning("Price feed not available yet. Will retry during market monitoring.")
+
+    first_price.add_done_callback(on_first_price)
+
+    # Load already-processed markets for restart dedupe
+    seen_ids = await storage
+    if seen_ids:
+        logger.info("Loaded %d already-processed markets from today's log", len(seen_ids))
+    # Market lifecycle events, written in batches off the event loop
+    asyncio.create_task(events.run())
+    atexit.register(events.flush)
+    # Event-loop lag probe (can trigger an automatic CPU profile)
+    asyncio.create_task(loop_lag_loop())
+    # Telegram alerts for this worker's results (no-op unless configured)
+    if notifier.enabled:
+        asyncio.create_task(notifier.run())
+        logger.info("Telegram notifications enabled")
+
+    # Market leases: with SHARDED=1 workers sharing the DB split markets between them
+    leases = LeaseManager()
+    asyncio.create_task(leases.heartbeat_loop())
+    if leases.enabled:
+        logger.info("Sharding enabled, worker %s", leases.worker_id)
+
+    async def start_database_jobs() -> list[asyncio.Task]:
+        """Jobs that must run once per database; with sharding only the elected leader runs them."""
+        jobs = await startup.track("background_jobs", _start_background_jobs())
+        if leases.enabled:
+            # Markets whose worker stopped before Gamma resolved them
+            jobs.append(asyncio.create_task(reconciler.adopt_loop(fetch_market_outcome)))
+        else:
+            # Markets logged provisionally before a restart still need Gamma's outcome
+            jobs.append(asyncio.create_task(reconciler.resume(fetch_market_outcome)))
+        # Persist ticks for /api/ticks history
+        jobs.append(asyncio.create_task(TickRecorder(price_feed).run()))
+        # Periodic memory samples (memory_samples table) so leaks show up as a trend
+        jobs.append(asyncio.create_task(memory_sample_loop(price_feed, book_feed, executor, active_tasks)))
+        if notifier.enabled:
+            jobs.append(asyncio.create_task(feed_health_loop(price_feed)))
+        return jobs
+
+    asyncio.create_task(leases.lead(start_database_jobs))
+
+    await executor_ready
+    logger.info("Order executor: %s", type(executor).__name__)
+
+    async def on_new_market(market: Market):
         """Called when a new BTC 15-min market is discovered."""
-        market_id = market["id"]
-        slug = market["slug"]
+        # Spans recorded here and in the strategy task nest under the market's trace
+        tracing.activate(tracing.root(market.trace_id))
+        launched = False
+        try:
+            launched = await start_market(market)
+        finally:
+            if not launched:
+                tracing.end_trace(market.trace_id)  # skipped before a strategy task took over
+
+    async def start_market(market: Market) -> bool:
+        """Claim the market, capture its beat price and launch the strategy task. False if skipped."""
+        market_id = market.id
+        slug = market.slug
 
         if market_id in active_tasks:
-            return
+            return False
+
+        if not leases.claim(slug, market_id):
+            # Held by another worker: forget it so a later poll can take over if that worker dies
+            seen_ids.discard(market_id)
+            seen_ids.discard(slug)
+            return False
+        events.record(market_id, "discovered", market_slug=slug, start_time=market.start_time.isoformat(),
+                      end_time=market.end_time.isoformat(), trace_id=market.trace_id)
+
+        # Right after boot the first price may still be on its way
+        if not price_feed.is_available:
+            with tracing.span("wait_first_price"):
+                await price_feed.wait_for_price(STARTUP_PRICE_TIMEOUT)
 
         # Capture beat_price from Chainlink at market start
         # If the market has already started, capture current price
         now = datetime.now(timezone.utc)
-        start_time = market["start_time"]
+        start_time = market.start_time
 
-        if market["beat_price"] is None:
+        if market.beat_price is None:
             if price_feed.is_available:
                 if now >= start_time:
                     # Market already started — use current Chainlink price as approximate beat_price
                     # This is imprecise for markets we discover mid-session
-                    market["beat_price"] = price_feed.price
-                    if market["beat_price"] is None:
-                        logger.warning(f"[{slug}] No Chainlink price available. Logging as SKIP.")
+                    market.beat_price = price_feed.price
+                    tracing.start_span("beat_capture", late_secs=round((now - start_time).total_seconds(), 3)).end()
+                    if market.beat_price is None:
+                        logger.warning("[%s] No Chainlink price available. Logging as SKIP.", slug)
                         log_entry({
                             "market_id": market_id,
                             "market_slug": slug,
-                            "end_time": market["end_time"].isoformat(),
+                            "end_time": market.end_time.isoformat(),
                             "decision": "SKIP",
                             "skip_reason": "chainlink_unavailable_at_open",
+                            "trace_id": market.trace_id,
                         })
-                        return
+                        leases.finish(slug)
+                        return False
                     logger.warning(
-                        f"[{slug}] Market already started. Using current price "
-                        f"${market['beat_price']:,.2f} as approximate beat_price"
+                        "[%s] Market already started. Using current price $%.2f as approximate beat_price",
+                        slug, market.beat_price,
                     )
                 else:
                     # Capture prices at T-1s, T+0 (beat_price), T+1s
+                    beat = tracing.start_span("beat_capture")
                     wait_secs = (start_time - now).total_seconds()
                     if wait_secs > 1:
                         await asyncio.sleep(wait_secs - 1)
-                    market["price_before_beat"] = price_feed.price
+                    market.price_before_beat = price_feed.price
+                    read_at = [time.time()]
                     await asyncio.sleep(1)
-                    market["beat_price"] = price_feed.price
+                    market.beat_price = price_feed.price
+                    read_at.append(time.time())
                     await asyncio.sleep(1)
-                    market["price_after_beat"] = price_feed.price
-                    if None in (market["price_before_beat"], market["beat_price"], market["price_after_beat"]):
-                        logger.warning(f"[{slug}] Price feed died during beat capture. Logging as SKIP.")
+                    market.price_after_beat = price_feed.price
+                    read_at.append(time.time())
+                    # How far each read landed from its target second
+                    start_ts = start_time.timestamp()
+                    beat.end(jitter_ms=[round((t - start_ts - k) * 1000, 1) for k, t in zip((-1, 0, 1), read_at)])
+                    if None in (market.price_before_beat, market.beat_price, market.price_after_beat):
+                        logger.warning("[%s] Price feed died during beat capture. Logging as SKIP.", slug)
                         log_entry({
                             "market_id": market_id,
                             "market_slug": slug,
-                            "end_time": market["end_time"].isoformat(),
+                            "end_time": market.end_time.isoformat(),
                             "decision": "SKIP",
                             "skip_reason": "chainlink_lost_during_beat_capture",
+                            "trace_id": market.trace_id,
                         })
-                        return
+                        leases.finish(slug)
+                        return False
                     logger.info(
-                        f"[{slug}] Beat: ${market['beat_price']:,.2f} "
-                        f"(T-1: ${market['price_before_beat']:,.2f}, "
-                        f"T+1: ${market['price_after_beat']:,.2f})"
+                        "[%s] Beat: $%.2f (T-1: $%.2f, T+1: $%.2f)",
+                        slug, market.beat_price, market.price_before_beat, market.price_after_beat,
                     )
             else:
-                logger.warning(f"[{slug}] No Chainlink price available. Logging as SKIP.")
+                logger.warning("[%s] No Chainlink price available. Logging as SKIP.", slug)
                 log_entry({
                     "market_id": market_id,
                     "market_slug": slug,
-                    "end_time": market["end_time"].isoformat(),
+                    "end_time": market.end_time.isoformat(),
                     "decision": "SKIP",
                     "skip_reason": "chainlink_unavailable_at_open",
+                    "trace_id": market.trace_id,
                 })
-                return
+                leases.finish(slug)
+                return False
+
+        events.record(market_id, "beat", beat_price=market.beat_price,
+                      price_before_beat=market.price_before_beat, price_after_beat=market.price_after_beat)
+
+        if not leases.holds(slug):
+            return False  # lease lost while capturing the beat price
+
+        # Stream both outcome books so a snapshot is ready at decision time
+        token_ids = list(parse_token_ids(market).values())
+        await book_feed.subscribe(token_ids)
 
         # Launch market strategy as a concurrent task
         task = asyncio.create_task(
-            _run_market_safe(market, price_feed)
+            _run_market_safe(market, price_feed, book_feed, executor)
         )
         active_tasks[market_id] = task
+        leases.attach(slug, task)
 
         def cleanup(t, mid=market_id):
             active_tasks.pop(mid, None)
+            asyncio.create_task(book_feed.unsubscribe(token_ids))
+            # A cancelled run (shutdown or lost lease) leaves the market to another worker
+            leases.finish(slug, done=not t.cancelled())
+            tracing.end_trace(market.trace_id, cancelled=t.cancelled())
 
         task.add_done_callback(cleanup)
+        return True
+
+    # Hand prefetched markets over, then poll as usual
+    try:
+        prefetched = await prefetch
+    except Exception as e:
+        logger.warning("Gamma prefetch failed: %s", e)
+        prefetched = []
+    for market in prefetched:
+        if market.id in seen_ids or market.slug in seen_ids:
+            tracing.end_trace(market.trace_id, skipped="already_logged")
+            continue
+        seen_ids.update((market.id, market.slug))
+        asyncio.create_task(on_new_market(market))
 
     # Start market discovery loop
     logger.info("Starting market discovery loop...")
-    await poll_markets_loop(seen_ids, on_new_market)
+    await poll_markets_loop(seen_ids, on_new_market, first_delay=MARKET_POLL_INTERVAL)
 
 
-async def _run_market_safe(market: dict, price_feed: ChainlinkPriceFeed):
-    """Wrapper to catch and log errors from market strategy."""
+async def _run_market_safe(market: Market, price_feed: ChainlinkPriceFeed | SharedPriceFeed, book_feed: OrderBookFeed,
+                           executor: OrderExecutor):
+    """
+    Wrapper to catch and log errors from market strategy. Cancellation propagates so the
+    done callback sees task.cancelled() and releases the lease instead of finishing it.
+    """
     try:
-        await run_market(market, price_feed, fetch_market_outcome)
-    except asyncio.CancelledError:
-        pass
+        await run_market(market, price_feed, fetch_market_outcome, book_feed, executor)
     except Exception as e:
-        logger.error(f"[{market.get('slug', '?')}] Strategy error: {e}", exc_info=True)
+        logger.error("[%s] Strategy error: %s", market.slug, e, exc_info=True)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,30 @@
 import asyncio
 import json
 import logging
+import re
 import ssl
+import time
+from collections.abc import AsyncIterator
+from dataclasses import replace
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 
-import httpx
-
-from bot.config import GAMMA_API_BASE, MARKET_POLL_INTERVAL
+from bot.config import (
+    DISCOVERY_HORIZON_SECS,
+    DISCOVERY_MAX_PAGES,
+    DISCOVERY_MODE,
+    DISCOVERY_PAGE_SIZE,
+    DISCOVERY_SERIES,
+    DISCOVERY_TAG,
+    GAMMA_API_BASE,
+    GAMMA_EVENT_TTL,
+    GAMMA_MARKET_TTL,
+    GAMMA_NEGATIVE_TTL,
+    MARKET_POLL_INTERVAL,
+)
+from bot import tracing
+from bot.gamma_cache import cache
+from bot.records import Market
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +32,13 @@ logger = logging.getLogger(__name__)
 # Railway's environment has proper certs
 SSL_VERIFY = False
 
+# Markets stay in the Gamma cache's index this long after they end
+_INDEX_RETENTION_SECS = 86400
+
+_SERIES_PREFIXES = tuple(f"{series}-" for series in DISCOVERY_SERIES)
+_SLUG_WINDOW = re.compile(r"-(\d+)([mhd])-(\d+)$")
+_UNIT_SECS = {"m": 60, "h": 3600, "d": 86400}
+
 
 def _next_market_times(now: datetime | None = None) -> list[tuple[datetime, datetime, str]]:
     """
@@ -40,121 +65,284 @@ def _next_market_times(now: datetime | None = None) -> list[tuple[datetime, date
     return results
 
 
-async def discover_markets(seen_ids: set[str]) -> list[dict]:
+async def discover_markets(seen_ids: set[str]) -> list[Market]:
     """
-    Discover active BTC 15-min markets by predicting slugs and checking Gamma API.
+    Discover active markets not in seen_ids, either by probing predicted slugs or,
+    with DISCOVERY_MODE=bulk, by paging through Gamma's active events.
     """
-    candidates = _next_market_times()
+    if DISCOVERY_MODE == "bulk":
+        new_markets = await _discover_bulk(seen_ids)
+    else:
+        new_markets = await _discover_slugs(seen_ids)
+
+    for market in new_markets:
+        # The market's trace starts at discovery; how late we are relative to the
+        # listing and how early relative to the open are the first things it records
+        market.trace_id = tracing.new_trace_id()
+        now = time.time()
+        tracing.start_trace(
+            market.trace_id, "market", start=now, market_id=market.id, slug=market.slug,
+            secs_before_start=round(market.start_time.timestamp() - now, 3),
+            listing_lag_secs=round(now - market.created_at.timestamp(), 3) if market.created_at else None,
+        )
+        seen_ids.add(market.id)
+        seen_ids.add(market.slug)  # Also track by slug to avoid re-fetching
+        logger.info(
+            "Discovered: %s | %s-%s UTC | accepting=%s",
+            market.slug, market.start_time.strftime("%H:%M"), market.end_time.strftime("%H:%M"),
+            market.accepting_orders, extra={"market_slug": market.slug},
+        )
+
+    return new_markets
+
+
+async def _discover_slugs(seen_ids: set[str]) -> list[Market]:
+    """
+    Predict the next BTC 15-min slugs and look each one up on Gamma.
+    Slugs already indexed by the Gamma cache need no request.
+    """
+    import httpx  # deferred: keeps the import off the startup path
+
     new_markets = []
+    pending = []
+    for start_time, end_time, slug in _next_market_times():
+        if slug in seen_ids:
+            continue
+        known = cache.market(slug)
+        if known is None:
+            pending.append((start_time, end_time, slug))
+        elif known.id not in seen_ids:
+            new_markets.append(replace(known))
 
-    async with httpx.AsyncClient(timeout=10, verify=SSL_VERIFY) as client:
-        for start_time, end_time, slug in candidates:
-            if slug in seen_ids:
-                continue
+    if pending:
+        async with httpx.AsyncClient(timeout=10, verify=SSL_VERIFY) as client:
+            for start_time, end_time, slug in pending:
+                # A slug that is not listed yet is asked again after the negative TTL,
+                # but no later than its start
+                not_found_ttl = min(GAMMA_NEGATIVE_TTL, max(0.0, start_time.timestamp() - time.time()))
+                try:
+                    events = await cache.get_json(client, "/events", {"slug": slug},
+                                                  ttl=GAMMA_EVENT_TTL, negative_ttl=not_found_ttl)
+                    market = _parse_event(events[0], slug, start_time, end_time) if events else None
+                    if market is None or market.id in seen_ids:
+                        continue
+                    cache.remember(market)
+                    new_markets.append(replace(market))
+                except httpx.HTTPStatusError as e:
+                    logger.debug("No market at %s: %s", slug, e.response.status_code)
+                except Exception as e:
+                    logger.warning("Error checking %s: %s", slug, e)
 
+    return new_markets
+
+
+async def _discover_bulk(seen_ids: set[str]) -> list[Market]:
+    """
+    Page through Gamma's active events starting within DISCOVERY_HORIZON_SECS and keep
+    those of the DISCOVERY_SERIES. Each page is parsed event by event as it streams in,
+    and events already in the index are not parsed again, so a poll is usually one request.
+    """
+    import httpx
+
+    now = time.time()
+    params = {
+        "active": "true",
+        "closed": "false",
+        "end_date_min": _iso(now),
+        "start_date_max": _iso(now + DISCOVERY_HORIZON_SECS),
+        "order": "startDate",
+        "ascending": "true",
+        "limit": DISCOVERY_PAGE_SIZE,
+    }
+    if DISCOVERY_TAG:
+        params["tag_slug"] = DISCOVERY_TAG
+
+    new_markets = []
+    async with httpx.AsyncClient(timeout=10, verify=SSL_VERIFY) as client:
+        for page in range(DISCOVERY_MAX_PAGES):
+            params["offset"] = page * DISCOVERY_PAGE_SIZE
+            events = 0
             try:
-                resp = await client.get(
-                    f"{GAMMA_API_BASE}/events",
-                    params={"slug": slug},
-                )
-                resp.raise_for_status()
-                events = resp.json()
-
-                if not events:
-                    continue
-
-                event = events[0]
-                markets = event.get("markets", [])
-                if not markets:
-                    continue
-
-                market = markets[0]
-                market_id = market.get("id")
-                if not market_id or market_id in seen_ids:
-                    continue
-
-                # Validate outcomes
-                outcomes = market.get("outcomes", "")
-                if '"Up"' not in outcomes or '"Down"' not in outcomes:
-                    continue
-
-                # Parse actual times from API
-                event_start = _parse_dt(market.get("eventStartTime"))
-                end_date = _parse_dt(market.get("endDate"))
-
-                normalized = {
-                    "id": market_id,
-                    "condition_id": market.get("conditionId", ""),
-                    "slug": slug,
-                    "title": market.get("question", event.get("title", "")),
-                    "start_time": event_start or start_time,
-                    "end_time": end_date or end_time,
-                    "beat_price": None,  # Captured from Chainlink at event start
-                    "outcomes": outcomes,
-                    "clob_token_ids": market.get("clobTokenIds", ""),
-                    "accepting_orders": market.get("acceptingOrders", False),
-                    "closed": market.get("closed", False),
-                }
-                new_markets.append(normalized)
-                seen_ids.add(market_id)
-                seen_ids.add(slug)  # Also track by slug to avoid re-fetching
-                logger.info(
-                    f"Discovered: {slug} | "
-                    f"{(event_start or start_time).strftime('%H:%M')}-"
-                    f"{(end_date or end_time).strftime('%H:%M')} UTC | "
-                    f"accepting={market.get('acceptingOrders')}"
-                )
-
-            except httpx.HTTPStatusError as e:
-                logger.debug(f"No market at {slug}: {e.response.status_code}")
+                cache.stats["bulk_pages"] += 1
+                async with client.stream("GET", f"{GAMMA_API_BASE}/events", params=params) as resp:
+                    resp.raise_for_status()
+                    async for event in _iter_json_array(resp.aiter_text()):
+                        events += 1
+                        market = _index_event(event)
+                        if market is not None and market.id not in seen_ids and market.slug not in seen_ids:
+                            new_markets.append(replace(market))
             except Exception as e:
-                logger.warning(f"Error checking {slug}: {e}")
+                cache.stats["errors"] += 1
+                logger.warning("Bulk discovery failed on page %d: %s", page, e)
+                break
+            if events < DISCOVERY_PAGE_SIZE:
+                break
 
     return new_markets
 
 
+def _index_event(event: dict) -> Market | None:
+    """The indexed market of a bulk-listed event if it belongs to one of DISCOVERY_SERIES."""
+    slug = event.get("slug") or ""
+    if not slug.startswith(_SERIES_PREFIXES):
+        return None
+    known = cache.market(slug)
+    if known is not None:
+        return known
+    window = _slug_window(slug)
+    if window is None:
+        return None
+    market = _parse_event(event, slug, *window)
+    if market is not None:
+        cache.remember(market)
+    return market
+
+
+def _slug_window(slug: str) -> tuple[datetime, datetime] | None:
+    """(start, end) encoded in a series slug such as btc-updown-15m-1767225600."""
+    match = _SLUG_WINDOW.search(slug)
+    if match is None:
+        return None
+    length, unit, start = match.groups()
+    start_time = datetime.fromtimestamp(int(start), timezone.utc)
+    return start_time, start_time + timedelta(seconds=int(length) * _UNIT_SECS[unit])
+
+
+async def _iter_json_array(chunks: AsyncIterator[str]) -> AsyncIterator:
+    """Yield the elements of a top-level JSON array as soon as each one has fully arrived."""
+    decoder = json.JSONDecoder()
+    buf, pos, opened = "", 0, False
+    async for chunk in chunks:
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                break
+            if not opened:
+                if buf[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                opened = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element still incomplete: wait for the next chunk
+            if end == len(buf) and not isinstance(value, (dict, list)):
+                break  # a number may continue in the next chunk
+            yield value
+            pos = end
+    raise ValueError("truncated JSON array")
+
+
+def _parse_event(event: dict, slug: str, start_time: datetime, end_time: datetime) -> Market | None:
+    """The Up/Down market of a Gamma event, or None if the event has no such market."""
+    markets = event.get("markets", [])
+    if not markets:
+        return None
+
+    market = markets[0]
+    market_id = market.get("id")
+    if not market_id:
+        return None
+
+    # Validate outcomes
+    outcomes = market.get("outcomes", "")
+    if '"Up"' not in outcomes or '"Down"' not in outcomes:
+        return None
+
+    # Parse actual times from API
+    return Market(
+        id=market_id,
+        slug=slug,
+        start_time=_parse_dt(market.get("eventStartTime")) or start_time,
+        end_time=_parse_dt(market.get("endDate")) or end_time,
+        condition_id=market.get("conditionId", ""),
+        title=market.get("question", event.get("title", "")),
+        outcomes=outcomes,
+        clob_token_ids=market.get("clobTokenIds", ""),
+        accepting_orders=market.get("acceptingOrders", False),
+        closed=market.get("closed", False),
+        created_at=_parse_dt(market.get("createdAt")),
+    )
+
+
 async def fetch_market_outcome(market_id: str) -> str | None:
     """
     Check if a market has resolved. Returns 'Up', 'Down', or None if not yet resolved.
     """
+    import httpx
+
+    resolved = cache.outcome(market_id)
+    if resolved is not None:
+        return resolved
+
     try:
         async with httpx.AsyncClient(timeout=10, verify=SSL_VERIFY) as client:
-            resp = await client.get(f"{GAMMA_API_BASE}/markets/{market_id}")
-            resp.raise_for_status()
-            market = resp.json()
+            market = await cache.get_json(client, f"/markets/{market_id}", ttl=GAMMA_MARKET_TTL)
 
-            if not market.get("closed", False):
-                return None
+        if not market or not market.get("closed", False):
+            return None
 
-            # Check outcome prices — winning side price goes to ~1.0
-            prices_str = market.get("outcomePrices", "[]")
-            try:
-                prices = json.loads(prices_str)
-                if len(prices) >= 2:
-                    up_price = float(prices[0])
-                    down_price = float(prices[1])
-                    if up_price > 0.9:
-                        return "Up"
-                    elif down_price > 0.9:
-                        return "Down"
-            except (ValueError, IndexError):
-                pass
+        # Check outcome prices — winning side price goes to ~1.0
+        prices_str = market.get("outcomePrices", "[]")
+        try:
+            prices = json.loads(prices_str)
+            if len(prices) >= 2:
+                up_price = float(prices[0])
+                down_price = float(prices[1])
+                if up_price > 0.9:
+                    cache.set_outcome(market_id, "Up")
+                    return "Up"
+                elif down_price > 0.9:
+                    cache.set_outcome(market_id, "Down")
+                    return "Down"
+        except (ValueError, IndexError):
+            pass
 
-            return None
+        return None
     except Exception as e:
-        logger.warning(f"Error fetching outcome for market {market_id}: {e}")
+        logger.warning("Error fetching outcome for market %s: %s", market_id, e)
         return None
 
 
-async def poll_markets_loop(seen_ids: set[str], on_new_market):
+async def poll_markets_loop(seen_ids: set[str], on_new_market, first_delay: float = 0):
     """Continuously poll for new markets and call on_new_market for each."""
+    await asyncio.sleep(first_delay)
     while True:
         new_markets = await discover_markets(seen_ids)
+        cache.prune(time.time() - _INDEX_RETENTION_SECS)
         for market in new_markets:
             asyncio.create_task(on_new_market(market))
         await asyncio.sleep(MARKET_POLL_INTERVAL)
 
 
+def parse_token_ids(market: Market) -> dict[str, str]:
+    """
+    Map outcome name to CLOB token id, e.g. {"Up": "123...", "Down": "456..."}.
+    Gamma returns both `outcomes` and `clobTokenIds` as JSON-encoded strings in the same order.
+    """
+    return dict(_token_pairs(market.outcomes, market.clob_token_ids))
+
+
+@lru_cache(maxsize=256)
+def _token_pairs(outcomes: str, clob_token_ids: str) -> tuple[tuple[str, str], ...]:
+    try:
+        names = json.loads(outcomes or "[]")
+        token_ids = json.loads(clob_token_ids or "[]")
+    except (ValueError, TypeError):
+        return ()
+    return tuple((str(o), str(t)) for o, t in zip(names, token_ids))
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 def _parse_dt(val) -> datetime | None:
     if not val:
         return None
@@ -0,0 +1,216 @@
+"""
+Memory accounting for a long-running bot.
+
+- tracemalloc snapshots: top allocation sites and the diff since the previous
+  snapshot (started at boot with TRACEMALLOC_FRAMES > 0, or on demand)
+- per-subsystem object counts (feeds, order books, executor, tasks)
+- per-market footprint of every in-flight run_market
+- a periodic sampler writing to memory_samples, so leaks show up as trends
+"""
+
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from bot.config import MEMORY_SAMPLE_INTERVAL, TRACEMALLOC_FRAMES
+from bot.db import insert_memory_sample
+from bot.records import Market
+
+logger = logging.getLogger(__name__)
+
+# market_id -> objects a running market holds on to (Market record, tracked samples)
+_markets: dict[str, dict] = {}
+
+# Previous snapshot for diffs, and when it was taken
+_baseline: tracemalloc.Snapshot | None = None
+_baseline_at: float | None = None
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def rss_mb() -> float | None:
+    """Current resident set size (Linux), or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6, 1)
+    except (OSError, ValueError):
+        return None
+
+
+# ── Per-market accounting ───────────────────────────────────────────────────
+
+@contextmanager
+def market_scope(market: Market):
+    """Account for a market while its strategy task runs."""
+    market_id = market.id
+    _markets[market_id] = {"market": market}
+    try:
+        yield
+    finally:
+        _markets.pop(market_id, None)
+
+
+def hold(market_id: str, name: str, obj):
+    """Attach an object (e.g. the tracking samples list) to a market's footprint."""
+    held = _markets.get(market_id)
+    if held is not None:
+        held[name] = obj
+
+
+def _deep_size(obj, seen: set[int]) -> int:
+    """sys.getsizeof over containers, counting each object once."""
+    size = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        elif hasattr(o, "__slots__") and not isinstance(o, type):
+            stack.extend(getattr(o, name) for name in o.__slots__ if hasattr(o, name))
+    return size
+
+
+def market_footprints() -> list[dict]:
+    """Approximate bytes held by each in-flight market, largest first."""
+    out = []
+    for market_id, held in list(_markets.items()):
+        seen: set[int] = set()
+        sizes = {name: _deep_size(obj, seen) for name, obj in held.items()}
+        out.append({
+            "market_id": market_id,
+            "slug": held["market"].slug,
+            "bytes": sum(sizes.values()),
+            "parts": sizes,
+            "samples": len(held.get("samples", ())),
+        })
+    out.sort(key=lambda m: m["bytes"], reverse=True)
+    return out
+
+
+# ── Subsystems ──────────────────────────────────────────────────────────────
+
+def subsystem_counts(price_feed=None, book_feed=None, executor=None, active_tasks: dict | None = None) -> dict:
+    """Object counts reported by each subsystem's memory_stats()."""
+    counts = {}
+    for name, obj in (("price_feed", price_feed), ("order_books", book_feed), ("executor", executor)):
+        stats = getattr(obj, "memory_stats", None)
+        if stats is not None:
+            counts[name] = stats()
+    counts["markets"] = {
+        "active_tasks": len(active_tasks) if active_tasks is not None else None,
+        "tracked": len(_markets),
+    }
+    try:
+        counts["asyncio_tasks"] = len(asyncio.all_tasks())
+    except RuntimeError:
+        counts["asyncio_tasks"] = None  # no running loop
+    return counts
+
+
+def object_types(limit: int = 20) -> list[dict]:
+    """Most common live object types tracked by the GC."""
+    types = Counter(type(o).__name__ for o in gc.get_objects())
+    return [{"type": name, "count": count} for name, count in types.most_common(limit)]
+
+
+# ── tracemalloc ─────────────────────────────────────────────────────────────
+
+def start_tracing(frames: int = TRACEMALLOC_FRAMES or 1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.info("tracemalloc started (%d frame(s))", frames)
+
+
+def stop_tracing():
+    global _baseline, _baseline_at
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("tracemalloc stopped")
+    _baseline = _baseline_at = None
+
+
+def _stat(stat) -> dict:
+    entry = {
+        "site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        "kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["kb_diff"] = round(stat.size_diff / 1024, 1)
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+def snapshot_report(top: int = 20, key_type: str = "lineno", reset: bool = False) -> dict:
+    """
+    Top allocation sites now, and the biggest changes since the previous call.
+    Each call becomes the baseline for the next; reset=True only re-baselines.
+    """
+    global _baseline, _baseline_at
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+    report = {
+        "tracing": True,
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_mb": round(current / 1e6, 2),
+        "peak_mb": round(peak / 1e6, 2),
+        "overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 1e6, 2),
+    }
+    if not reset:
+        report["top"] = [_stat(s) for s in snapshot.statistics(key_type)[:top]]
+        if _baseline is not None:
+            report["diff_since_secs"] = round(time.time() - _baseline_at, 1)
+            report["diff"] = [_stat(s) for s in snapshot.compare_to(_baseline, key_type)[:top]]
+    _baseline, _baseline_at = snapshot, time.time()
+    return report
+
+
+# ── Periodic sampling ───────────────────────────────────────────────────────
+
+def take_sample(price_feed=None, book_feed=None, executor=None, active_tasks: dict | None = None) -> dict:
+    traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+    markets = market_footprints()
+    return {
+        "ts": time.time(),
+        "rss_mb": rss_mb(),
+        "traced_mb": round(traced[0] / 1e6, 2) if traced else None,
+        "traced_peak_mb": round(traced[1] / 1e6, 2) if traced else None,
+        "gc_objects": len(gc.get_objects()),
+        "market_bytes": sum(m["bytes"] for m in markets),
+        "subsystems": json.dumps(subsystem_counts(price_feed, book_feed, executor, active_tasks)),
+    }
+
+
+async def memory_sample_loop(price_feed=None, book_feed=None, executor=None, active_tasks: dict | None = None,
+                             interval: float = MEMORY_SAMPLE_INTERVAL):
+    """Write one memory_samples row every interval seconds."""
+    if TRACEMALLOC_FRAMES > 0:
+        start_tracing(TRACEMALLOC_FRAMES)
+    while True:
+        try:
+            sample = take_sample(price_feed, book_feed, executor, active_tasks)
+            await asyncio.to_thread(insert_memory_sample, sample)
+        except Exception as e:
+            logger.error("Memory sample failed: %s", e)
+        await asyncio.sleep(interval)
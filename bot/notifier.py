@@ -0,0 +1,170 @@
+"""
+Telegram alerts, sent from a background task so nothing on the strategy path waits on HTTP.
+
+notify() only appends to a bounded queue (when it is full the notification is
+dropped and counted). The sender takes everything that arrives within
+TELEGRAM_DIGEST_SECS of the first item, plus whatever piled up while the
+previous send was in flight or rate limited, and sends it as one message. A 429
+waits the retry_after Telegram asks for. Network errors and 5xx back off
+exponentially. A message that still fails after TELEGRAM_MAX_RETRIES is dropped
+and counted.
+
+Sources: ACTIVE market results (via log_entry), settlement mismatches (bot.settlement)
+and price-feed health transitions (feed_health_loop). Disabled unless TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID are
+set; TELEGRAM_API_BASE points it at bot/fakes/telegram.py for local testing.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from bot.config import (
+    FEED_HEALTH_INTERVAL,
+    TELEGRAM_API_BASE,
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_DIGEST_SECS,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_MIN_INTERVAL,
+    TELEGRAM_QUEUE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAX_TEXT = 4096  # Telegram's message length limit
+
+
+class TelegramNotifier:
+    def __init__(self, token: str = TELEGRAM_BOT_TOKEN, chat_id: str = TELEGRAM_CHAT_ID,
+                 api_base: str = TELEGRAM_API_BASE, queue_size: int = TELEGRAM_QUEUE_SIZE,
+                 digest_secs: float = TELEGRAM_DIGEST_SECS, min_interval: float = TELEGRAM_MIN_INTERVAL,
+                 max_retries: int = TELEGRAM_MAX_RETRIES):
+        self.enabled = bool(token and chat_id)
+        self._url = f"{api_base}/bot{token}/sendMessage"
+        self._chat_id = chat_id
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.digest_secs = digest_secs
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.stats: Counter[str] = Counter()
+
+    def notify(self, text: str):
+        """Queue a notification without blocking. Call from the event loop thread."""
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait(text)
+            self.stats["queued"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped_queue_full"] += 1
+
+    async def run(self):
+        import httpx  # deferred: keeps the import off the startup path
+
+        async with httpx.AsyncClient(timeout=10) as client:
+            while True:
+                batch = [await self._queue.get()]
+                await asyncio.sleep(self.digest_secs)  # let a burst gather
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                await self._send(client, render(batch), len(batch))
+                await asyncio.sleep(self.min_interval)
+
+    async def _send(self, client, text: str, events: int):
+        import httpx
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+            try:
+                resp = await client.post(self._url, json={
+                    "chat_id": self._chat_id, "text": text, "disable_web_page_preview": True,
+                })
+                if resp.status_code == 429:
+                    self.stats["rate_limited"] += 1
+                    await asyncio.sleep(_retry_after(resp))
+                    continue
+                if 400 <= resp.status_code < 500:
+                    # Bad token / chat id / text: retrying won't help
+                    logger.warning("Telegram rejected a message: HTTP %d", resp.status_code)
+                    break
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                # Not str(e): the request URL carries the bot token
+                logger.debug("Telegram send failed (attempt %d): %s", attempt + 1, type(e).__name__)
+                await asyncio.sleep(min(30, 2 ** attempt))
+                continue
+            self.stats["sent"] += 1
+            self.stats["events_sent"] += events
+            if events > 1:
+                self.stats["digests"] += 1
+            return
+        self.stats["dropped_send_failed"] += events
+        logger.warning("Dropped %d Telegram notification(s) after %d attempts", events, attempt + 1)
+
+    def summary(self) -> dict:
+        return {"enabled": self.enabled, "pending": self._queue.qsize(), **self.stats}
+
+
+def _retry_after(resp) -> float:
+    try:
+        return float(resp.json().get("parameters", {}).get("retry_after", 1))
+    except (ValueError, AttributeError):
+        return 1.0
+
+
+def render(batch: list[str]) -> str:
+    """One notification as-is, several as a digest, cut to Telegram's length limit."""
+    if len(batch) == 1:
+        return batch[0][:_MAX_TEXT]
+    lines = [f"{len(batch)} updates"]
+    size = len(lines[0])
+    for i, text in enumerate(batch):
+        line = "• " + text.replace("\n", " ")
+        if size + len(line) + 1 > _MAX_TEXT - 20:
+            lines.append(f"… (+{len(batch) - i} more)")
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+# ── Sources ─────────────────────────────────────────────────────────────────
+
+def notify_entry(entry: dict):
+    """Alert on an ACTIVE market's result; SKIPs are routine and not sent."""
+    if entry.get("decision") != "ACTIVE":
+        return
+    won = entry.get("would_have_won")
+    result = "WIN" if won else ("LOSS" if won is False else "UNKNOWN")
+    beat = entry.get("beat_price") or 0
+    dist = entry.get("distance_at_decision") or 0
+    outcome = entry.get("actual_outcome")
+    if outcome is None and entry.get("provisional_outcome"):
+        # Read off our own feed; Gamma's resolution follows (mismatches are alerted separately)
+        low = ", low confidence" if entry.get("outcome_confidence") == "low" else ""
+        outcome = f"{entry['provisional_outcome']} (provisional{low})"
+    notifier.notify(
+        f"{result} {entry.get('market_slug')}: bought {entry.get('would_buy')}, "
+        f"outcome {outcome or '?'} | beat ${beat:,.2f} dist ${dist:.0f}"
+    )
+
+
+async def feed_health_loop(price_feed, interval: float = FEED_HEALTH_INTERVAL):
+    """Alert when the price feed goes stale and again when it recovers."""
+    down_since = None
+    while True:
+        await asyncio.sleep(interval)
+        if price_feed.price is None:
+            continue  # still starting up
+        if not price_feed.is_available and down_since is None:
+            down_since = time.time()
+            notifier.notify(f"Price feed stale: no tick for {price_feed.last_update_age:.0f}s")
+        elif price_feed.is_available and down_since is not None:
+            notifier.notify(f"Price feed recovered after {time.time() - down_since:.0f}s")
+            down_since = None
+
+
+# Process-wide notifier; disabled when Telegram is not configured
+notifier = TelegramNotifier()
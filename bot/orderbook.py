@@ -0,0 +1,306 @@
+"""
+Polymarket CLOB market-channel client.
+Maintains an incremental L2 order book per CLOB token from the market WebSocket.
+"""
+
+import asyncio
+import json
+import ssl
+import time
+import logging
+from bisect import bisect_left, insort
+from collections import deque
+
+import websockets
+
+from bot.config import CLOB_WS_URL, BOOK_SNAPSHOT_DEPTH, BOOK_SNAPSHOT_TRADE_SECS, BOOK_TRADE_BUFFER
+
+# SSL context for local dev (macOS cert issues)
+_ssl_ctx = ssl.create_default_context()
+_ssl_ctx.check_hostname = False
+_ssl_ctx.verify_mode = ssl.CERT_NONE
+
+logger = logging.getLogger(__name__)
+
+
+def _px(value) -> float:
+    """Normalize a price string ("0.5", ".50") to a stable float key."""
+    return round(float(value), 4)
+
+
+class _BookSide:
+    """One side of an L2 book: size per price level plus an ascending price index."""
+
+    __slots__ = ("_sizes", "_prices", "_descending")
+
+    def __init__(self, descending: bool):
+        self._sizes: dict[float, float] = {}
+        self._prices: list[float] = []  # ascending
+        self._descending = descending   # bids iterate best-first from the top
+
+    def clear(self):
+        self._sizes.clear()
+        self._prices.clear()
+
+    def set(self, price: float, size: float):
+        """Set the resting size at a price level (size 0 removes the level)."""
+        if size <= 0:
+            if self._sizes.pop(price, None) is not None:
+                i = bisect_left(self._prices, price)
+                del self._prices[i]
+            return
+        if price not in self._sizes:
+            insort(self._prices, price)
+        self._sizes[price] = size
+
+    def best(self) -> tuple[float, float] | None:
+        if not self._prices:
+            return None
+        price = self._prices[-1] if self._descending else self._prices[0]
+        return price, self._sizes[price]
+
+    def size_at(self, price: float) -> float:
+        return self._sizes.get(price, 0.0)
+
+    def levels(self, depth: int | None = None) -> list[list[float]]:
+        """Return [[price, size], ...] best level first."""
+        prices = reversed(self._prices) if self._descending else iter(self._prices)
+        out = []
+        for price in prices:
+            if depth is not None and len(out) >= depth:
+                break
+            out.append([price, self._sizes[price]])
+        return out
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+
+class OrderBook:
+    """L2 book for a single CLOB token."""
+
+    def __init__(self, token_id: str):
+        self.token_id = token_id
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.timestamp: float = 0       # exchange timestamp of last update (unix secs)
+        self.received_at: float = 0     # local receive time of last update
+        self.hash: str | None = None
+        self.has_snapshot = False
+        self.trades: deque[tuple[float, float, float, str]] = deque(maxlen=BOOK_TRADE_BUFFER)  # (ts, price, size, side)
+
+    def apply_snapshot(self, bids: list[dict], asks: list[dict], ts: float, book_hash: str | None = None):
+        self.bids.clear()
+        self.asks.clear()
+        for level in bids:
+            self.bids.set(_px(level["price"]), float(level["size"]))
+        for level in asks:
+            self.asks.set(_px(level["price"]), float(level["size"]))
+        self.has_snapshot = True
+        self._touch(ts, book_hash)
+
+    def apply_change(self, side: str, price, size, ts: float, book_hash: str | None = None):
+        book_side = self.bids if str(side).upper() == "BUY" else self.asks
+        book_side.set(_px(price), float(size))
+        self._touch(ts, book_hash)
+
+    def record_trade(self, price, size, side: str, ts: float):
+        self.trades.append((ts, _px(price), float(size), str(side).upper()))
+
+    def best_bid(self) -> tuple[float, float] | None:
+        return self.bids.best()
+
+    def best_ask(self) -> tuple[float, float] | None:
+        return self.asks.best()
+
+    def snapshot(self, depth: int | None = BOOK_SNAPSHOT_DEPTH, trade_secs: float = BOOK_SNAPSHOT_TRADE_SECS) -> dict:
+        """JSON-friendly copy of the book, best levels first, with the trades of the last trade_secs."""
+        return {
+            "token_id": self.token_id,
+            "ts": self.timestamp,
+            "received_at": self.received_at,
+            "hash": self.hash,
+            "bids": self.bids.levels(depth),
+            "asks": self.asks.levels(depth),
+            "trades": self.recent_trades((self.timestamp or time.time()) - trade_secs),
+        }
+
+    def recent_trades(self, since_ts: float) -> list[list]:
+        """Trades printed after since_ts (exchange time), oldest first, as [[ts, price, size, side], ...]."""
+        out = []
+        for trade in reversed(self.trades):
+            if trade[0] <= since_ts:
+                break
+            out.append(list(trade))
+        out.reverse()
+        return out
+
+    def _touch(self, ts: float, book_hash: str | None):
+        self.timestamp = ts or time.time()
+        self.received_at = time.time()
+        if book_hash:
+            self.hash = book_hash
+
+
+def _parse_ts(value) -> float:
+    try:
+        ts = float(value)
+    except (TypeError, ValueError):
+        return time.time()
+    return ts / 1000 if ts > 1_000_000_000_000 else ts
+
+
+class OrderBookFeed:
+    """Subscribes to the Polymarket CLOB market channel and keeps an L2 book per token."""
+
+    def __init__(self, url: str = CLOB_WS_URL):
+        self._url = url
+        self._books: dict[str, OrderBook] = {}
+        self._assets: set[str] = set()
+        self._connected = False
+        self._ws = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def asset_count(self) -> int:
+        return len(self._assets)
+
+    def memory_stats(self) -> dict:
+        books = list(self._books.values())
+        return {
+            "books": len(books),
+            "levels": sum(len(b.bids) + len(b.asks) for b in books),
+            "trades": sum(len(b.trades) for b in books),
+        }
+
+    def book(self, token_id: str) -> OrderBook | None:
+        """Live book for a token, or None if no snapshot has been received yet."""
+        book = self._books.get(token_id)
+        if book is None or not book.has_snapshot:
+            return None
+        return book
+
+    def snapshot(self, token_id: str, depth: int | None = BOOK_SNAPSHOT_DEPTH,
+                 trade_secs: float = BOOK_SNAPSHOT_TRADE_SECS) -> dict | None:
+        """Point-in-time copy of a token's book, or None if unavailable."""
+        if not self._connected:
+            return None
+        book = self.book(token_id)
+        return book.snapshot(depth, trade_secs) if book else None
+
+    async def subscribe(self, token_ids: list[str]):
+        new_ids = [t for t in token_ids if t and t not in self._assets]
+        if not new_ids:
+            return
+        self._assets.update(new_ids)
+        for token_id in new_ids:
+            self._books.setdefault(token_id, OrderBook(token_id))
+        if self._ws is not None and self._connected:
+            await self._send({"assets_ids": new_ids, "operation": "subscribe"})
+
+    async def unsubscribe(self, token_ids: list[str]):
+        old_ids = [t for t in token_ids if t in self._assets]
+        if not old_ids:
+            return
+        for token_id in old_ids:
+            self._assets.discard(token_id)
+            self._books.pop(token_id, None)
+        if self._ws is not None and self._connected:
+            await self._send({"assets_ids": old_ids, "operation": "unsubscribe"})
+
+    async def run(self):
+        """Connect and stream book updates. Reconnects on failure."""
+        while True:
+            try:
+                await self._connect_and_listen()
+            except (websockets.ConnectionClosed, ConnectionError, OSError) as e:
+                logger.warning("CLOB WebSocket disconnected: %s. Reconnecting in 2s...", e)
+                self._mark_disconnected()
+                await asyncio.sleep(2)
+            except Exception as e:
+                logger.error("Unexpected order book feed error: %s. Reconnecting in 5s...", e)
+                self._mark_disconnected()
+                await asyncio.sleep(5)
+
+    def _mark_disconnected(self):
+        self._connected = False
+        self._ws = None
+        # Books are rebuilt from fresh snapshots after reconnect
+        for book in self._books.values():
+            book.has_snapshot = False
+
+    async def _connect_and_listen(self):
+        logger.info("Connecting to CLOB market WebSocket: %s", self._url)
+        ssl_arg = _ssl_ctx if self._url.startswith("wss://") else None
+        async with websockets.connect(self._url, ssl=ssl_arg, ping_interval=20, ping_timeout=10) as ws:
+            self._ws = ws
+            self._connected = True
+            if self._assets:
+                await self._send({"assets_ids": sorted(self._assets), "type": "market"})
+                logger.info("Subscribed to %d CLOB tokens", len(self._assets))
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=30)
+                except asyncio.TimeoutError:
+                    # Quiet books are normal; keep the connection alive
+                    await ws.send("PING")
+                    continue
+
+                if isinstance(message, bytes) or not message.strip() or message == "PONG":
+                    continue
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                # Initial book dumps arrive as a list of events
+                if isinstance(data, list):
+                    for event in data:
+                        self._handle_event(event)
+                else:
+                    self._handle_event(data)
+
+    async def _send(self, msg: dict):
+        try:
+            await self._ws.send(json.dumps(msg))
+        except (websockets.ConnectionClosed, AttributeError) as e:
+            logger.debug("CLOB subscribe send skipped: %s", e)
+
+    def _handle_event(self, data: dict):
+        """
+        Apply one market-channel event.
+        Documented formats:
+          {"event_type": "book", "asset_id": ..., "bids": [{"price": ".48", "size": "30"}], "asks": [...], "timestamp": ...}
+          {"event_type": "price_change", "price_changes": [{"asset_id": ..., "price": ..., "size": ..., "side": "BUY"}], ...}
+          {"event_type": "last_trade_price", "asset_id": ..., "price": ..., "size": ..., "side": ...}
+        """
+        if not isinstance(data, dict):
+            return
+        event_type = data.get("event_type", "")
+        ts = _parse_ts(data.get("timestamp"))
+
+        if event_type == "book":
+            book = self._books.get(data.get("asset_id"))
+            if book is None:
+                return
+            bids = data.get("bids", data.get("buys", []))
+            asks = data.get("asks", data.get("sells", []))
+            book.apply_snapshot(bids, asks, ts, data.get("hash"))
+
+        elif event_type == "price_change":
+            # Newer format carries asset_id per change; older one per message
+            changes = data.get("price_changes") or data.get("changes") or []
+            for change in changes:
+                book = self._books.get(change.get("asset_id", data.get("asset_id")))
+                if book is None or not book.has_snapshot:
+                    continue
+                book.apply_change(change.get("side", ""), change["price"], change["size"], ts,
+                                  change.get("hash", data.get("hash")))
+
+        elif event_type == "last_trade_price":
+            book = self._books.get(data.get("asset_id"))
+            if book is not None and data.get("price") is not None:
+                book.record_trade(data["price"], data.get("size", 0), data.get("side", ""), ts)
@@ -1,5 +1,6 @@
 import asyncio
 import json
+import random
 import ssl
 import time
 import logging
@@ -7,7 +8,20 @@ from collections import deque
 
 import websockets
 
-from bot.config import RTDS_WS_URL, CHAINLINK_STALE_THRESHOLD, TICK_BUFFER_SECS
+from bot.clock import ClockSkewEstimator
+from bot.config import (
+    RTDS_WS_URL,
+    CHAINLINK_STALE_THRESHOLD,
+    TICK_BUFFER_SECS,
+    FEED_STANDBY,
+    FEED_GAP_THRESHOLD,
+    RECONNECT_BASE_DELAY,
+    RECONNECT_MAX_DELAY,
+    RECONNECT_RESET_SECS,
+)
+from bot.db import insert_feed_gap
+from bot.records import Tick
+from bot.ticks import TickStore
 
 # SSL context for local dev (macOS cert issues)
 _ssl_ctx = ssl.create_default_context()
@@ -17,31 +31,59 @@ _ssl_ctx.verify_mode = ssl.CERT_NONE
 logger = logging.getLogger(__name__)
 
 
+def _to_secs(ts) -> float | None:
+    """Normalize a ms or s unix timestamp to seconds."""
+    if not ts:
+        return None
+    try:
+        ts = float(ts)
+    except (TypeError, ValueError):
+        return None
+    return ts / 1000 if ts > 1_000_000_000_000 else ts
+
+
+def _reconnect_delay(attempt: int) -> float:
+    """First retry is immediate; later ones back off exponentially with jitter."""
+    if attempt == 0:
+        return 0.0
+    cap = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** (attempt - 1))
+    return cap / 2 + random.uniform(0, cap / 2)
+
+
 class ChainlinkPriceFeed:
     """Subscribes to Polymarket RTDS WebSocket for Chainlink BTC/USD prices."""
 
-    def __init__(self):
+    def __init__(self, url: str = RTDS_WS_URL, standby: bool = FEED_STANDBY):
+        self._url = url
+        self._standby = standby
         self._price: float | None = None
-        self._timestamp: float = 0  # unix timestamp of last update
-        self._connected = False
-        self._ws = None
-        self._tick_deque: deque[tuple[float, float]] = deque()  # (timestamp, price)
+        self._timestamp: float = 0  # source (Chainlink) unix timestamp of last update
+        self._live: set[str] = set()  # names of connections currently subscribed
+        # Sorted Tick(source_ts, price, relay_ts, recv_ts) — relay_ts is the RTDS envelope time, recv_ts our clock
+        self._ticks = TickStore("btc/usd")
+        self.clock = ClockSkewEstimator()
+        self._last_recv: float = 0  # local time the last accepted tick arrived
+        self._tick_interval: float | None = None  # EMA of source-time spacing between ticks
+        self._gaps: deque[dict] = deque(maxlen=100)
+        self._gap_writes: set[asyncio.Task] = set()  # feed_gaps rows being written off the loop
+        self._first_price = asyncio.Event()
+        self.on_tick = None  # optional callback(row) for each in-order tick (shared-memory publisher)
 
     @property
     def price(self) -> float | None:
         """Latest Chainlink BTC/USD price, or None if stale/unavailable."""
         if self._price is None:
             return None
-        if time.time() - self._timestamp > CHAINLINK_STALE_THRESHOLD:
+        if self.last_update_age > CHAINLINK_STALE_THRESHOLD:
             return None  # stale
         return self._price
 
     @property
     def last_update_age(self) -> float:
-        """Seconds since last price update."""
+        """Seconds since the last price was produced at the source, corrected for clock offset."""
         if self._timestamp == 0:
             return float("inf")
-        return time.time() - self._timestamp
+        return time.time() - self.clock.to_local(self._timestamp)
 
     @property
     def is_available(self) -> bool:
@@ -49,36 +91,97 @@ class ChainlinkPriceFeed:
 
     @property
     def connected(self) -> bool:
-        return self._connected
+        return bool(self._live)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._live)
+
+    @property
+    def gaps(self) -> list[dict]:
+        """Recent outage gaps, oldest first."""
+        return list(self._gaps)
+
+    def gaps_between(self, start_ts: float, end_ts: float) -> list[dict]:
+        """Gaps overlapping [start_ts, end_ts] (local receive time), including one still in progress."""
+        gaps = [g for g in self._gaps if g["start"] < end_ts and g["end"] > start_ts]
+        now = time.time()
+        if self._last_recv and now - self._last_recv > FEED_GAP_THRESHOLD and self._last_recv < end_ts:
+            gaps.append({"start": self._last_recv, "end": min(now, end_ts), "ticks_missed": None, "open": True})
+        return gaps
 
     @property
     def tick_count(self) -> int:
-        return len(self._tick_deque)
+        return len(self._ticks)
+
+    @property
+    def duplicate_ticks(self) -> int:
+        return self._ticks.duplicates
+
+    @property
+    def tick_anomalies(self) -> dict:
+        """Counts of late (reordered), duplicate and too-late (dropped) ticks."""
+        return self._ticks.anomalies()
+
+    def memory_stats(self) -> dict:
+        return {**self._ticks.memory_stats(), "gaps": len(self._gaps), "connections": len(self._live)}
+
+    def recent_ticks(self, seconds: int = 60) -> list[Tick]:
+        """Ticks from the last N seconds, oldest first, without copying them into dicts."""
+        return self._ticks.since(time.time() - self.clock.offset - seconds)
+
+    def get_recent_ticks(self, seconds: int = 60, detailed: bool = False) -> list[dict]:
+        """
+        Return ticks from the last N seconds as [{"ts": ..., "price": ...}, ...].
+        detailed=True adds the relay and local receive timestamps ("relay_ts", "recv_ts").
+        """
+        ticks = self.recent_ticks(seconds)
+        if detailed:
+            return [t.to_json() for t in ticks]
+        return [{"ts": t[0], "price": t[1]} for t in ticks]
 
-    def get_recent_ticks(self, seconds: int = 60) -> list[dict]:
-        """Return ticks from the last N seconds as [{"ts": ..., "price": ...}, ...]."""
-        cutoff = time.time() - seconds
-        return [{"ts": ts, "price": p} for ts, p in self._tick_deque if ts >= cutoff]
+    async def wait_for_price(self, timeout: float) -> bool:
+        """Wait until a price has arrived (event-driven). Returns is_available."""
+        try:
+            await asyncio.wait_for(self._first_price.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_available
 
     async def run(self):
-        """Connect and subscribe to Chainlink BTC/USD. Reconnects on failure."""
+        """
+        Connect and subscribe to Chainlink BTC/USD. Reconnects on failure.
+        With standby enabled a second connection stays subscribed alongside the primary,
+        so a drop on either one loses no ticks; duplicates are discarded by timestamp.
+        """
+        names = ["primary", "standby"] if self._standby else ["primary"]
+        await asyncio.gather(*(self._connection_loop(name) for name in names))
+
+    async def _connection_loop(self, name: str):
+        attempt = 0
         while True:
+            started = time.time()
             try:
-                await self._connect_and_listen()
+                await self._connect_and_listen(name)
             except (websockets.ConnectionClosed, ConnectionError, OSError) as e:
-                logger.warning(f"WebSocket disconnected: {e}. Reconnecting in 5s...")
-                self._connected = False
-                await asyncio.sleep(5)
+                logger.warning("WebSocket (%s) disconnected: %s", name, e)
             except Exception as e:
-                logger.error(f"Unexpected price feed error: {e}. Reconnecting in 10s...")
-                self._connected = False
-                await asyncio.sleep(10)
+                logger.error("Unexpected price feed error (%s): %s", name, e)
+            self._live.discard(name)
 
-    async def _connect_and_listen(self):
-        logger.info(f"Connecting to RTDS WebSocket: {RTDS_WS_URL}")
-        async with websockets.connect(RTDS_WS_URL, ssl=_ssl_ctx, ping_interval=30, ping_timeout=10) as ws:
-            self._ws = ws
-            self._connected = True
+            # A connection that held for a while starts over with an immediate retry
+            if time.time() - started > RECONNECT_RESET_SECS:
+                attempt = 0
+            delay = _reconnect_delay(attempt)
+            attempt += 1
+            logger.info("Reconnecting %s in %.2fs (attempt %d)", name, delay, attempt)
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def _connect_and_listen(self, name: str = "primary"):
+        logger.info("Connecting to RTDS WebSocket (%s): %s", name, self._url)
+        ssl_arg = _ssl_ctx if self._url.startswith("wss://") else None
+        async with websockets.connect(self._url, ssl=ssl_arg, ping_interval=30, ping_timeout=10) as ws:
 
             # Subscribe to Chainlink BTC/USD
             # Docs: https://docs.polymarket.com/developers/RTDS/RTDS-crypto-prices
@@ -93,23 +196,24 @@ class ChainlinkPriceFeed:
                 ],
             }
             await ws.send(json.dumps(subscribe_msg))
-            logger.info("Subscribed to crypto_prices_chainlink")
+            self._live.add(name)
+            logger.info("Subscribed to crypto_prices_chainlink (%s)", name)
 
             ping_counter = 0
             while True:
                 try:
                     message = await asyncio.wait_for(ws.recv(), timeout=30)
                 except asyncio.TimeoutError:
-                    logger.warning("No WS message for 30s — forcing reconnect")
-                    self._connected = False
+                    logger.warning("No WS message for 30s on %s — forcing reconnect", name)
                     raise ConnectionError("WS receive timeout")
 
+                recv_ts = time.time()
                 # Skip binary or empty messages
                 if isinstance(message, bytes) or not message.strip():
                     continue
                 try:
                     data = json.loads(message)
-                    self._handle_message(data)
+                    self._handle_message(data, recv_ts)
                 except json.JSONDecodeError:
                     pass  # Ignore non-JSON (pings, etc.)
 
@@ -118,9 +222,9 @@ class ChainlinkPriceFeed:
                 if ping_counter % 50 == 0:
                     await ws.send(json.dumps({"action": "ping"}))
 
-    def _handle_message(self, data: dict):
+    def _handle_message(self, data: dict, recv_ts: float | None = None):
         """
-        Process incoming price update.
+        Process incoming price update. recv_ts is the local time the frame arrived.
         Documented format:
         {
             "topic": "crypto_prices_chainlink",
@@ -135,19 +239,23 @@ class ChainlinkPriceFeed:
         # Skip non-price messages
         if msg_type in ("ping", "pong", "heartbeat", "subscribed", "connected"):
             if msg_type == "subscribed":
-                logger.info(f"Subscription confirmed: {data}")
+                logger.info("Subscription confirmed: %s", data)
             return
 
+        if recv_ts is None:
+            recv_ts = time.time()
+        relay_ts = _to_secs(data.get("timestamp"))
+
         # Primary: documented RTDS format with payload
         payload = data.get("payload")
         if payload and isinstance(payload, dict):
-            self._extract_price(payload)
+            self._extract_price(payload, relay_ts, recv_ts)
             return
 
         # Fallback: flat format (in case format varies)
-        self._extract_price(data)
+        self._extract_price(data, None, recv_ts)
 
-    def _extract_price(self, data: dict):
+    def _extract_price(self, data: dict, relay_ts: float | None = None, recv_ts: float | None = None):
         if not isinstance(data, dict):
             return
 
@@ -164,17 +272,60 @@ class ChainlinkPriceFeed:
         except (ValueError, TypeError):
             return
 
-        ts = data.get("timestamp", data.get("t"))
-        if ts and ts > 1_000_000_000_000:
-            ts = ts / 1000  # ms to seconds
+        now = recv_ts if recv_ts is not None else time.time()
+        ts = _to_secs(data.get("timestamp", data.get("t"))) or relay_ts or now
 
+        # Standby and primary deliver the same ticks, and relays can reorder: the store
+        # drops duplicates and slots late ticks into place
+        prev = self._ticks.last()
+        row = Tick(ts, price, relay_ts, now)
+        status = self._ticks.insert(row)
+        if status != "appended":
+            if status == "too_late":
+                logger.debug("Dropped tick %s older than the reorder window", ts)
+            return
+
+        if prev is not None:
+            prev_ts = prev[0]
+            if now - self._last_recv <= FEED_GAP_THRESHOLD:
+                step = ts - prev_ts
+                self._tick_interval = step if self._tick_interval is None else 0.9 * self._tick_interval + 0.1 * step
+            else:
+                self._record_gap(self._last_recv, now, prev_ts, ts)
+
+        self.clock.observe(ts, relay_ts, now)
         self._price = price
-        self._timestamp = ts if ts else time.time()
+        self._timestamp = ts
+        self._last_recv = now
+        self._first_price.set()
+        if self.on_tick is not None:
+            self.on_tick(row)
+
+        # Prune entries older than the buffer window (source time)
+        self._ticks.prune(now - self.clock.offset - TICK_BUFFER_SECS)
 
-        # Append to rolling tick deque and prune entries older than buffer window
-        self._tick_deque.append((self._timestamp, price))
-        cutoff = time.time() - TICK_BUFFER_SECS
-        while self._tick_deque and self._tick_deque[0][0] < cutoff:
-            self._tick_deque.popleft()
+        if logger.isEnabledFor(logging.DEBUG):  # skip the age lookup on every tick
+            logger.debug("BTC/USD: $%.2f (age: %.1fs)", price, self.last_update_age)
 
-        logger.debug(f"BTC/USD: ${price:,.2f} (age: {self.last_update_age:.1f}s)")
+    def _record_gap(self, start: float, end: float, last_ts: float, next_ts: float):
+        """Record an outage: local start/end plus ticks missed, estimated from source timestamps."""
+        interval = max(self._tick_interval or 1.0, 0.05)
+        missed = max(0, round((next_ts - last_ts) / interval) - 1)
+        gap = {"start": start, "end": end, "ticks_missed": missed}
+        self._gaps.append(gap)
+        logger.warning("Price feed gap: %.1fs, ~%d ticks missed", end - start, missed)
+        # Persist from a thread: this runs inside the tick handler, which must never block on
+        # SQLite or let a DB error tear down the connection it was called from
+        try:
+            task = asyncio.get_running_loop().create_task(self._persist_gap(gap))
+        except RuntimeError:  # no event loop (offline replays, benchmarks)
+            return
+        self._gap_writes.add(task)
+        task.add_done_callback(self._gap_writes.discard)
+
+    @staticmethod
+    async def _persist_gap(gap: dict):
+        try:
+            await asyncio.to_thread(insert_feed_gap, gap)
+        except Exception as e:
+            logger.error("Failed to record feed gap: %s", e)
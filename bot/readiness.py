@@ -0,0 +1,51 @@
+"""
+Startup stage tracking.
+
+main() runs its startup stages concurrently; each one is wrapped in track() so
+/api/health can report when it started, how long it took and whether it failed.
+Offsets are milliseconds since this module was imported (the top of bot.main).
+"""
+
+import time
+
+_T0 = time.perf_counter()
+
+
+def _ms(t: float) -> float:
+    return round((t - _T0) * 1000, 1)
+
+
+class Readiness:
+    def __init__(self):
+        self._stages: dict[str, dict] = {}
+
+    def start(self, name: str):
+        self._stages[name] = {"status": "pending", "started_ms": _ms(time.perf_counter()), "ready_ms": None}
+
+    def done(self, name: str, status: str = "ready", detail: str | None = None):
+        stage = self._stages.setdefault(name, {"started_ms": None})
+        stage["status"] = status
+        stage["ready_ms"] = _ms(time.perf_counter())
+        if detail:
+            stage["detail"] = detail
+
+    async def track(self, name: str, aw):
+        """Await aw as stage `name`. A result of False marks the stage as timed out."""
+        self.start(name)
+        try:
+            result = await aw
+        except Exception as e:
+            self.done(name, "failed", str(e))
+            raise
+        self.done(name, "timeout" if result is False else "ready")
+        return result
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._stages) and all(s["status"] == "ready" for s in self._stages.values())
+
+    def summary(self) -> dict:
+        return {"ready": self.ready, "stages": {k: dict(v) for k, v in self._stages.items()}}
+
+
+startup = Readiness()
@@ -0,0 +1,80 @@
+"""
+Typed records passed between discovery, the strategy and persistence.
+
+Markets and tracking samples are slotted dataclasses and ticks are named
+tuples (the TickStore rows themselves), so the hot paths never build per-item
+dicts or timestamp strings. Conversion to the JSON shapes stored in SQLite
+happens once, in to_json(), when an entry is persisted.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+
+@dataclass(slots=True)
+class Market:
+    """One BTC 15-minute market as discovered on Gamma, plus the beat prices captured at its open."""
+
+    id: str
+    slug: str
+    start_time: datetime
+    end_time: datetime
+    condition_id: str = ""
+    title: str = ""
+    outcomes: str = ""          # JSON-encoded list, as Gamma returns it
+    clob_token_ids: str = ""    # JSON-encoded list, same order as outcomes
+    accepting_orders: bool = False
+    closed: bool = False
+    beat_price: float | None = None  # captured from Chainlink at event start
+    price_before_beat: float | None = None
+    price_after_beat: float | None = None
+    created_at: datetime | None = None  # when Gamma listed it
+    trace_id: str | None = None  # bot.tracing trace covering this market's lifecycle
+
+
+@dataclass(slots=True)
+class Sample:
+    """One per-second tracking sample. ts is a unix timestamp; it becomes ISO text only when stored."""
+
+    t: int
+    ts: float
+    price: float
+    distance: float
+    side: str
+
+    def to_json(self) -> dict:
+        return {
+            "t": self.t,
+            "ts": datetime.fromtimestamp(self.ts, timezone.utc).isoformat(),
+            "price": self.price,
+            "distance": self.distance,
+            "side": self.side,
+        }
+
+
+class Tick(NamedTuple):
+    """A Chainlink tick: source time, price, RTDS relay time (may be None) and local receive time."""
+
+    ts: float
+    price: float
+    relay_ts: float | None
+    recv_ts: float
+
+    def to_json(self) -> dict:
+        return {"ts": self.ts, "price": self.price, "relay_ts": self.relay_ts, "recv_ts": self.recv_ts}
+
+
+def plain(value):
+    """A column value with records (and lists of them) expanded to their stored dict form."""
+    if isinstance(value, list) and value and hasattr(value[0], "to_json"):
+        return [v.to_json() for v in value]
+    if hasattr(value, "to_json"):
+        return value.to_json()
+    return value
+
+
+def to_json(value) -> str:
+    """Encode a column value, expanding records (and lists of them) to their stored dict form."""
+    return json.dumps(plain(value), default=str)
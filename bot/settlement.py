@@ -0,0 +1,231 @@
+"""
+Provisional settlement from our own tick stream, reconciled against Gamma later.
+
+The Up/Down markets settle on the Chainlink BTC/USD price at end_time against the
+price at the start (Up on a tie), and we receive that same stream. So a couple of
+seconds after the close the tick buffer already holds the deciding price, and
+run_market logs its result from it immediately instead of polling Gamma for
+15-300s. A provisional outcome is flagged low-confidence when the close is within
+PROVISIONAL_MIN_MARGIN of the beat price, when the beat price was approximate
+(the market was discovered after it started), or when the feed had a gap around
+the close.
+
+The reconciler then polls Gamma in the background. When Gamma resolves the market,
+the row gets actual_outcome and every result is recomputed from it
+(outcome_source "ticks" -> "gamma"). A disagreement sets outcome_mismatch, is
+counted, logged and sent to Telegram. Counters are on /api/health under
+"settlement". Rows still waiting when the bot stops are picked up at the next start.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from bot.config import (
+    BUY_PRICE,
+    PROVISIONAL_MAX_TICK_AGE,
+    PROVISIONAL_MIN_MARGIN,
+    PROVISIONAL_SETTLE_GRACE,
+    SETTLEMENT_POLL_INTERVAL,
+    SETTLEMENT_POLL_TIMEOUT,
+    SIMULATED_SHARES,
+)
+from bot.db import get_unreconciled_markets
+from bot.events import events
+from bot.fill_sim import fill_pnl
+from bot.notifier import notifier
+from bot.records import Market
+
+logger = logging.getLogger(__name__)
+
+
+# ── Provisional outcome ─────────────────────────────────────────────────────
+
+async def provisional_settlement(market: Market, beat_price: float, price_feed) -> dict | None:
+    """Wait until the close tick must have arrived, then read the outcome off the tick buffer."""
+    end_ts = market.end_time.timestamp()
+    wait = price_feed.clock.to_local(end_ts) + PROVISIONAL_SETTLE_GRACE - time.time()
+    if wait > 0:
+        await asyncio.sleep(wait)
+    return provisional_outcome(market, beat_price, price_feed)
+
+
+def provisional_outcome(market: Market, beat_price: float, price_feed) -> dict | None:
+    """
+    Outcome implied by the last tick at or before end_time, as markets columns
+    (close_price, provisional_outcome, outcome_confidence) plus low_confidence_reasons.
+    None when the feed has no tick within PROVISIONAL_MAX_TICK_AGE of the close.
+    """
+    end_ts = market.end_time.timestamp()
+    since = end_ts - PROVISIONAL_MAX_TICK_AGE
+    close = None
+    for tick in reversed(price_feed.recent_ticks(time.time() - price_feed.clock.offset - since)):
+        if tick.ts <= end_ts:
+            close = tick
+            break
+    if close is None:
+        return None
+
+    margin = close.price - beat_price
+    reasons = []
+    if abs(margin) < PROVISIONAL_MIN_MARGIN:
+        reasons.append("thin_margin")
+    if market.price_before_beat is None:
+        reasons.append("approximate_beat")
+    # Gaps are kept in local receive time; the window is on the source clock
+    to_local = price_feed.clock.to_local
+    if price_feed.gaps_between(to_local(since), to_local(end_ts + PROVISIONAL_SETTLE_GRACE)):
+        reasons.append("feed_gap")
+    return {
+        "close_price": close.price,
+        "provisional_outcome": "Up" if margin >= 0 else "Down",
+        "outcome_confidence": "low" if reasons else "high",
+        "low_confidence_reasons": reasons,
+    }
+
+
+def result_fields(outcome: str | None, side: str, fill: dict | None = None, fill_sims: dict | None = None,
+                  buy_price: float = BUY_PRICE, shares: float = SIMULATED_SHARES) -> dict:
+    """would_have_won and every P&L that depends on the outcome (None while it is unknown)."""
+    won = (outcome == side) if outcome else None
+    pnl = None if won is None else ((1.0 - buy_price) * shares if won else -buy_price * shares)
+    return {
+        "would_have_won": won,
+        "theoretical_pnl": round(pnl, 2) if pnl is not None else None,
+        "realistic_pnl": fill_pnl(fill, won) if fill else None,
+        "fill_sims": {size: {**f, "pnl": fill_pnl(f, won)} for size, f in fill_sims.items()} if fill_sims else None,
+    }
+
+
+async def poll_outcome(market_id: str, fetch_outcome_fn) -> str | None:
+    """Poll for market resolution. Returns 'Up', 'Down', or None if timeout."""
+    elapsed = 0
+    while elapsed < SETTLEMENT_POLL_TIMEOUT:
+        await asyncio.sleep(SETTLEMENT_POLL_INTERVAL)
+        elapsed += SETTLEMENT_POLL_INTERVAL
+        try:
+            outcome = await fetch_outcome_fn(market_id)
+            if outcome:
+                return outcome
+        except Exception as e:
+            logger.warning("Error polling outcome for %s: %s", market_id, e)
+    logger.warning("Timeout waiting for outcome: %s", market_id)
+    return None
+
+
+# ── Reconciliation ──────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
+class PendingSettlement:
+    """What reconciliation needs to recompute a logged ACTIVE market's results."""
+    market_id: str
+    slug: str
+    side: str
+    end_ts: float
+    provisional_outcome: str | None
+    confidence: str | None
+    fill: dict | None = None       # {"filled", "vwap"} of the simulated fill
+    fill_sims: dict | None = None  # simulate_sizes() result
+    buy_price: float = BUY_PRICE
+    shares: float = SIMULATED_SHARES
+
+
+class SettlementReconciler:
+    def __init__(self):
+        self._pending: dict[str, asyncio.Task] = {}
+        self.mismatches: deque[dict] = deque(maxlen=20)
+        self.stats: Counter[str] = Counter()
+
+    def start(self, pending: PendingSettlement, fetch_outcome_fn):
+        """Poll Gamma for the market in the background and fold its outcome into the row."""
+        if pending.market_id in self._pending:
+            return
+        task = asyncio.create_task(self._run(pending, fetch_outcome_fn))
+        self._pending[pending.market_id] = task
+        task.add_done_callback(lambda t, mid=pending.market_id: self._pending.pop(mid, None))
+
+    async def resume(self, fetch_outcome_fn, min_age: float = 0):
+        """
+        Restart reconciliation for rows logged before a restart that never got Gamma's outcome.
+        Rows logged within min_age seconds are left alone (their worker may still be polling).
+        """
+        rows = await asyncio.to_thread(get_unreconciled_markets, min_age)
+        rows = [r for r in rows if r["market_id"] not in self._pending]
+        for row in rows:
+            self.start(_from_row(row), fetch_outcome_fn)
+        if rows:
+            logger.info("Resumed settlement reconciliation for %d market(s)", len(rows))
+
+    async def adopt_loop(self, fetch_outcome_fn):
+        """
+        Sharded leader: keep taking over rows whose worker stopped before Gamma resolved them.
+        A live worker's own poll is over SETTLEMENT_POLL_TIMEOUT after it logged the market.
+        """
+        while True:
+            await self.resume(fetch_outcome_fn, min_age=SETTLEMENT_POLL_TIMEOUT + SETTLEMENT_POLL_INTERVAL)
+            await asyncio.sleep(SETTLEMENT_POLL_TIMEOUT)
+
+    async def _run(self, p: PendingSettlement, fetch_outcome_fn):
+        actual = await poll_outcome(p.market_id, fetch_outcome_fn)
+        if actual is None:
+            self.stats["unresolved"] += 1
+            return
+
+        mismatch = (actual != p.provisional_outcome) if p.provisional_outcome else None
+        fields = result_fields(actual, p.side, p.fill, p.fill_sims, p.buy_price, p.shares)
+        events.record(p.market_id, "outcome", row_only={"fill_sims": fields.pop("fill_sims")},
+                      actual_outcome=actual, outcome_source="gamma", outcome_mismatch=mismatch,
+                      settlement_lag_secs=round(time.time() - p.end_ts, 1), **fields)
+
+        self.stats["reconciled"] += 1
+        if p.confidence == "low":
+            self.stats["low_confidence"] += 1
+        result = "WIN" if fields["would_have_won"] else "LOSS"
+        if mismatch is None:
+            self.stats["no_provisional"] += 1
+            notifier.notify(f"{result} {p.slug}: bought {p.side}, outcome {actual} (settled without a provisional)")
+        elif mismatch:
+            self.stats["mismatches"] += 1
+            if p.confidence == "low":
+                self.stats["low_confidence_mismatches"] += 1
+            self.mismatches.append({"market_id": p.market_id, "slug": p.slug, "provisional": p.provisional_outcome,
+                                    "actual": actual, "confidence": p.confidence})
+            logger.warning("[%s] Settlement mismatch: provisional %s (%s confidence), Gamma %s — now %s",
+                           p.slug, p.provisional_outcome, p.confidence, actual, result)
+            notifier.notify(f"Settlement mismatch {p.slug}: provisional {p.provisional_outcome}, "
+                            f"Gamma {actual} — corrected to {result}")
+        else:
+            self.stats["matched"] += 1
+
+    def summary(self) -> dict:
+        compared = self.stats["matched"] + self.stats["mismatches"]
+        return {
+            "pending": len(self._pending),
+            **self.stats,
+            "mismatch_rate": round(self.stats["mismatches"] / compared, 4) if compared else None,
+            "recent_mismatches": list(self.mismatches),
+        }
+
+
+def _from_row(row: dict) -> PendingSettlement:
+    fill = {"filled": row["fill_shares"], "vwap": row["fill_vwap"]} if row["fill_shares"] is not None else None
+    return PendingSettlement(
+        market_id=row["market_id"],
+        slug=row["market_slug"] or row["market_id"],
+        side=row["would_buy"],
+        end_ts=datetime.fromisoformat(row["end_time"]).timestamp() if row["end_time"] else time.time(),
+        provisional_outcome=row["provisional_outcome"],
+        confidence=row["outcome_confidence"],
+        fill=fill,
+        fill_sims=json.loads(row["fill_sims"]) if row["fill_sims"] else None,
+        buy_price=row["buy_price"] if row["buy_price"] is not None else BUY_PRICE,
+        shares=row["simulated_shares"] if row["simulated_shares"] is not None else SIMULATED_SHARES,
+    )
+
+
+# Process-wide reconciler shared by every market task
+reconciler = SettlementReconciler()
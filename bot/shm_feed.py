@@ -0,0 +1,373 @@
+"""
+Out-of-process price feed over shared memory.
+
+With FEED_PROCESS enabled, ChainlinkPriceFeed runs in its own process and
+publishes every accepted tick into a multiprocessing.shared_memory ring buffer.
+Readers in any process attach by name and get the same read API as
+ChainlinkPriceFeed (price, is_available, get_recent_ticks, ...), reading the
+buffer in place.
+
+Layout (float64 slots):
+    header[0]   sequence counter (seqlock: odd while the writer is mid-update)
+    header[1]   ticks written (total, monotonically increasing)
+    header[2]   ring capacity
+    header[3..] latest price / timestamps / feed state (see _H_* indices)
+    ring        capacity x (source_ts, price, relay_ts, recv_ts); relay_ts is NaN when absent
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing as mp
+import os
+import sqlite3
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from bot.config import (
+    CHAINLINK_STALE_THRESHOLD,
+    DB_PATH,
+    FEED_GAP_THRESHOLD,
+    RTDS_WS_URL,
+    SHM_RING_CAPACITY,
+)
+from bot.records import Tick
+
+logger = logging.getLogger(__name__)
+
+_HEADER_SLOTS = 16
+_ROW = 4
+(_H_SEQ, _H_COUNT, _H_CAPACITY, _H_PRICE, _H_SOURCE_TS, _H_LAST_RECV, _H_OFFSET,
+ _H_CONNECTIONS, _H_LATE, _H_DUPLICATES, _H_TOO_LATE, _H_WRITER_PID, _H_HEARTBEAT) = range(13)
+
+_STATE_INTERVAL = 0.25  # seconds between writer state refreshes when no ticks arrive
+_WRITER_DEAD_SECS = 5   # reader reports disconnected if the writer heartbeat is older than this
+_READ_RETRIES = 10_000  # seqlock attempts before a read falls back to the last consistent snapshot
+
+
+def _size(capacity: int) -> int:
+    return (_HEADER_SLOTS + capacity * _ROW) * 8
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to an existing segment without registering it with this process's resource
+    tracker, which would otherwise unlink it when a reader exits (Python < 3.13 has no track=False)."""
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedTickWriter:
+    """Single writer side of the ring. Runs in the feed process."""
+
+    def __init__(self, name: str):
+        self._shm = _attach(name)
+        self._buf = self._shm.buf.cast("d")
+        self._capacity = int(self._buf[_H_CAPACITY])
+        if int(self._buf[_H_SEQ]) & 1:
+            self._buf[_H_SEQ] += 1  # a previous writer died mid-update
+        self._buf[_H_WRITER_PID] = os.getpid()
+
+    def _begin(self):
+        self._buf[_H_SEQ] += 1  # odd: readers retry
+
+    def _end(self):
+        self._buf[_H_SEQ] += 1  # even: consistent
+
+    def publish(self, row: tuple, feed):
+        """Append one (source_ts, price, relay_ts, recv_ts) tick and refresh feed state."""
+        buf = self._buf
+        self._begin()
+        count = int(buf[_H_COUNT])
+        base = _HEADER_SLOTS + (count % self._capacity) * _ROW
+        buf[base] = row[0]
+        buf[base + 1] = row[1]
+        buf[base + 2] = row[2] if row[2] is not None else math.nan
+        buf[base + 3] = row[3]
+        buf[_H_COUNT] = count + 1
+        buf[_H_PRICE] = row[1]
+        buf[_H_SOURCE_TS] = row[0]
+        buf[_H_LAST_RECV] = row[3]
+        self._write_state(feed)
+        self._end()
+
+    def publish_state(self, feed):
+        self._begin()
+        self._write_state(feed)
+        self._end()
+
+    def _write_state(self, feed):
+        buf = self._buf
+        buf[_H_OFFSET] = feed.clock.offset
+        buf[_H_CONNECTIONS] = feed.connection_count
+        anomalies = feed.tick_anomalies
+        buf[_H_LATE] = anomalies["late"]
+        buf[_H_DUPLICATES] = anomalies["duplicates"]
+        buf[_H_TOO_LATE] = anomalies["too_late"]
+        buf[_H_HEARTBEAT] = time.time()
+
+    def close(self):
+        self._buf.release()
+        self._shm.close()
+
+
+def _feed_process_main(name: str, url: str):
+    """Entry point of the feed process: run ChainlinkPriceFeed and mirror it into shared memory."""
+    from bot.logging_setup import setup_logging
+    from bot.price_feed import ChainlinkPriceFeed
+
+    setup_logging(extra_fields={"process": "feed"})
+    writer = SharedTickWriter(name)
+    feed = ChainlinkPriceFeed(url)
+    feed.on_tick = lambda row: writer.publish(row, feed)
+
+    async def run():
+        task = asyncio.create_task(feed.run())
+        while not task.done():
+            writer.publish_state(feed)
+            await asyncio.sleep(_STATE_INTERVAL)
+        task.result()
+
+    try:
+        asyncio.run(run())
+    finally:
+        writer.close()
+
+
+class _ReaderClock:
+    """Offset published by the feed process, exposed with the ClockSkewEstimator read API."""
+
+    def __init__(self, reader: "SharedPriceFeed"):
+        self._reader = reader
+
+    @property
+    def offset(self) -> float:
+        return self._reader._header(_H_OFFSET)
+
+    def to_local(self, source_ts: float) -> float:
+        return source_ts + self.offset
+
+    def summary(self) -> dict:
+        return {"offset_ms": round(self.offset * 1000, 1)}
+
+
+class SharedPriceFeed:
+    """
+    Reader with the ChainlinkPriceFeed API. spawn() creates the segment and owns the
+    feed process; attach(name) joins an existing segment from any other process.
+    """
+
+    def __init__(self, shm: SharedMemory, owner: bool, url: str = RTDS_WS_URL):
+        self._shm = shm
+        self._url = url
+        self._buf = shm.buf.cast("d")
+        self._owner = owner
+        self._capacity = int(self._buf[_H_CAPACITY])
+        self._process: mp.Process | None = None
+        self._last_good: dict[str, object] = {}  # per read: last consistent result
+        self.torn_reads = 0
+        self.clock = _ReaderClock(self)
+
+    @classmethod
+    def spawn(cls, url: str = RTDS_WS_URL, capacity: int = SHM_RING_CAPACITY) -> "SharedPriceFeed":
+        shm = SharedMemory(create=True, size=_size(capacity))  # zero-filled
+        buf = shm.buf.cast("d")
+        buf[_H_CAPACITY] = capacity
+        buf.release()
+        return cls(shm, owner=True, url=url)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedPriceFeed":
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    async def run(self):
+        """Keep the feed process alive (owner only); restarts it if it dies."""
+        if not self._owner:
+            return
+        ctx = mp.get_context("spawn")
+        while True:
+            if self._process is None or not self._process.is_alive():
+                if self._process is not None:
+                    logger.warning("Feed process exited (%s). Restarting...", self._process.exitcode)
+                if int(self._buf[_H_SEQ]) & 1:
+                    self._buf[_H_SEQ] += 1  # the dead writer left the seqlock odd
+                self._process = ctx.Process(target=_feed_process_main, args=(self.name, self._url),
+                                            name="polybot-feed", daemon=True)
+                self._process.start()
+                logger.info("Feed process started (pid %d, shm %s)", self._process.pid, self.name)
+            await asyncio.sleep(1)
+
+    def close(self):
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+        self._buf.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    async def wait_for_price(self, timeout: float) -> bool:
+        """Shared memory has no cross-process wakeup, so poll the header briefly."""
+        deadline = time.monotonic() + timeout
+        while not self.is_available and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.is_available
+
+    # ── Seqlock reads ───────────────────────────────────────────────────────
+
+    def _read(self, fn, key: str, down):
+        """
+        Run fn against the buffer until it completes without a concurrent write. A writer
+        that died mid-update leaves the sequence odd for good, so after _READ_RETRIES attempts
+        (or sooner once the writer is known to be dead) the last consistent result for `key`
+        is returned instead, or `down` (what an empty, writer-less segment reads as) if there
+        is none. Staleness checks then report the feed as unavailable until it is respawned.
+        """
+        buf = self._buf
+        for attempt in range(_READ_RETRIES):
+            seq = buf[_H_SEQ]
+            if int(seq) & 1:
+                if attempt % 100 == 99 and not self._writer_alive():
+                    break
+                continue
+            result = fn(buf)
+            if buf[_H_SEQ] == seq:
+                self._last_good[key] = result
+                return result
+        self.torn_reads += 1
+        return self._last_good.get(key, down)
+
+    def _writer_alive(self) -> bool:
+        """Heartbeat recent and (when we can tell) the writer process still running. Read without the lock."""
+        if time.time() - self._buf[_H_HEARTBEAT] > _WRITER_DEAD_SECS:
+            return False
+        if self._process is not None:
+            return self._process.is_alive()
+        try:
+            os.kill(int(self._buf[_H_WRITER_PID]), 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass  # exists but owned by someone else
+        return True
+
+    def _header(self, index: int) -> float:
+        return self._read(lambda buf: buf[index], f"h{index}", 0.0)
+
+    # ── ChainlinkPriceFeed read API ─────────────────────────────────────────
+
+    @property
+    def price(self) -> float | None:
+        price, source_ts, offset, heartbeat = self._read(
+            lambda b: (b[_H_PRICE], b[_H_SOURCE_TS], b[_H_OFFSET], b[_H_HEARTBEAT]), "price", (0.0, 0.0, 0.0, 0.0))
+        now = time.time()
+        if source_ts == 0 or now - (source_ts + offset) > CHAINLINK_STALE_THRESHOLD:
+            return None
+        if now - heartbeat > _WRITER_DEAD_SECS:
+            return None  # writer hung or dead: its last price is not live
+        return price
+
+    @property
+    def last_update_age(self) -> float:
+        source_ts, offset = self._read(lambda b: (b[_H_SOURCE_TS], b[_H_OFFSET]), "age", (0.0, 0.0))
+        if source_ts == 0:
+            return float("inf")
+        return time.time() - (source_ts + offset)
+
+    @property
+    def is_available(self) -> bool:
+        return self.price is not None
+
+    @property
+    def connected(self) -> bool:
+        return self.connection_count > 0
+
+    @property
+    def connection_count(self) -> int:
+        conns, heartbeat = self._read(lambda b: (b[_H_CONNECTIONS], b[_H_HEARTBEAT]), "connections", (0.0, 0.0))
+        if time.time() - heartbeat > _WRITER_DEAD_SECS:
+            return 0
+        return int(conns)
+
+    @property
+    def tick_count(self) -> int:
+        return len(self._read(self._window_rows(float("-inf")), "all_ticks", []))
+
+    @property
+    def duplicate_ticks(self) -> int:
+        return int(self._header(_H_DUPLICATES))
+
+    @property
+    def tick_anomalies(self) -> dict:
+        late, dups, too_late = self._read(lambda b: (b[_H_LATE], b[_H_DUPLICATES], b[_H_TOO_LATE]),
+                                          "anomalies", (0.0, 0.0, 0.0))
+        return {"late": int(late), "duplicates": int(dups), "too_late": int(too_late)}
+
+    def memory_stats(self) -> dict:
+        # The ring is a fixed-size segment; ticks live in the feed process
+        return {"ring_capacity": self._capacity, "ring_bytes": _size(self._capacity),
+                "ticks_written": int(self._header(_H_COUNT)), "torn_reads": self.torn_reads}
+
+    def _window_rows(self, cutoff: float):
+        capacity = self._capacity
+
+        def read(buf):
+            count = int(buf[_H_COUNT])
+            rows = []
+            for i in range(count - 1, max(-1, count - 1 - capacity), -1):
+                base = _HEADER_SLOTS + (i % capacity) * _ROW
+                ts = buf[base]
+                if ts < cutoff:
+                    break
+                relay = buf[base + 2]
+                rows.append(Tick(ts, buf[base + 1], None if relay != relay else relay, buf[base + 3]))
+            rows.reverse()
+            return rows
+        return read
+
+    def recent_ticks(self, seconds: int = 60) -> list[Tick]:
+        cutoff = time.time() - self.clock.offset - seconds
+        ticks = self._read(self._window_rows(cutoff), "ticks", [])
+        return ticks if not ticks or ticks[0].ts >= cutoff else [t for t in ticks if t.ts >= cutoff]
+
+    def get_recent_ticks(self, seconds: int = 60, detailed: bool = False) -> list[dict]:
+        ticks = self.recent_ticks(seconds)
+        if detailed:
+            return [t.to_json() for t in ticks]
+        return [{"ts": t[0], "price": t[1]} for t in ticks]
+
+    @property
+    def gaps(self) -> list[dict]:
+        return self._query_gaps("SELECT started_at, ended_at, ticks_missed FROM feed_gaps ORDER BY id DESC LIMIT 10",
+                                ())[::-1]
+
+    def gaps_between(self, start_ts: float, end_ts: float) -> list[dict]:
+        """Gaps overlapping [start_ts, end_ts] (local receive time), including one still in progress."""
+        gaps = self._query_gaps(
+            "SELECT started_at, ended_at, ticks_missed FROM feed_gaps WHERE started_at < ? AND ended_at > ?",
+            (end_ts, start_ts),
+        )
+        last_recv = self._header(_H_LAST_RECV)
+        now = time.time()
+        if last_recv and now - last_recv > FEED_GAP_THRESHOLD and last_recv < end_ts:
+            gaps.append({"start": last_recv, "end": min(now, end_ts), "ticks_missed": None, "open": True})
+        return gaps
+
+    @staticmethod
+    def _query_gaps(sql: str, params: tuple) -> list[dict]:
+        # The feed process persists gaps; readers pick them up from the DB
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                return [{"start": s, "end": e, "ticks_missed": m} for s, e, m in conn.execute(sql, params)]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return []
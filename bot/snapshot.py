@@ -0,0 +1,122 @@
+"""
+Read-optimized analytics copy of polybot.db.
+
+The live DB is copied with the SQLite online backup API into a temp file, given
+extra indexes and precomputed views, then atomically swapped into place. Point
+datasette and ad-hoc reporting at the copy so long queries never hold WAL read
+marks on the writer's database:
+
+    python -m bot.snapshot                       # refresh once
+    datasette data/polybot_analytics.db
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from bot.config import ANALYTICS_DB_PATH, DB_PATH, SNAPSHOT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()  # one snapshot at a time in this process
+
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_markets_end_time ON markets(end_time)",
+    "CREATE INDEX IF NOT EXISTS idx_markets_decision ON markets(decision, end_time)",
+    "CREATE INDEX IF NOT EXISTS idx_markets_skip_reason ON markets(skip_reason)",
+]
+
+_VIEWS = [
+    """
+    CREATE VIEW IF NOT EXISTS daily_summary AS
+    SELECT
+        substr(end_time, 1, 10)                                   AS day,
+        COUNT(*)                                                  AS markets,
+        SUM(decision = 'ACTIVE')                                  AS active,
+        SUM(decision = 'SKIP')                                    AS skipped,
+        SUM(would_have_won = 1)                                   AS wins,
+        SUM(would_have_won = 0)                                   AS losses,
+        ROUND(1.0 * SUM(would_have_won = 1) / NULLIF(SUM(would_have_won IS NOT NULL), 0), 4) AS win_rate,
+        ROUND(SUM(theoretical_pnl), 2)                            AS theoretical_pnl,
+        ROUND(SUM(realistic_pnl), 2)                              AS realistic_pnl
+    FROM markets
+    GROUP BY day
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS skip_reasons AS
+    SELECT substr(end_time, 1, 10) AS day, skip_reason, COUNT(*) AS markets
+    FROM markets
+    WHERE decision = 'SKIP'
+    GROUP BY day, skip_reason
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS active_results AS
+    SELECT market_slug, end_time, beat_price, price_at_T14_59, distance_at_T14_31,
+           distance_at_decision, would_buy, actual_outcome, would_have_won,
+           theoretical_pnl, fill_shares, fill_vwap, fill_slippage, realistic_pnl,
+           order_latency_ms, decision_lead_ms
+    FROM markets
+    WHERE decision = 'ACTIVE'
+    """,
+]
+
+
+def create_snapshot(dest: str = ANALYTICS_DB_PATH) -> dict | None:
+    """Copy the live DB into dest and prepare it for read-heavy use. Returns timing stats, None if one is running."""
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        return _create_snapshot(dest)
+    finally:
+        _lock.release()
+
+
+def _create_snapshot(dest: str) -> dict:
+    started = time.perf_counter()
+    tmp = f"{dest}.{os.getpid()}.tmp"  # per process: sharded workers must not share it
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    src = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    dst = sqlite3.connect(tmp)
+    try:
+        # Single-step backup: one short read transaction gives a consistent copy
+        src.backup(dst)
+        copied = time.perf_counter()
+        dst.execute("PRAGMA journal_mode=DELETE")
+        for sql in _INDEXES + _VIEWS:
+            dst.execute(sql)
+        dst.execute("ANALYZE")
+        dst.commit()
+        rows = dst.execute("SELECT COUNT(*) FROM markets").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+
+    os.replace(tmp, dest)
+    stats = {
+        "path": dest,
+        "rows": rows,
+        "backup_ms": round((copied - started) * 1000, 1),
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        "created_at": time.time(),
+    }
+    logger.info("Analytics snapshot: %d rows in %sms -> %s", rows, stats["total_ms"], dest)
+    return stats
+
+
+async def snapshot_loop():
+    """Background task: refresh the analytics copy every SNAPSHOT_INTERVAL seconds."""
+    while True:
+        try:
+            await asyncio.to_thread(create_snapshot)
+        except Exception as e:
+            logger.error("Analytics snapshot failed: %s", e)
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+
+if __name__ == "__main__":
+    print(create_snapshot())
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone
 
 from bot.config import (
@@ -8,34 +9,59 @@ from bot.config import (
     TRACKING_START_SECS,
     BUY_PRICE,
     SIMULATED_SHARES,
-    SETTLEMENT_POLL_INTERVAL,
-    SETTLEMENT_POLL_TIMEOUT,
+    ORDER_SIZE,
+    FILL_SIM_SIZES,
+    DECISION_SAFETY_MARGIN_MS,
+    DECISION_DEFAULT_LEAD_SECS,
+    DECISION_MAX_LEAD_SECS,
+    MARKET_EVENT_SAMPLE_BATCH,
 )
+from bot import cpuprof, latency, memprof, tracing
+from bot.events import events
+from bot.execution import OrderExecutor
+from bot.fill_sim import simulate_buy, simulate_sizes
 from bot.logger import log_entry
+from bot.market_discovery import parse_token_ids
+from bot.orderbook import OrderBookFeed
 from bot.price_feed import ChainlinkPriceFeed
+from bot.records import Market, Sample
+from bot.settlement import PendingSettlement, provisional_settlement, reconciler, result_fields
 
 logger = logging.getLogger(__name__)
 
 
-async def run_market(market: dict, price_feed: ChainlinkPriceFeed, fetch_outcome_fn):
+async def run_market(market: Market, price_feed: ChainlinkPriceFeed, fetch_outcome_fn,
+                     book_feed: OrderBookFeed | None = None,
+                     executor: OrderExecutor | None = None):
     """
     Run the full strategy lifecycle for a single 15-minute market.
-    Logs a single entry to SQLite after settlement outcome is known.
+    Logs a single entry to SQLite right after the close, with the outcome read off our
+    own tick stream; Gamma's resolution is reconciled into it in the background.
+    If book_feed is given, the Up/Down order books are snapshotted at decision time.
+    If executor is given, orders for both sides are prepared during tracking and the
+    chosen one is submitted at the decision.
     """
-    market_id = market["id"]
-    market_slug = market.get("slug", "unknown")
-    beat_price = market["beat_price"]
-    end_time = market["end_time"]  # datetime (UTC)
+    with memprof.market_scope(market):
+        await _run_market(market, price_feed, fetch_outcome_fn, book_feed, executor)
+
+
+async def _run_market(market: Market, price_feed: ChainlinkPriceFeed, fetch_outcome_fn,
+                      book_feed: OrderBookFeed | None, executor: OrderExecutor | None):
+    market_id = market.id
+    market_slug = market.slug
+    beat_price = market.beat_price
+    end_time = market.end_time  # datetime (UTC)
 
     end_ts = end_time.timestamp()
     tracking_start_ts = end_ts - TRACKING_START_SECS
 
-    logger.info(f"[{market_slug}] Monitoring. Beat: ${beat_price:,.2f} | Ends: {end_time.isoformat()}")
+    logger.info("[%s] Monitoring. Beat: $%.2f | Ends: %s", market_slug, beat_price, end_time)
 
     # Phase: IDLE — wait until 30 seconds before close
     now_ts = datetime.now(timezone.utc).timestamp()
     if now_ts < tracking_start_ts:
-        await asyncio.sleep(tracking_start_ts - now_ts)
+        with tracing.span("idle"):
+            await asyncio.sleep(tracking_start_ts - now_ts)
 
     # Phase: EVALUATE — check if opportunity exists
     if not price_feed.is_available:
@@ -52,18 +78,37 @@ async def run_market(market: dict, price_feed: ChainlinkPriceFeed, fetch_outcome
         _log_skip(market, beat_price, "distance_too_small", distance, price, price_feed)
         return
 
-    logger.info(f"[{market_slug}] ACTIVE — distance ${distance:.2f}, tracking for {TRACKING_START_SECS - 1}s")
+    logger.info("[%s] ACTIVE — distance $%.2f, tracking for %ds", market_slug, distance, TRACKING_START_SECS - 1)
+
+    # Build and sign both candidate orders now so the decision only has to send one
+    if executor is not None:
+        with tracing.span("prepare_orders"):
+            await executor.prepare(market_id, parse_token_ids(market), BUY_PRICE, ORDER_SIZE)
+
+    # Phase: ACTIVE — track price every second (wall-clock aligned) until the decision deadline.
+    # The deadline is as late as the measured p99 latency allows (T+14:59 until we have samples).
+    lead_secs = decision_lead_secs()
+    deadline_ts = end_ts - lead_secs
+    targets = [tracking_start_ts + i for i in range(1, TRACKING_START_SECS) if tracking_start_ts + i < deadline_ts]
+    targets.append(deadline_ts)
+    logger.info("[%s] Decision deadline: %.0fms before close", market_slug, lead_secs * 1000)
 
-    # Phase: ACTIVE — track price every second (wall-clock aligned)
-    # 29 samples: T+14:31 through T+14:59
     prices = []
-    for tick in range(29):
-        target_ts = tracking_start_ts + tick + 1
-        now_ts = datetime.now(timezone.utc).timestamp()
+    memprof.hold(market_id, "samples", prices)
+    # Sampling drift: how late each sample landed after its target second
+    drift_ms = []
+    tracking = tracing.start_span("tracking", samples_planned=len(targets), lead_ms=round(lead_secs * 1000, 1))
+    for tick, target_ts in enumerate(targets):
+        now_ts = time.time()
         if now_ts < target_ts:
             await asyncio.sleep(target_ts - now_ts)
+        drift_ms.append(round((time.time() - target_ts) * 1000, 1))
+        cpuprof.note_drift(drift_ms[-1])
 
         if not price_feed.is_available:
+            tracking.end(aborted="chainlink_lost", drift_ms=drift_ms)
+            if executor is not None:
+                executor.discard(market_id)
             _log_skip(market, beat_price, "chainlink_lost_during_tracking", distance,
                       price_feed=price_feed)
             return
@@ -71,99 +116,228 @@ async def run_market(market: dict, price_feed: ChainlinkPriceFeed, fetch_outcome
         price = price_feed.price
         distance = abs(price - beat_price)
         side = "Up" if price > beat_price else "Down"
-        prices.append({
-            "t": tick,
-            "ts": datetime.now(timezone.utc).isoformat(),
-            "price": price,
-            "distance": round(distance, 2),
-            "side": side,
-        })
+        prices.append(Sample(tick, time.time(), price, round(distance, 2), side))
+        if len(prices) % MARKET_EVENT_SAMPLE_BATCH == 0:
+            events.record(market_id, "samples", price_samples=prices[-MARKET_EVENT_SAMPLE_BATCH:])
 
         # Safety: abort if distance drops below minimum
         if distance < DISTANCE_MIN:
+            tracking.end(aborted="unstable", drift_ms=drift_ms)
+            if executor is not None:
+                executor.discard(market_id)
             _log_skip(market, beat_price, "unstable_during_tracking", distance, price, price_feed)
             return
 
-    # Phase: DECISION — last sample before close
+    tracking.end(drift_ms=drift_ms, max_drift_ms=max(drift_ms))
+
+    # Phase: DECISION — last sample, taken at the deadline
+    decision = tracing.start_span("decision")
+    decision_perf = time.perf_counter()
+    tick_to_decision_ms = round(max(0.0, time.time() - deadline_ts) * 1000, 3)
+    latency.tick_to_decision.record(tick_to_decision_ms)
     final = prices[-1]
-    final_side = final["side"]
-    final_price = final["price"]
-    final_distance = final["distance"]
+    final_side = final.side
+    final_price = final.price
+    final_distance = final.distance
+
+    # Capture both books at decision time so the fill can be judged against real depth
+    decision_ts = time.time()
+    books = _snapshot_books(market, book_feed)
+    chosen_book = books.get(final_side) if books else None
+
+    order = await executor.submit(market_id, final_side, decision_perf) if executor is not None else None
+    if order is not None:
+        latency.decision_to_submit.record(order["latency_ms"])
+        logger.info(
+            "[%s] ORDER %s (%s) %s in %sms | id: %s",
+            market_slug, order["status"], order["mode"], final_side, order["latency_ms"], order.get("order_id"),
+        )
+
+    decision.end(side=final_side, tick_to_decision_ms=tick_to_decision_ms,
+                 order_status=order["status"] if order else None,
+                 order_latency_ms=order["latency_ms"] if order else None)
+    # Visible on the dashboard while settlement is pending; samples past the last full batch first
+    if len(prices) % MARKET_EVENT_SAMPLE_BATCH:
+        events.record(market_id, "samples", price_samples=prices[-(len(prices) % MARKET_EVENT_SAMPLE_BATCH):])
+    events.record(
+        market_id, "decision",
+        decision="ACTIVE", would_buy=final_side, price_at_T14_59=final_price, distance_at_decision=final_distance,
+        tick_to_decision_ms=tick_to_decision_ms,
+        decision_deadline=datetime.fromtimestamp(deadline_ts, timezone.utc).isoformat(),
+        decision_lead_ms=round(lead_secs * 1000, 1),
+        order_id=order.get("order_id") if order else None,
+        order_status=order["status"] if order else None,
+        order_latency_ms=order["latency_ms"] if order else None,
+    )
+
+    book_depth = _ask_depth(chosen_book, BUY_PRICE) if chosen_book else None
+    if book_depth is not None:
+        logger.info("[%s] Book depth for %s at <= $%s: %.0f shares", market_slug, final_side, BUY_PRICE, book_depth)
 
     logger.info(
-        f"[{market_slug}] DECISION — Would buy {final_side} at ${BUY_PRICE} | "
-        f"BTC: ${final_price:,.2f} | Dist: ${final_distance:.2f}"
+        "[%s] DECISION — Would buy %s at $%s | BTC: $%.2f | Dist: $%.2f",
+        market_slug, final_side, BUY_PRICE, final_price, final_distance,
     )
 
-    # Phase: WAIT FOR SETTLEMENT — poll for outcome
-    actual_outcome = await _poll_outcome(market_id, fetch_outcome_fn)
+    # Trades printed between the decision and close decide how much of a resting order fills
+    if chosen_book is not None:
+        now_ts = time.time()
+        if now_ts < end_ts:
+            with tracing.span("await_close"):
+                await asyncio.sleep(end_ts - now_ts)
+        chosen_book["trades_after"] = _trades_since(book_feed, chosen_book["token_id"], decision_ts)
+
+    # Phase: PROVISIONAL SETTLEMENT — the close tick from our own feed, a moment after end_time
+    with tracing.span("provisional_settlement") as settle:
+        provisional = await provisional_settlement(market, beat_price, price_feed)
+        if provisional is not None:
+            settle.set(outcome=provisional["provisional_outcome"], confidence=provisional["outcome_confidence"],
+                       close_price=provisional["close_price"])
+    provisional_outcome = provisional["provisional_outcome"] if provisional else None
+    if provisional is None:
+        logger.warning("[%s] No tick at close: result waits for Gamma", market_slug)
+    elif provisional["low_confidence_reasons"]:
+        logger.info("[%s] Provisional outcome %s is low-confidence: %s", market_slug, provisional_outcome,
+                    ", ".join(provisional["low_confidence_reasons"]))
 
-    # Phase: LOG — single complete entry
-    would_have_won = (actual_outcome == final_side) if actual_outcome else None
-    pnl = (1.0 - BUY_PRICE) * SIMULATED_SHARES if would_have_won else (-BUY_PRICE * SIMULATED_SHARES if would_have_won is False else None)
+    # Depth-aware fill against the decision-time book
+    fill = fill_sims = None
+    if chosen_book is not None:
+        trades_after = chosen_book.get("trades_after")
+        fill = simulate_buy(chosen_book, SIMULATED_SHARES, BUY_PRICE, trades_after)
+        fill_sims = simulate_sizes(chosen_book, FILL_SIM_SIZES, BUY_PRICE, None, trades_after)
+    # Results as of the provisional outcome; reconciliation recomputes them from Gamma's
+    results = result_fields(provisional_outcome, final_side, fill, fill_sims)
+    would_have_won = results["would_have_won"]
+    if fill is not None:
+        fill["pnl"] = results["realistic_pnl"]
+        fill_sims = results["fill_sims"]
+        logger.info(
+            "[%s] Simulated fill: %.0f/%d shares @ %s | slippage: %s",
+            market_slug, fill["filled"], SIMULATED_SHARES,
+            fill["vwap"] if fill["vwap"] is not None else "—", fill["slippage"],
+        )
 
     entry = {
         "market_id": market_id,
         "market_slug": market_slug,
-        "start_time": market.get("start_time", "").isoformat() if hasattr(market.get("start_time", ""), "isoformat") else str(market.get("start_time", "")),
+        "start_time": market.start_time.isoformat(),
         "end_time": end_time.isoformat(),
         "beat_price": beat_price,
-        "price_before_beat": market.get("price_before_beat"),
-        "price_after_beat": market.get("price_after_beat"),
-        "price_at_T14_31": prices[0]["price"] if prices else None,
-        "price_at_T14_45": prices[14]["price"] if len(prices) > 14 else None,
-        "price_at_T14_55": prices[24]["price"] if len(prices) > 24 else None,
-        "price_at_T14_58": prices[27]["price"] if len(prices) > 27 else None,
+        "price_before_beat": market.price_before_beat,
+        "price_after_beat": market.price_after_beat,
+        "price_at_T14_31": prices[0].price if prices else None,
+        "price_at_T14_45": prices[14].price if len(prices) > 14 else None,
+        "price_at_T14_55": prices[24].price if len(prices) > 24 else None,
+        "price_at_T14_58": prices[27].price if len(prices) > 27 else None,
         "price_at_T14_59": final_price,
-        "distance_at_T14_31": prices[0]["distance"] if prices else None,
+        "distance_at_T14_31": prices[0].distance if prices else None,
         "distance_at_decision": final_distance,
         "decision": "ACTIVE",
         "skip_reason": None,
         "would_buy": final_side,
-        "actual_outcome": actual_outcome,
+        "actual_outcome": None,
+        **(provisional or {}),
+        "outcome_source": "ticks" if provisional else None,
         "would_have_won": would_have_won,
-        "theoretical_pnl": round(pnl, 2) if pnl is not None else None,
+        "theoretical_pnl": results["theoretical_pnl"],
         "simulated_shares": SIMULATED_SHARES,
         "buy_price": BUY_PRICE,
         "price_samples": prices,
-        "price_ticks": price_feed.get_recent_ticks(60),
+        "price_ticks": price_feed.recent_ticks(60),
+        "order_book": books,
+        "book_depth_at_buy_price": book_depth,
+        "fill_shares": fill["filled"] if fill else None,
+        "fill_vwap": fill["vwap"] if fill else None,
+        "fill_slippage": fill["slippage"] if fill else None,
+        "realistic_pnl": fill["pnl"] if fill else None,
+        "fill_sims": fill_sims,
+        "order_id": order.get("order_id") if order else None,
+        "order_status": order["status"] if order else None,
+        "order_latency_ms": order["latency_ms"] if order else None,
+        "decision_deadline": datetime.fromtimestamp(deadline_ts, timezone.utc).isoformat(),
+        "decision_lead_ms": round(lead_secs * 1000, 1),
+        "tick_to_decision_ms": tick_to_decision_ms,
+        **_feed_gap_stats(market, price_feed),
+        "trace_id": market.trace_id,
     }
     log_entry(entry)
 
     result_str = "WIN" if would_have_won else ("LOSS" if would_have_won is False else "UNKNOWN")
-    logger.info(f"[{market_slug}] RESULT — {result_str} | Outcome: {actual_outcome} | Side: {final_side}")
-
-
-async def _poll_outcome(market_id: str, fetch_outcome_fn) -> str | None:
-    """Poll for market resolution. Returns 'Up', 'Down', or None if timeout."""
-    elapsed = 0
-    while elapsed < SETTLEMENT_POLL_TIMEOUT:
-        await asyncio.sleep(SETTLEMENT_POLL_INTERVAL)
-        elapsed += SETTLEMENT_POLL_INTERVAL
-        try:
-            outcome = await fetch_outcome_fn(market_id)
-            if outcome:
-                return outcome
-        except Exception as e:
-            logger.warning(f"Error polling outcome for {market_id}: {e}")
-    logger.warning(f"Timeout waiting for outcome: {market_id}")
-    return None
-
-
-def _log_skip(market: dict, beat_price: float, reason: str, distance: float,
+    logger.info("[%s] RESULT — %s (provisional) | Outcome: %s | Side: %s", market_slug, result_str,
+                provisional_outcome, final_side)
+
+    reconciler.start(PendingSettlement(
+        market_id, market_slug, final_side, end_ts, provisional_outcome,
+        provisional["outcome_confidence"] if provisional else None, fill, fill_sims,
+    ), fetch_outcome_fn)
+
+
+def decision_lead_secs() -> float:
+    """
+    How long before end_time the decision must be taken: p99 tick-to-decision plus
+    p99 decision-to-submit plus the configured safety margin, clamped to a sane range.
+    """
+    if latency.tick_to_decision.count == 0:
+        return DECISION_DEFAULT_LEAD_SECS
+    budget_ms = (
+        (latency.tick_to_decision.percentile(99) or 0)
+        + (latency.decision_to_submit.percentile(99) or 0)
+        + DECISION_SAFETY_MARGIN_MS
+    )
+    return min(DECISION_MAX_LEAD_SECS, budget_ms / 1000)
+
+
+def _snapshot_books(market: Market, book_feed: OrderBookFeed | None) -> dict | None:
+    """Return {"Up": snapshot, "Down": snapshot} for the market's CLOB tokens, or None."""
+    if book_feed is None:
+        return None
+    books = {}
+    for outcome, token_id in parse_token_ids(market).items():
+        snap = book_feed.snapshot(token_id)
+        if snap is not None:
+            books[outcome] = snap
+    return books or None
+
+
+def _trades_since(book_feed: OrderBookFeed, token_id: str, since_ts: float) -> list:
+    """Trades on a token printed after since_ts, as [[ts, price, size, side], ...]."""
+    book = book_feed.book(token_id)
+    return book.recent_trades(since_ts) if book is not None else []
+
+
+def _ask_depth(snapshot: dict, limit_price: float) -> float:
+    """Shares offered at or below limit_price in a book snapshot."""
+    return sum(size for price, size in snapshot["asks"] if price <= limit_price + 1e-9)
+
+
+def _feed_gap_stats(market: Market, price_feed: ChainlinkPriceFeed) -> dict:
+    """Count and total length of feed outages inside the market's window, to flag affected rows."""
+    # Gaps are kept in local receive time; market times are on the source clock
+    to_local = price_feed.clock.to_local
+    gaps = price_feed.gaps_between(to_local(market.start_time.timestamp()), to_local(market.end_time.timestamp()))
+    return {
+        "feed_gap_count": len(gaps),
+        "feed_gap_secs": round(sum(g["end"] - g["start"] for g in gaps), 2),
+    }
+
+
+def _log_skip(market: Market, beat_price: float, reason: str, distance: float,
                current_price: float | None = None,
                price_feed: ChainlinkPriceFeed | None = None):
     """Log a SKIP entry."""
     entry = {
-        "market_id": market["id"],
-        "market_slug": market.get("slug", "unknown"),
-        "end_time": market["end_time"].isoformat(),
+        "market_id": market.id,
+        "market_slug": market.slug,
+        "end_time": market.end_time.isoformat(),
         "beat_price": beat_price,
         "decision": "SKIP",
         "skip_reason": reason,
         "distance_at_decision": round(distance, 2),
         "current_price": current_price,
-        "price_ticks": price_feed.get_recent_ticks(60) if price_feed else None,
+        "price_ticks": price_feed.recent_ticks(60) if price_feed else None,
+        **(_feed_gap_stats(market, price_feed) if price_feed else {}),
+        "trace_id": market.trace_id,
     }
     log_entry(entry)
-    logger.info(f"[{market.get('slug', 'unknown')}] SKIP — {reason} (dist: ${distance:.2f})")
+    logger.info("[%s] SKIP — %s (dist: $%.2f)", market.slug, reason, distance)
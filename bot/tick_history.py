@@ -0,0 +1,150 @@
+"""
+Persistent BTC/USD tick history behind /api/ticks.
+
+TickRecorder copies new ticks from the price feed (in-process or shared-memory)
+into the ticks table, one batched write per TICK_FLUSH_INTERVAL, and prunes
+rows older than TICK_RETENTION_DAYS. query() answers a time range either as
+OHLC buckets or as a (ts, price) series downsampled with LTTB to at most the
+requested number of points. Ranges that ended long enough ago that no late
+tick can still land in them are cached.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from bot.config import (
+    TICK_BUFFER_SECS,
+    TICK_FLUSH_INTERVAL,
+    TICK_QUERY_CACHE_SIZE,
+    TICK_QUERY_MAX_POINTS,
+    TICK_REORDER_WINDOW,
+    TICK_RETENTION_DAYS,
+)
+from bot.db import insert_ticks, load_tick_candles, load_ticks, prune_ticks
+
+logger = logging.getLogger(__name__)
+
+_PRUNE_INTERVAL = 3600
+# A range is final once its end is older than this: ticks arrive up to the reorder
+# window late and are written on the next flush
+_CLOSED_AFTER_SECS = 30
+
+_cache: OrderedDict[tuple, dict] = OrderedDict()
+_cache_lock = threading.Lock()  # queries run in worker threads
+
+
+class TickRecorder:
+    """Batches ticks from a price feed into the ticks table."""
+
+    def __init__(self, price_feed):
+        self._feed = price_feed
+        self._last_flush = time.time()
+        self.flushes = 0
+        self.errors = 0
+
+    async def run(self):
+        last_prune = 0.0
+        while True:
+            await asyncio.sleep(TICK_FLUSH_INTERVAL)
+            now = time.time()
+            # Re-read the reorder window each time so late ticks are picked up; the
+            # primary key drops the repeats. After a failed write the window grows
+            # to cover everything since the last good flush (up to the feed's buffer).
+            window = min(TICK_BUFFER_SECS, now - self._last_flush + TICK_REORDER_WINDOW + TICK_FLUSH_INTERVAL)
+            rows = self._feed.recent_ticks(window)
+            try:
+                if rows:
+                    await asyncio.to_thread(insert_ticks, rows)
+                self._last_flush = now
+                self.flushes += 1
+                if now - last_prune > _PRUNE_INTERVAL:
+                    last_prune = now
+                    removed = await asyncio.to_thread(prune_ticks, now - TICK_RETENTION_DAYS * 86400)
+                    if removed:
+                        logger.info("Pruned %d ticks older than %d days", removed, TICK_RETENTION_DAYS)
+            except Exception as e:
+                self.errors += 1
+                logger.error("Tick history write failed: %s", e)
+
+
+def lttb(points: list[tuple[float, float]], threshold: int) -> list[tuple[float, float]]:
+    """Largest-Triangle-Three-Buckets downsampling of (x, y) points to `threshold` points."""
+    n = len(points)
+    if threshold >= n:
+        return list(points)
+    if threshold <= 2:
+        return [points[0], points[-1]]
+    out = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        span = nxt_end - nxt_start
+        avg_x = sum(p[0] for p in points[nxt_start:nxt_end]) / span
+        avg_y = sum(p[1] for p in points[nxt_start:nxt_end]) / span
+
+        ax, ay = points[a]
+        best, best_area = int(i * every) + 1, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area, best = area, j
+        out.append(points[best])
+        a = best
+    out.append(points[-1])
+    return out
+
+
+def _compute(start: float, end: float, bucket: float | None, points: int) -> dict:
+    if bucket:
+        candles = load_tick_candles(start, end, bucket)
+        return {
+            "from": start, "to": end, "bucket": bucket,
+            "count": sum(c[5] for c in candles),
+            "candles": [list(c) for c in candles],  # [bucket_start, open, high, low, close, ticks]
+        }
+    ticks = load_ticks(start, end)
+    series = lttb(ticks, points)
+    return {
+        "from": start, "to": end,
+        "count": len(ticks),
+        "downsampled": len(series) < len(ticks),
+        "points": [list(p) for p in series],  # [ts, price]
+    }
+
+
+def query(start: float, end: float, bucket: float | None = None, points: int = 1000) -> dict:
+    """
+    Ticks in [start, end) as OHLC candles (bucket seconds) or an LTTB series of at most
+    `points` points. Raises ValueError for ranges that would exceed TICK_QUERY_MAX_POINTS.
+    Blocking (SQLite); call from a thread.
+    """
+    if end <= start:
+        raise ValueError("to must be after from")
+    if bucket is not None:
+        if bucket <= 0:
+            raise ValueError("bucket must be positive")
+        if (end - start) / bucket > TICK_QUERY_MAX_POINTS:
+            raise ValueError(f"range / bucket exceeds {TICK_QUERY_MAX_POINTS} candles")
+    points = max(2, min(points, TICK_QUERY_MAX_POINTS))
+
+    key = (start, end, bucket, None if bucket else points)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return {**hit, "cached": True}
+
+    result = _compute(start, end, bucket, points)
+    if end < time.time() - _CLOSED_AFTER_SECS:
+        with _cache_lock:
+            _cache[key] = result
+            if len(_cache) > TICK_QUERY_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return {**result, "cached": False}
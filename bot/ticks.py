@@ -0,0 +1,84 @@
+"""
+Ordered, de-duplicated tick buffer.
+
+Ticks are kept sorted by source timestamp so windowed reads are a binary search.
+Late ticks within TICK_REORDER_WINDOW of the newest one are inserted in place;
+older stragglers are dropped. Every anomaly is counted.
+"""
+
+from bisect import bisect_left
+
+from bot.config import TICK_REORDER_WINDOW
+
+# Compact the backing lists once this many pruned entries have accumulated at the front
+_COMPACT_AT = 1024
+
+
+class TickStore:
+    """Sorted ticks for one symbol. Rows are tuples whose first field is the source timestamp."""
+
+    def __init__(self, symbol: str, reorder_window: float = TICK_REORDER_WINDOW):
+        self.symbol = symbol
+        self._reorder_window = reorder_window
+        self._ts: list[float] = []
+        self._rows: list[tuple] = []
+        self._head = 0  # first live index; entries before it are pruned
+        self.appended = 0
+        self.late = 0        # inserted out of order, within the reorder window
+        self.duplicates = 0  # same (symbol, timestamp) seen before
+        self.too_late = 0    # older than the reorder window, dropped
+
+    def insert(self, row: tuple) -> str:
+        """Add a tick. Returns "appended", "late", "duplicate" or "too_late"."""
+        ts = row[0]
+        n = len(self._ts)
+        if n == self._head or ts > self._ts[-1]:
+            self._ts.append(ts)
+            self._rows.append(row)
+            self.appended += 1
+            return "appended"
+
+        i = bisect_left(self._ts, ts, self._head)
+        if i < n and self._ts[i] == ts:
+            self.duplicates += 1
+            return "duplicate"
+        if self._ts[-1] - ts > self._reorder_window:
+            self.too_late += 1
+            return "too_late"
+        self._ts.insert(i, ts)
+        self._rows.insert(i, row)
+        self.late += 1
+        return "late"
+
+    def prune(self, cutoff: float):
+        """Drop ticks with timestamp < cutoff."""
+        self._head = bisect_left(self._ts, cutoff, self._head)
+        if self._head >= _COMPACT_AT and self._head * 2 >= len(self._ts):
+            del self._ts[:self._head]
+            del self._rows[:self._head]
+            self._head = 0
+
+    def since(self, start: float) -> list[tuple]:
+        """Ticks with timestamp >= start, oldest first."""
+        return self._rows[bisect_left(self._ts, start, self._head):]
+
+    def between(self, start: float, end: float) -> list[tuple]:
+        """Ticks with start <= timestamp < end, oldest first."""
+        lo = bisect_left(self._ts, start, self._head)
+        return self._rows[lo:bisect_left(self._ts, end, lo)]
+
+    def last(self) -> tuple | None:
+        return self._rows[-1] if len(self._rows) > self._head else None
+
+    def anomalies(self) -> dict:
+        return {"late": self.late, "duplicates": self.duplicates, "too_late": self.too_late}
+
+    def memory_stats(self) -> dict:
+        """Live ticks vs. rows still held by the backing lists (pruned but not yet compacted)."""
+        return {"ticks": len(self), "backing_rows": len(self._rows)}
+
+    def __len__(self) -> int:
+        return len(self._rows) - self._head
+
+    def __iter__(self):
+        return iter(self._rows[self._head:])
@@ -0,0 +1,174 @@
+"""
+Lightweight in-process tracing of each market's lifecycle.
+
+A market gets a trace when discover_markets first sees it; its root span runs
+until the market task finishes. Phases (beat capture, idle wait, tracking,
+decision, settlement wait, DB write) are child spans with attributes. The
+current span lives in a contextvar, so tasks created inside a span inherit it.
+
+Finished spans go to a ring buffer (TRACE_BUFFER_SPANS) served by /api/traces.
+With TRACE_EXPORT_PATH set, every finished trace is also appended to that file
+in Chrome trace-event format (open it in Perfetto or chrome://tracing).
+"""
+
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from bot.config import TRACE_BUFFER_SPANS, TRACE_EXPORT_PATH
+
+logger = logging.getLogger(__name__)
+
+_span_ids = itertools.count(1)
+_finished: deque["Span"] = deque(maxlen=TRACE_BUFFER_SPANS)
+_roots: dict[str, "Span"] = {}  # trace_id -> open root span
+_current: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end_ts", "attrs")
+
+    def __init__(self, name: str, trace_id: str, parent_id: int | None = None,
+                 start: float | None = None, **attrs):
+        self.trace_id = trace_id
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start if start is not None else time.time()
+        self.end_ts: float | None = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, end: float | None = None, **attrs):
+        """Finish the span (idempotent) and move it to the ring buffer."""
+        if self.end_ts is not None:
+            return
+        self.attrs.update(attrs)
+        self.end_ts = end if end is not None else time.time()
+        _finished.append(self)
+
+    @property
+    def duration_ms(self) -> float | None:
+        return round((self.end_ts - self.start) * 1000, 3) if self.end_ts is not None else None
+
+    def to_json(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end_ts,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+        }
+
+
+def new_trace_id() -> str:
+    return os.urandom(8).hex()
+
+
+# ── Recording ───────────────────────────────────────────────────────────────
+
+def start_trace(trace_id: str, name: str, start: float | None = None, **attrs) -> Span:
+    """Open the root span of a trace; it stays open until end_trace()."""
+    root = Span(name, trace_id, start=start, **attrs)
+    _roots[trace_id] = root
+    return root
+
+
+def end_trace(trace_id: str | None, **attrs):
+    """Close a trace's root span and export the trace if TRACE_EXPORT_PATH is set."""
+    root = _roots.pop(trace_id, None) if trace_id else None
+    if root is None:
+        return
+    root.end(**attrs)
+    if TRACE_EXPORT_PATH:
+        try:
+            _export(trace_id)
+        except OSError as e:
+            logger.warning("Trace export failed: %s", e)
+
+
+def start_span(name: str, parent: Span | None = None, start: float | None = None, **attrs) -> Span:
+    """Open a span under `parent` (default: the current span). The caller must end() it."""
+    parent = parent or _current.get()
+    if parent is None:
+        return Span(name, new_trace_id(), start=start, **attrs)
+    return Span(name, parent.trace_id, parent.span_id, start=start, **attrs)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Child span of the current one for the duration of the block; exceptions are recorded."""
+    s = start_span(name, **attrs)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def activate(s: Span | None):
+    """Make `s` the current span for the rest of the calling task (and tasks it creates)."""
+    _current.set(s)
+
+
+def root(trace_id: str | None) -> Span | None:
+    return _roots.get(trace_id) if trace_id else None
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+
+def get_trace(trace_id: str) -> list[Span]:
+    """Every buffered span of a trace (including its root if still open), oldest first."""
+    spans = [s for s in list(_finished) if s.trace_id == trace_id]
+    if trace_id in _roots:
+        spans.append(_roots[trace_id])
+    spans.sort(key=lambda s: s.start)
+    return spans
+
+
+def recent_traces(limit: int = 50) -> list[dict]:
+    """Roots of the most recent traces, open ones first."""
+    roots = [s for s in list(_finished) if s.parent_id is None]
+    roots.reverse()
+    out = [r.to_json() for r in _roots.values()] + [r.to_json() for r in roots]
+    return out[:limit]
+
+
+def chrome_events(spans: list[Span]) -> list[dict]:
+    """Chrome trace-event "complete" events; each trace gets its own row (tid)."""
+    pid = os.getpid()
+    now = time.time()
+    return [{
+        "name": s.name,
+        "cat": "market",
+        "ph": "X",
+        "ts": round(s.start * 1e6),
+        "dur": round(((s.end_ts if s.end_ts is not None else now) - s.start) * 1e6),
+        "pid": pid,
+        "tid": int(s.trace_id[:6], 16),
+        "args": {"trace_id": s.trace_id, "span_id": s.span_id, "parent_id": s.parent_id, **s.attrs},
+    } for s in spans]
+
+
+def _export(trace_id: str):
+    # JSON-array trace format: the closing bracket is optional, so events can be appended
+    fresh = not os.path.exists(TRACE_EXPORT_PATH) or os.path.getsize(TRACE_EXPORT_PATH) == 0
+    with open(TRACE_EXPORT_PATH, "a") as f:
+        if fresh:
+            f.write("[\n")
+        for event in chrome_events(get_trace(trace_id)):
+            f.write(json.dumps(event, default=str) + ",\n")
@@ -0,0 +1,6 @@
+"""Bot modules read LOG_DIR at import, so point it at a scratch directory before any test imports them."""
+
+import os
+import tempfile
+
+os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="polybot-tests-")
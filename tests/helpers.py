@@ -0,0 +1,11 @@
+import asyncio
+import time
+
+
+async def wait_for(condition, timeout: float = 5.0, interval: float = 0.01):
+    """Poll condition() until it is truthy; fail the test after timeout seconds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError(f"condition not met within {timeout:g}s")
+        await asyncio.sleep(interval)
@@ -0,0 +1,115 @@
+"""ClobExecutor order signing and L2 auth headers, against the fake CLOB REST API."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from bot import execution
+from bot.execution import ClobExecutor
+from bot.fakes.clob_api import FakeClobApi
+
+SECRET = base64.urlsafe_b64encode(b"test-secret").decode()
+TOKENS = {"Up": "111", "Down": "222"}
+
+
+@pytest.fixture
+def recorded_orders(monkeypatch):
+    """Order rows the executor would write to SQLite."""
+    rows = []
+    monkeypatch.setattr(execution, "insert_order", rows.append)
+    return rows
+
+
+def _executor(url: str, signed: list, **kwargs) -> ClobExecutor:
+    def signer(order: dict) -> str:
+        signed.append(dict(order))
+        return "0x" + "ab" * 65
+
+    return ClobExecutor(signer=signer, maker="0xMaker", api_key="key-1", api_secret=SECRET,
+                        api_passphrase="pass-1", base_url=url, **kwargs)
+
+
+async def _submit(clob: FakeClobApi, executor: ClobExecutor, side: str, price: float, size: float) -> dict:
+    await executor.start()
+    try:
+        await executor.prepare("m1", TOKENS, price, size)
+        result = await executor.submit("m1", side)
+        await asyncio.gather(*execution._pending_writes)
+        return result
+    finally:
+        await executor.close()
+
+
+def test_submit_signs_order_and_sends_l2_headers(recorded_orders):
+    async def scenario():
+        clob = FakeClobApi()
+        await clob.start()
+        signed = []
+        try:
+            result = await _submit(clob, _executor(clob.url, signed), "Up", 0.99, 5)
+        finally:
+            await clob.stop()
+        return clob, signed, result
+
+    clob, signed, result = asyncio.run(scenario())
+
+    assert result["status"] == "live" and result["order_id"].startswith("0x")
+    assert [o["tokenId"] for o in signed] == ["111", "222"]  # both outcomes signed at prepare time
+    assert all("signature" not in o for o in signed)
+
+    sent = clob.orders[0]
+    order = sent["body"]["order"]
+    assert order["tokenId"] == "111"
+    assert order["signature"] == "0x" + "ab" * 65
+    assert (order["makerAmount"], order["takerAmount"]) == ("4950000", "5000000")
+    assert order["maker"] == order["signer"] == "0xMaker" and order["signatureType"] == 0
+    assert sent["body"]["owner"] == "key-1" and sent["body"]["orderType"] == "GTC"
+
+    headers = {k.upper(): v for k, v in sent["headers"].items()}
+    assert headers["POLY_ADDRESS"] == "0xMaker"
+    assert headers["POLY_API_KEY"] == "key-1"
+    assert headers["POLY_PASSPHRASE"] == "pass-1"
+    body = json.dumps(sent["body"], separators=(",", ":"))
+    digest = hmac.new(b"test-secret", (headers["POLY_TIMESTAMP"] + "POST" + "/order" + body).encode(),
+                      hashlib.sha256).digest()
+    assert headers["POLY_SIGNATURE"] == base64.urlsafe_b64encode(digest).decode()
+
+    assert [(r["side"], r["status"], r["size"]) for r in recorded_orders] == [("Up", "live", 5)]
+
+
+def test_proxy_wallet_orders_use_signature_type_2(recorded_orders):
+    async def scenario():
+        clob = FakeClobApi()
+        await clob.start()
+        try:
+            executor = _executor(clob.url, [], signer_address="0xSigner")
+            await _submit(clob, executor, "Down", 0.99, 5)
+        finally:
+            await clob.stop()
+        return clob
+
+    clob = asyncio.run(scenario())
+    order = clob.orders[0]["body"]["order"]
+    assert (order["maker"], order["signer"], order["signatureType"]) == ("0xMaker", "0xSigner", 2)
+    assert clob.orders[0]["headers"]["POLY_ADDRESS"] == "0xSigner"
+
+
+def test_orders_over_max_notional_are_never_sent(recorded_orders):
+    async def scenario():
+        clob = FakeClobApi()
+        await clob.start()
+        signed = []
+        try:
+            result = await _submit(clob, _executor(clob.url, signed, max_notional=10), "Up", 0.99, 100)
+        finally:
+            await clob.stop()
+        return clob, signed, result
+
+    clob, signed, result = asyncio.run(scenario())
+    assert result["status"] == "not_prepared"
+    assert signed == [] and clob.orders == []
+    assert recorded_orders[0]["status"] == "not_prepared"
@@ -0,0 +1,52 @@
+"""Leader election for the once-per-database jobs of sharded workers."""
+
+import asyncio
+
+from bot import leases
+from bot.db import init_db
+from bot.leases import LeaseManager
+from tests.helpers import wait_for
+
+
+def test_one_leader_and_takeover(monkeypatch):
+    monkeypatch.setattr(leases, "LEASE_HEARTBEAT", 0.05)
+    monkeypatch.setattr(leases, "LEASE_TTL", 0.3)
+    init_db()
+
+    async def scenario():
+        started = []
+
+        def jobs(worker: str):
+            async def start():
+                started.append(worker)
+                return [asyncio.create_task(asyncio.sleep(60))]
+            return start
+
+        a, b = LeaseManager("worker-a", enabled=True), LeaseManager("worker-b", enabled=True)
+        task_a = asyncio.create_task(a.lead(jobs("a")))
+        await wait_for(lambda: a.leader)
+        task_b = asyncio.create_task(b.lead(jobs("b")))
+        await asyncio.sleep(0.3)
+        assert started == ["a"] and not b.leader
+
+        task_a.cancel()  # the leader dies without releasing its lease
+        await wait_for(lambda: b.leader)
+        assert started == ["a", "b"]
+        task_b.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_unsharded_worker_always_leads():
+    async def scenario():
+        started = []
+
+        async def start():
+            started.append(True)
+            return []
+
+        manager = LeaseManager("solo", enabled=False)
+        await manager.lead(start)
+        assert manager.leader and started == [True]
+
+    asyncio.run(scenario())
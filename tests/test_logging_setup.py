@@ -0,0 +1,31 @@
+"""RateLimitFilter: repeated templates are limited, but never across markets or for errors."""
+
+import logging
+
+from bot.logging_setup import RateLimitFilter
+
+
+def _record(msg: str, *args, level: int = logging.INFO, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("bot.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_repeats_are_limited_and_counted():
+    f = RateLimitFilter(burst=2, window=60)
+    passed = [f.filter(_record("Reconnecting in %.1fs", 1.5, level=logging.WARNING)) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert f.suppressed_total == 3
+
+
+def test_markets_do_not_share_a_budget():
+    f = RateLimitFilter(burst=1, window=60)
+    slugs = [f"btc-updown-15m-{i}" for i in range(5)]
+    assert all(f.filter(_record("[%s] Beat: $%.2f", slug, 65000.0)) for slug in slugs)
+    assert all(f.filter(_record("%s | SKIP", slug, market_slug=slug)) for slug in slugs)
+    assert not f.filter(_record("[%s] Beat: $%.2f", slugs[0], 65000.0))
+
+
+def test_errors_are_never_limited():
+    f = RateLimitFilter(burst=1, window=60)
+    assert all(f.filter(_record("Unexpected feed error: %s", "boom", level=logging.ERROR)) for _ in range(10))
@@ -0,0 +1,67 @@
+"""TelegramNotifier queueing, digests and 429 handling, against the fake Telegram API."""
+
+import asyncio
+import time
+
+from bot.fakes.telegram import FakeTelegram
+from bot.notifier import TelegramNotifier
+from tests.helpers import wait_for
+
+
+def _notifier(tg: FakeTelegram, **kwargs) -> TelegramNotifier:
+    kwargs = {"digest_secs": 0.05, "min_interval": 0, **kwargs}
+    return TelegramNotifier(token="test", chat_id="42", api_base=tg.url, **kwargs)
+
+
+def test_waits_retry_after_on_429():
+    async def scenario():
+        tg = FakeTelegram(rate_limit_every=2, retry_after=0.3)
+        await tg.start()
+        notifier = _notifier(tg)
+        task = asyncio.create_task(notifier.run())
+        try:
+            notifier.notify("first")
+            await wait_for(lambda: notifier.stats["sent"] == 1)
+            started = time.monotonic()
+            notifier.notify("second")  # request #2 is answered 429
+            await wait_for(lambda: notifier.stats["sent"] == 2)
+            return tg, notifier, time.monotonic() - started
+        finally:
+            task.cancel()
+            await tg.stop()
+
+    tg, notifier, elapsed = asyncio.run(scenario())
+    assert [m["text"] for m in tg.messages] == ["first", "second"]
+    assert tg.rate_limited == 1
+    assert notifier.stats["rate_limited"] == 1 and notifier.stats["retries"] == 1
+    assert elapsed >= 0.3
+
+
+def test_full_queue_drops_and_counts():
+    async def scenario():
+        tg = FakeTelegram()
+        await tg.start()
+        notifier = _notifier(tg, queue_size=2)
+        try:
+            for text in ("a", "b", "c"):
+                notifier.notify(text)
+            summary = notifier.summary()
+            task = asyncio.create_task(notifier.run())
+            await wait_for(lambda: notifier.stats["sent"] == 1)
+            task.cancel()
+            return tg, notifier, summary
+        finally:
+            await tg.stop()
+
+    tg, notifier, summary = asyncio.run(scenario())
+    assert summary["pending"] == 2
+    assert notifier.stats["queued"] == 2 and notifier.stats["dropped_queue_full"] == 1
+    # What was queued goes out as one digest
+    assert tg.messages[0]["text"] == "2 updates\n• a\n• b"
+    assert notifier.stats["digests"] == 1 and notifier.stats["events_sent"] == 2
+
+
+def test_disabled_without_token():
+    notifier = TelegramNotifier(token="", chat_id="42")
+    notifier.notify("ignored")
+    assert notifier.summary() == {"enabled": False, "pending": 0}
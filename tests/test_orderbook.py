@@ -0,0 +1,108 @@
+"""OrderBook deltas and snapshots, and OrderBookFeed against the fake CLOB market channel."""
+
+import asyncio
+
+from bot.fakes.clob_ws import FakeMarketChannel
+from bot.orderbook import OrderBook, OrderBookFeed
+from tests.helpers import wait_for
+
+UP, DOWN = "tok-up", "tok-down"
+
+
+def _book() -> OrderBook:
+    book = OrderBook(UP)
+    book.apply_snapshot(
+        bids=[{"price": ".97", "size": "300"}, {"price": "0.96", "size": "50"}],
+        asks=[{"price": "0.99", "size": "1500"}, {"price": "1.0", "size": "10"}],
+        ts=1000.0, book_hash="0xabc",
+    )
+    return book
+
+
+def test_snapshot_replaces_levels():
+    book = _book()
+    assert book.best_bid() == (0.97, 300.0)
+    assert book.best_ask() == (0.99, 1500.0)
+
+    book.apply_snapshot([{"price": "0.5", "size": "1"}], [], ts=1001.0)
+    assert book.best_bid() == (0.5, 1.0)
+    assert book.best_ask() is None
+    assert book.hash == "0xabc"  # kept when the new snapshot has none
+
+
+def test_deltas_update_and_remove_levels():
+    book = _book()
+    book.apply_change("SELL", "0.98", "200", ts=1002.0)
+    book.apply_change("BUY", "0.97", "0", ts=1003.0)
+    book.apply_change("SELL", "0.99", "800", ts=1004.0, book_hash="0xdef")
+
+    snap = book.snapshot(depth=2)
+    assert snap["asks"] == [[0.98, 200.0], [0.99, 800.0]]
+    assert snap["bids"] == [[0.96, 50.0]]
+    assert snap["ts"] == 1004.0
+    assert snap["hash"] == "0xdef"
+
+
+def test_snapshot_keeps_only_recent_trades():
+    book = _book()
+    for ts in (900.0, 975.0, 990.0):
+        book.record_trade("0.99", "10", "sell", ts)
+
+    snap = book.snapshot(trade_secs=30)
+    assert snap["trades"] == [[975.0, 0.99, 10.0, "SELL"], [990.0, 0.99, 10.0, "SELL"]]
+    assert book.recent_trades(980.0) == [[990.0, 0.99, 10.0, "SELL"]]
+
+
+def test_feed_applies_snapshot_deltas_and_trades():
+    async def scenario():
+        server = FakeMarketChannel({UP: {"bids": [[0.97, 300]], "asks": [[0.99, 1500]]}})
+        await server.start()
+        feed = OrderBookFeed(server.url)
+        task = asyncio.create_task(feed.run())
+        try:
+            await feed.subscribe([UP])
+            await wait_for(lambda: feed.book(UP) is not None)
+            assert feed.book(UP).best_ask() == (0.99, 1500.0)
+
+            await server.push_change(UP, "SELL", 0.99, 800)
+            await server.push_change(UP, "BUY", 0.98, 40)
+            await server.push_trade(UP, "SELL", 0.99, 700)
+            await wait_for(lambda: feed.book(UP).trades)
+
+            snap = feed.snapshot(UP)
+            assert snap["asks"] == [[0.99, 800.0]]
+            assert snap["bids"] == [[0.98, 40.0], [0.97, 300.0]]
+            assert [t[1:] for t in snap["trades"]] == [[0.99, 700.0, "SELL"]]
+        finally:
+            task.cancel()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_feed_resubscribes_after_reconnect():
+    async def scenario():
+        server = FakeMarketChannel({UP: {"bids": [[0.97, 300]], "asks": [[0.99, 1500]]},
+                                    DOWN: {"bids": [[0.01, 300]], "asks": [[0.03, 1500]]}})
+        await server.start()
+        feed = OrderBookFeed(server.url)
+        task = asyncio.create_task(feed.run())
+        try:
+            await feed.subscribe([UP])
+            await feed.subscribe([DOWN])
+            await wait_for(lambda: feed.book(UP) is not None and feed.book(DOWN) is not None)
+
+            await server.drop_clients()
+            await wait_for(lambda: not feed.connected)
+            assert feed.book(UP) is None  # stale until a fresh snapshot arrives
+            # The book moves while we are away; the resubscribe snapshot must carry it
+            await server.push_change(UP, "SELL", 0.99, 250)
+
+            await wait_for(lambda: feed.book(UP) is not None and feed.book(DOWN) is not None)
+            assert server.subscriptions[-1] == {"assets_ids": [DOWN, UP], "type": "market"}
+            assert feed.book(UP).best_ask() == (0.99, 250.0)
+        finally:
+            task.cancel()
+            await server.stop()
+
+    asyncio.run(scenario())
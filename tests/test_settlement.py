@@ -0,0 +1,41 @@
+"""Provisional settlement read off the tick buffer."""
+
+import time
+from datetime import datetime, timezone
+
+from bot.price_feed import ChainlinkPriceFeed
+from bot.records import Market, Tick
+from bot.settlement import provisional_outcome
+
+
+class _OffsetClock:
+    """Local clock running `offset` seconds ahead of the Chainlink source clock."""
+
+    def __init__(self, offset: float):
+        self.offset = offset
+
+    def to_local(self, source_ts: float) -> float:
+        return source_ts + self.offset
+
+
+def _market(end_ts: float) -> Market:
+    end = datetime.fromtimestamp(end_ts, tz=timezone.utc)
+    return Market(id="m1", slug="btc-updown-15m-test", start_time=datetime.fromtimestamp(end_ts - 900, tz=timezone.utc),
+                  end_time=end, price_before_beat=65000.0)
+
+
+def test_gap_around_close_is_found_on_the_local_clock():
+    offset = 5.0
+    end_ts = time.time() - offset - 10  # closed 10s ago on the source clock
+    feed = ChainlinkPriceFeed()
+    feed.clock = _OffsetClock(offset)
+    feed._last_recv = time.time()  # no outage in progress
+    feed._ticks.insert(Tick(end_ts - 1, 65100.0, None, end_ts - 1 + offset))
+    # Outage straddling the close, recorded in local receive time
+    local_close = end_ts + offset
+    feed._gaps.append({"start": local_close - 1, "end": local_close + 1, "duration": 2.0, "ticks_missed": 2})
+
+    result = provisional_outcome(_market(end_ts), 65000.0, feed)
+    assert result["provisional_outcome"] == "Up"
+    assert result["low_confidence_reasons"] == ["feed_gap"]
+    assert result["outcome_confidence"] == "low"